@@ -65,19 +65,59 @@ def FindFilesAndBuildFileList(sdir, fileInfoList, init=True):
     @param string sdir directory to scan
     @param list fileInfoList where to store results
     """
-    from parsers.filefinder import getFileList
+    from parsers.filefinder import getFileList, getGitFileList, FileManifest
     printProgress(_("Creating file list"), logName)
 
     # setup wanted file extensions
     fileExts = [('sql',metaInfo.sql_file_exts),('cpp',metaInfo.cpp_file_exts)]
     if metaInfo.indexPage['form'] != '': fileExts.append(('xml',['xml']))
 
+    # tracked files of a git working tree, with their blob hashes as content fingerprints
+    if metaInfo.discovery == 'git':
+        try:
+            files, fingerprints, changed = getGitFileList(sdir,fileExts,metaInfo.rcsnames,metaInfo.ignorefile,metaInfo.changedSince)
+        except EnvironmentError, e:
+            logger.error(_('Could not get the file list from git, walking the file system instead: %s'), e)
+        else:
+            fileInfoList += files
+            hypercore.cache.fingerprints = fingerprints
+            if changed is not None:
+                logger.info(_('%(count)s files changed since %(rev)s'), {'count':len(changed), 'rev':metaInfo.changedSince})
+                hypercore.cache.trusted = set([f.fileName for f in files if f.fileName not in changed and f.fileName in fingerprints])
+            metaInfo.fileManifest = None
+            adjustFileList(sdir, fileInfoList)
+            return
+    elif metaInfo.changedSince:
+        logger.warn(_('--changed-since requires the git discovery, ignored'))
+
+    # with caching enabled, directories unchanged since the last run need not be listed again
+    manifest = None
+    if metaInfo.useCache:
+        cache = hypercore.cache.cache(metaInfo.cacheDirectory)
+        manifest = cache.getData('manifest')
+        if not isinstance(manifest,FileManifest): manifest = FileManifest()
+
     # retrieve the list
-    fileInfoList += getFileList(sdir,fileExts,metaInfo.rcsnames,metaInfo.ignorefile)
+    fileInfoList += getFileList(sdir,fileExts,metaInfo.rcsnames,metaInfo.ignorefile,metaInfo.discoveryThreads,manifest)
+    metaInfo.fileManifest = manifest
+    if manifest is not None:
+        logger.info(_('%(added)s files added, %(removed)s removed since the last run'), {'added':len(manifest.added), 'removed':len(manifest.removed)})
+        try:
+            cache.putData('manifest',manifest)
+        except Exception, e:
+            logger.warn(_('Could not cache the file list: %s'), e)
+    adjustFileList(sdir, fileInfoList)
+
+
+#------------------------------------------------------------------------------
+def adjustFileList(sdir, fileInfoList):
+    """
+    Setup the unique names and numbers of the files found
+    @param string sdir directory scanned
+    @param list fileInfoList FileInfo objects
+    """
     cpos  = len(sdir)
     if sdir[cpos-1] != os.sep: cpos += 1
-
-    # some adjustments are required
     for f in fileInfoList:
         f.uniqueName = f.fileName[cpos:].replace('.','_').replace(os.path.sep,'--') # unique Name (for new-style refs)
         if f.uniqueNumber == 0: f.uniqueNumber = metaInfo.NextIndex()       # unique Number (old style, deprecated)
@@ -154,6 +194,8 @@ def configRead():
     metaInfo.cacheDirectory     = metaInfo.cmdOpts.cacheDir or config.get('FileNames','cache_dir',defCacheDir)
     if metaInfo.cmdOpts.cache is None: metaInfo.useCache = config.getBool('Process','cache',True)
     else: metaInfo.useCache = metaInfo.cmdOpts.cache
+    if config.get('Process','cache_validation','content').lower() == 'mtime': hypercore.cache.validation = 'mtime'
+    else: hypercore.cache.validation = 'content'
     metaInfo.htmlDir            = metaInfo.cmdOpts.htmlDir or config.get('FileNames','htmlDir',os.path.split(sys.argv[0])[0] + os.sep + "html" + os.sep)
     metaInfo.css_file           = config.get('FileNames','css_file','hypersql.css')
     metaInfo.css_url            = config.get('FileNames','css_url','')
@@ -179,6 +221,16 @@ def configRead():
         metaInfo.includeSource = config.getBool('Process','include_source',True)
     else: metaInfo.includeSource = metaInfo.cmdOpts.source
     metaInfo.includeSourceLimit = config.getInt('Process','include_source_limit',0)*1024
+    if metaInfo.cmdOpts.jobs is None:
+        metaInfo.jobs = config.getInt('Process','jobs',1)
+    else: metaInfo.jobs = metaInfo.cmdOpts.jobs
+    if metaInfo.cmdOpts.streamThreshold is None:
+        metaInfo.streamThreshold = config.getInt('Process','stream_threshold',0)*1024
+    else: metaInfo.streamThreshold = metaInfo.cmdOpts.streamThreshold*1024
+    metaInfo.formCodeMemory = config.getInt('Process','formcode_memory',65536)*1024
+    metaInfo.discoveryThreads = config.getInt('Process','discovery_threads',1)
+    metaInfo.discovery = (metaInfo.cmdOpts.discovery or config.get('Process','discovery','filesystem')).lower()
+    metaInfo.changedSince = metaInfo.cmdOpts.changedSince
     if metaInfo.cmdOpts.javadoc is None:
         metaInfo.useJavaDoc = config.getBool('Process','javadoc',True)
     else: metaInfo.useJavaDoc = metaInfo.cmdOpts.javadoc
@@ -401,21 +401,22 @@ def CreateDepGraphIndex():
                 gname = 'depgraph_'+gtyp+'.png'
                 # check the cache first
                 done = False
+                lines = metaInfo.depGraph[gtyp].getLines()
                 if metaInfo.useCache:
                     tmp = cache.get(gtyp,'depdata').split('\n')
-                    if tmp==metaInfo.depGraph[gtyp]:
+                    if tmp==lines:
                         try:
                           copy2(os_path.join(metaInfo.cacheDirectory,gname), os_path.join(metaInfo.htmlDir,gname))
                           done = True
                         except:
                           logger.error(_('Error while copying %s from cache'), gname)
                 if not done:
-                    g.set_graph(metaInfo.depGraph[gtyp])
+                    g.set_graph(lines)
                     res = g.make_graph(metaInfo.htmlDir + gname)
                     if res=='':
                         if metaInfo.useCache:
                           try:
-                            cache.put(gtyp,'depdata','\n'.join(metaInfo.depGraph[gtyp]))
+                            cache.put(gtyp,'depdata','\n'.join(lines))
                             copy2(os_path.join(metaInfo.htmlDir,gname), os_path.join(metaInfo.cacheDirectory,gname))
                           except:
                             logger.error(_('Error while copying %s to cache'), gname)
@@ -576,17 +576,35 @@ def MakeTaskList(taskType):
 
 #=================================================[ Source and Usage Pages ]===
 #------------------------------------------------------------------------------
-def CreateHyperlinkedSourceFilePages():
+# keywords, types and cache for the source file pages - set up by
+# CreateHyperlinkedSourceFilePages (and inherited by its worker processes)
+sourcePageData = {}
+
+def prepareSourceFilePage(file_info):
     """
-    Generates pages with the complete source code of each file, including link
-    targets (A NAME=) for each line. This way we can link directly to the line
-    starting the definition of an object, or where it is called (used) from.
-    Very basic syntax highlighting is performed here as well if code is included.
+    Apply the changes to the model the source file page of a file requires (as
+    the pages may be created in worker processes, but later steps need them)
+    @param object file_info FileInfo object of the file
+    """
+    file_info.sortLists()
+    for fi in file_info.formInfoList:
+        jdoc = fi.javadoc
+        if jdoc.isDefault(): continue
+        if len(jdoc.desc)<1 or (len(jdoc.desc)==1 and jdoc.desc[0]==''): jdoc.desc.append(fi.title)
+
+
+#------------------------------------------------------------------------------
+def CreateHyperlinkedSourceFilePage(idx):
+    """
+    Generate the page with the complete source code of a single file (see
+    CreateHyperlinkedSourceFilePages). The model must have been prepared by
+    prepareSourceFilePage.
+    @param int idx index of the file in metaInfo.fileInfoList
+    @return int idx
     """
     from hypercore.helpers import size_format, num_format
     from hypercore.codeformatter import hypercode
-    from sys import argv
-    import fileinput, re
+    import re
     def ObjectDetailsListItem(item,i,fsize,fileInfo):
         """
         Write the row for the overview
@@ -626,13 +644,7 @@ def CreateHyperlinkedSourceFilePages():
             infile_line_list = infile.readlines()
             infile.close()
         else:
-            if metaInfo.useCache:
-                try:
-                    formcode = cache.get(fInfo.fileName,'formcode')
-                except:
-                    formcode = ''
-            else:
-                formcode = '' ### need to re-create in case caching is turned off
+            formcode = metaInfo.formCode.get(fInfo.fileName)
             infile_line_list = formcode.split('\n')
             for line in range(len(infile_line_list)): infile_line_list[line] += '\n'
         return infile_line_list
@@ -650,9 +662,271 @@ def CreateHyperlinkedSourceFilePages():
         html += '</TD></TR>\n'
         return html
 
+    file_info   = metaInfo.fileInfoList[idx]
     top_level_directory = metaInfo.topLevelDirectory
-    if metaInfo.useCache: cache = hypercore.cache.cache(metaInfo.cacheDirectory)
-    pbarInit(_("Creating hyperlinked source file pages"),0,len(metaInfo.fileInfoList), logname)
+    sqlkeywords = sourcePageData['keywords']
+    sqltypes    = sourcePageData['types']
+    cache       = sourcePageData['cache']
+
+    # generate a file name for us to write to (+1 for delimiter)
+    outfilename = file_info.getHtmlName()
+
+    outfile = fopen(os.path.join(metaInfo.htmlDir,outfilename), "w", metaInfo.encoding)
+    outfile.write(MakeHTMLHeader(file_info.fileName[len(top_level_directory)+1:]))
+    outfile.write('<H1>' + file_info.fileName[len(top_level_directory)+1:] + '</H1>\n')
+
+    # ===[ JAVADOC STARTS HERE ]===
+    packagedetails = '\n\n'
+
+    # Do we have tables in this file?
+    if len(file_info.tabInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Tables')+'</H2>\n')
+        for v in range(len(file_info.tabInfoList)):
+            outfile.write(file_info.tabInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.tabInfoList[v].uniqueNumber][0]))
+
+    # Do we have views in this file?
+    if len(file_info.viewInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Views')+'</H2>\n')
+        for v in range(len(file_info.viewInfoList)):
+            outfile.write(file_info.viewInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.viewInfoList[v].uniqueNumber][0]))
+
+    # Do we have mviews in this file?
+    if len(file_info.mviewInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Materialized Views')+'</H2>\n')
+        for v in range(len(file_info.mviewInfoList)):
+            outfile.write(file_info.mviewInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.mviewInfoList[v].uniqueNumber][0]))
+
+    # Do we have synonyms in this file?
+    if len(file_info.synInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Synonyms')+'</H2>\n')
+        for v in range(len(file_info.synInfoList)):
+            outfile.write(file_info.synInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.synInfoList[v].uniqueNumber][0]))
+
+    # Do we have trigger in this file?
+    if len(file_info.triggerInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Triggers')+'</H2>\n')
+        for v in range(len(file_info.triggerInfoList)):
+            outfile.write(file_info.triggerInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.triggerInfoList[v].uniqueNumber][0]))
+
+    # Types
+    if len(file_info.typeInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Types')+'</H2>\n')
+        for v in range(len(file_info.typeInfoList)):
+            outfile.write(file_info.typeInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.typeInfoList[v].uniqueNumber][0]))
+
+    # Do we have stand-alone functions?
+    if len(file_info.functionInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Functions')+'</H2>\n')
+        for v in range(len(file_info.functionInfoList)):
+            outfile.write(file_info.functionInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.functionInfoList[v].uniqueNumber][0]))
+        
+    # Do we have stand-alone procedures?
+    if len(file_info.procedureInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Procedures')+'</H2>\n')
+        for v in range(len(file_info.procedureInfoList)):
+            outfile.write(file_info.procedureInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.procedureInfoList[v].uniqueNumber][0]))
+        
+    # Do we have forms in this file?
+    if len(file_info.formInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Form Overview')+'</H2>\n')
+        outfile.write('<TABLE CLASS="apilist">\n')
+        for v in range(len(file_info.formInfoList)):
+            fi = file_info.formInfoList[v]
+            jdoc = fi.javadoc
+            outfile.write(' <TR><TH COLSPAN="3">' + fi.name + '</TH></TR>\n')
+            outfile.write(' <TR><TD COLSPAN="3">')
+            if jdoc.isDefault():
+                outfile.write('<DIV CLASS="jd_desc">' + fi.title + '</DIV>')
+            else: # the title was added to the description by prepareSourceFilePage
+                outfile.write( jdoc.getHtml(file_info.anchorNames[fi.uniqueNumber][0]) )
+            outfile.write('  <DL><DT>'+_('Statistics')+':</DT><DD><TABLE CLASS="stat"><TR CLASS="tr0"><TD>' \
+                + _('XML Size') + '</TD><TD ALIGN="right">' + size_format(file_info.xmlbytes) + '</TD></TR><TR CLASS="tr1"><TD>' \
+                + _('PL/SQL Code') + '</TD><TD ALIGN="right">' + size_format(file_info.xmlcodebytes) + '<BR>(' + num_format(100*file_info.xmlcodebytes/file_info.xmlbytes,1) + '%)</TD></TR><TR CLASS="tr0"><TD>' \
+                + _('Packages') + '</TD><TD ALIGN="right">%d</TD></TR><TR CLASS="tr1"><TD>' % len(fi.packageInfoList) \
+                + _('Functions') + '</TD><TD ALIGN="right">%d</TD></TR><TR CLASS="tr0"><TD>' % len(fi.functionInfoList) \
+                + _('Procedures') + '</TD><TD ALIGN="right">%d</TD></TR><TR CLASS="tr1"><TD>' % len(fi.procedureInfoList) \
+                + _('Triggers') + '</TD><TD ALIGN="right">%d</TD></TR>' % len(fi.triggerInfoList))
+            i = 0
+            for s in sorted(fi.stats.keys()): # fixed order (dicts rebuilt from worker processes or the cache may iterate differently)
+                if fi.stats[s]>0:
+                    outfile.write('<TR CLASS="tr%d"><TD>' % (i%2) +s+'</TD><TD ALIGN="right">%d</TD></TR>' % fi.stats[s])
+                    i += 1
+            outfile.write('</TABLE></DD></TD></TR>\n')
+            # Check form for packages
+            if len(fi.packageInfoList) > 0:
+                packagedetails += '<A NAME="formpkgs"></A><H2>'+_('Form Packages')+'</H2>\n'
+                outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Packages')+'</TH></TR>\n')
+                i = 0
+                detailCount = 0
+                for item in fi.packageInfoList:
+                    html = ''
+                    haveDetails = False
+                    if not item.javadoc.isDefault(): haveDetails = True
+                    ObjectDetailsListItem(item,i,fi.codesize,file_info)
+                    html += '<A NAME="' + file_info.anchorNames[item.uniqueNumber][0]
+                    html += '"></A><TABLE CLASS="apilist" STYLE="margin-bottom: 10px;" WIDTH="95%">\n'
+                    html += ' <TR><TH>'
+                    html += (item.javadoc.name or item.name)
+                    html += '</TH></TR>\n <TR><TD>'
+                    html += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
+                    html += '</TD></TR>\n'
+                    i += 1
+                    # check package for functions ###TODO: See above, they must be detected first
+                    if len(item.functionInfoList) > 0:
+                        fhtml = ''
+                        for fu in item.functionInfoList:
+                            if not fu.javadoc.isDefault(): fhtml += (formPkgFuncDetails(fu) or '')
+                        if fhtml != '':
+                            html += ' <TR><TD HEIGHT="0.5em"></TH></TR>\n'
+                            html += ' <TR><TH CLASS="sub" STYLE="margin-top:0.5em;">'+_('Functions')+'</TH></TR>\n' + fhtml
+                            haveDetails = True
+                    # check package for procedures
+                    if len(item.procedureInfoList) > 0:
+                        fhtml = ''
+                        for fu in item.procedureInfoList:
+                            if not fu.javadoc.isDefault():
+                              fhtml += (formPkgFuncDetails(fu) or '')
+                        if fhtml != '':
+                            html += ' <TR><TD HEIGHT="0.5em"></TH></TR>\n'
+                            html += ' <TR><TH CLASS="sub">'+_('Procedures')+'</TH></TR>\n' + fhtml
+                            haveDetails = True
+                    html += '</TABLE>\n'
+                    if haveDetails:
+                        packagedetails += html
+                        detailCount += 1
+                if detailCount == 0: packagedetails += '<P ALIGN="center">'+_('No JavaDoc information available')+'</P>'
+            # Check form for functions
+            if len(fi.functionInfoList) > 0:
+                packagedetails += '<A NAME="formfuncs"></A><H2>'+_('Form Functions')+'</H2>\n'
+                outfile.write(' <TR><TD HEIGHT="0.5em" COLSPAN="3"></TH></TR>\n')
+                outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Functions')+'</TH></TR>\n')
+                i = 0
+                html = ''
+                for item in fi.functionInfoList:
+                    ObjectDetailsListItem(item,i,fi.codesize,file_info)
+                    html += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
+                    i += 1
+                if html == '': packagedetails += '<P ALIGN="center">'+_('No JavaDoc information available')+'</P>'
+                else: packagedetails += html
+            # Check form for procedures
+            if len(fi.procedureInfoList) > 0:
+                packagedetails += '<A NAME="formprocs"></A><H2>'+_('Form Procedures')+'</H2>\n'
+                outfile.write(' <TR><TD HEIGHT="0.5em" COLSPAN="3"></TH></TR>\n')
+                outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Procedures')+'</TH></TR>\n')
+                i = 0
+                html = ''
+                for item in fi.procedureInfoList:
+                    ObjectDetailsListItem(item,i,fi.codesize,file_info)
+                    html += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
+                    i += 1
+                if html == '': packagedetails += '<P ALIGN="center">'+_('No JavaDoc information available')+'</P>'
+                else: packagedetails += html
+            outfile.write('</TABLE>\n');
+
+
+    # Do we have packages in this file?
+    if len(file_info.packageInfoList) > 0:
+        outfile.write('<H2 CLASS="api">'+_('Package Overview')+'</H2>\n')
+        outfile.write('<TABLE CLASS="apilist">\n')
+        for p in range(len(file_info.packageInfoList)):
+            jdoc = file_info.packageInfoList[p].javadoc
+            aname = '<A NAME="'+file_info.anchorNames[file_info.packageInfoList[p].uniqueNumber][0]+'"></A>'
+            outfile.write(' <TR><TH COLSPAN="3">' + aname + file_info.packageInfoList[p].name + '</TH></TR>\n')
+            outfile.write(' <TR><TD COLSPAN="3">')
+            outfile.write( jdoc.getHtml(file_info.anchorNames[file_info.packageInfoList[p].uniqueNumber][0]) )
+            outfile.write('</TD></TR>\n')
+            # Check the packages for functions
+            if len(file_info.packageInfoList[p].functionInfoList) > 0:
+                packagedetails += '<A NAME="funcs"></A><H2>'+_('Functions')+'</H2>\n';
+                outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Functions')+'</TH></TR>\n')
+                i = 0
+                for item in file_info.packageInfoList[p].functionInfoList:
+                    ObjectDetailsListItem(item,i,file_info.bytes,file_info)
+                    packagedetails += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
+                    i += 1
+            # Check the packages for procedures
+            if len(file_info.packageInfoList[p].procedureInfoList) > 0:
+                packagedetails += '<A NAME="procs"></A><H2>'+_('Procedures')+'</H2>\n';
+                outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Procedures')+'</TH></TR>\n')
+                i = 0
+                for item in file_info.packageInfoList[p].procedureInfoList:
+                    ObjectDetailsListItem(item,i,file_info.bytes,file_info)
+                    packagedetails += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
+                    i += 1
+        outfile.write('</TABLE>\n\n')
+
+    outfile.write(packagedetails)
+    # ===[ JAVADOC END ]===
+
+    # include the source itself
+    if file_info.fileType == 'xml': codesize = file_info.formInfoList[0].codesize
+    else: codesize = file_info.bytes
+    if metaInfo.includeSource and ( metaInfo.includeSourceLimit==0 or codesize <= metaInfo.includeSourceLimit ):
+        outfile.write('\n<H2>'+_('Source')+'</H2>\n')
+        outfile.write('<PRE>')
+        if cache is not None:
+            if cache.check(file_info.fileName,'code'):
+                code = cache.get(file_info.fileName,'code')
+            else:
+                cache.remember(file_info.fileName) # the state the code derives from
+                code = hypercode(readCodeFromFile(file_info), sqlkeywords, sqltypes)
+                cache.put(file_info.fileName, 'code', code)
+        else:
+            code = hypercode(readCodeFromFile(file_info), sqlkeywords, sqltypes)
+        # Shall we hyperlink calls?
+        if metaInfo.linkCodeCalls:
+            if len(file_info.packageInfoList) > 0:
+                for p in range(len(file_info.packageInfoList)):
+                    for w in file_info.packageInfoList[p].whatUsed.keys():
+                        for u in file_info.packageInfoList[p].whatUsed[w]:
+                            if u[2] in ['file','pkg','view']: continue
+                            try: opname = u[3].parent.name
+                            except: opname = ''
+                            oname = u[3].name
+                            href  = u[0].getHtmlName() + '#L' + repr(u[1])
+                            patt = re.compile('\\b('+opname+')\\.('+oname+')\\b',re.I)
+                            oricode = code
+                            code = patt.sub('\\1.<A HREF="'+href+'">\\2</A>',code)
+                            if code==oricode and file_info.fileName==u[0].fileName: # no match on full name
+                                patt = re.compile('\\b('+oname+')(\\s*\\()')
+                                code = patt.sub('<A HREF="'+href+'">\\1</A>\\2',code)
+        try:
+            if len(metaInfo.encoding)>8 and metaInfo.encoding[0:8].lower()=='iso-8859':
+                # though \xa4 should be '&curren;', it usually is '&euro;'. u'\xa4' does not translate to iso-8859-*
+                # Other characters are messed up by the Oracle Form converter already beyond repair possibility.
+                outfile.write( code.replace(u'\xa4','&euro;') )
+            else:
+                outfile.write( code )
+        except UnicodeEncodeError, detail:
+            logger.error(_('Encoding trouble writing sourcecode of %s:'), file_info.fileName)
+            logger.error(detail)
+        outfile.write('</PRE>\n')
+        outfile.write('<DIV CLASS="toppagelink"><A HREF="#topOfPage">'+_('^ Top')+'</A></DIV><BR>\n')
+
+    outfile.write(MakeHTMLFooter(file_info.fileName[len(top_level_directory)+1:]))
+    outfile.close()
+
+    return idx
+
+
+#------------------------------------------------------------------------------
+def CreateHyperlinkedSourceFilePages():
+    """
+    Generates pages with the complete source code of each file, including link
+    targets (A NAME=) for each line. This way we can link directly to the line
+    starting the definition of an object, or where it is called (used) from.
+    Very basic syntax highlighting is performed here as well if code is included.
+    Pages only depend on their own file and the (read-only) model, so they are
+    created by multiple processes if configured (see metaInfo.jobs).
+    """
+    from hypercore.helpers import size_format, getJobs, scanOrder
+    from sys import argv
+    import fileinput, multiprocessing
+    if metaInfo.useCache: sourcePageData['cache'] = hypercore.cache.cache(metaInfo.cacheDirectory)
+    else: sourcePageData['cache'] = None
+    # skip all non-sql files
+    todo = [i for i in range(len(metaInfo.fileInfoList)) if metaInfo.fileInfoList[i].fileType in ['sql','xml']]
+    pbarInit(_("Creating hyperlinked source file pages"),0,len(todo), logname)
     if metaInfo.includeSourceLimit > 0:
         logger.info( _('Source code inclusion is limited to files smaller than %s'), size_format(metaInfo.includeSourceLimit,0) )
 
@@ -666,255 +940,28 @@ def CreateHyperlinkedSourceFilePages():
       if line.strip()[0]=='#':
         continue
       sqltypes.append(line.strip())
+    sourcePageData['keywords'] = sqlkeywords
+    sourcePageData['types']    = sqltypes
 
-    k = 0
-    for file_info in metaInfo.fileInfoList:
-        # update progressbar
-        k += 1
-        pbarUpdate(k)
+    for idx in todo: prepareSourceFilePage(metaInfo.fileInfoList[idx])
 
-        # skip all non-sql files
-        if file_info.fileType not in ['sql','xml']:
-            continue
-
-        # generate a file name for us to write to (+1 for delimiter)
-        outfilename = file_info.getHtmlName()
-
-        outfile = fopen(os.path.join(metaInfo.htmlDir,outfilename), "w", metaInfo.encoding)
-        outfile.write(MakeHTMLHeader(file_info.fileName[len(top_level_directory)+1:]))
-        outfile.write('<H1>' + file_info.fileName[len(top_level_directory)+1:] + '</H1>\n')
-
-        # ===[ JAVADOC STARTS HERE ]===
-        file_info.sortLists()
-        packagedetails = '\n\n'
-
-        # Do we have tables in this file?
-        if len(file_info.tabInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Tables')+'</H2>\n')
-            for v in range(len(file_info.tabInfoList)):
-                outfile.write(file_info.tabInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.tabInfoList[v].uniqueNumber][0]))
-
-        # Do we have views in this file?
-        if len(file_info.viewInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Views')+'</H2>\n')
-            for v in range(len(file_info.viewInfoList)):
-                outfile.write(file_info.viewInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.viewInfoList[v].uniqueNumber][0]))
-
-        # Do we have mviews in this file?
-        if len(file_info.mviewInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Materialized Views')+'</H2>\n')
-            for v in range(len(file_info.mviewInfoList)):
-                outfile.write(file_info.mviewInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.mviewInfoList[v].uniqueNumber][0]))
-
-        # Do we have synonyms in this file?
-        if len(file_info.synInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Synonyms')+'</H2>\n')
-            for v in range(len(file_info.synInfoList)):
-                outfile.write(file_info.synInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.synInfoList[v].uniqueNumber][0]))
-
-        # Do we have trigger in this file?
-        if len(file_info.triggerInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Triggers')+'</H2>\n')
-            for v in range(len(file_info.triggerInfoList)):
-                outfile.write(file_info.triggerInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.triggerInfoList[v].uniqueNumber][0]))
-
-        # Types
-        if len(file_info.typeInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Types')+'</H2>\n')
-            for v in range(len(file_info.typeInfoList)):
-                outfile.write(file_info.typeInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.typeInfoList[v].uniqueNumber][0]))
-
-        # Do we have stand-alone functions?
-        if len(file_info.functionInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Functions')+'</H2>\n')
-            for v in range(len(file_info.functionInfoList)):
-                outfile.write(file_info.functionInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.functionInfoList[v].uniqueNumber][0]))
-            
-        # Do we have stand-alone procedures?
-        if len(file_info.procedureInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Procedures')+'</H2>\n')
-            for v in range(len(file_info.procedureInfoList)):
-                outfile.write(file_info.procedureInfoList[v].javadoc.getHtml(file_info.anchorNames[file_info.procedureInfoList[v].uniqueNumber][0]))
-            
-        # Do we have forms in this file?
-        if len(file_info.formInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Form Overview')+'</H2>\n')
-            outfile.write('<TABLE CLASS="apilist">\n')
-            for v in range(len(file_info.formInfoList)):
-                fi = file_info.formInfoList[v]
-                jdoc = fi.javadoc
-                outfile.write(' <TR><TH COLSPAN="3">' + fi.name + '</TH></TR>\n')
-                outfile.write(' <TR><TD COLSPAN="3">')
-                if jdoc.isDefault():
-                    outfile.write('<DIV CLASS="jd_desc">' + fi.title + '</DIV>')
-                else:
-                    if len(jdoc.desc)<1 or (len(jdoc.desc)==1 and jdoc.desc[0]==''): jdoc.desc.append(fi.title)
-                    outfile.write( jdoc.getHtml(file_info.anchorNames[fi.uniqueNumber][0]) )
-                outfile.write('  <DL><DT>'+_('Statistics')+':</DT><DD><TABLE CLASS="stat"><TR CLASS="tr0"><TD>' \
-                    + _('XML Size') + '</TD><TD ALIGN="right">' + size_format(file_info.xmlbytes) + '</TD></TR><TR CLASS="tr1"><TD>' \
-                    + _('PL/SQL Code') + '</TD><TD ALIGN="right">' + size_format(file_info.xmlcodebytes) + '<BR>(' + num_format(100*file_info.xmlcodebytes/file_info.xmlbytes,1) + '%)</TD></TR><TR CLASS="tr0"><TD>' \
-                    + _('Packages') + '</TD><TD ALIGN="right">%d</TD></TR><TR CLASS="tr1"><TD>' % len(fi.packageInfoList) \
-                    + _('Functions') + '</TD><TD ALIGN="right">%d</TD></TR><TR CLASS="tr0"><TD>' % len(fi.functionInfoList) \
-                    + _('Procedures') + '</TD><TD ALIGN="right">%d</TD></TR><TR CLASS="tr1"><TD>' % len(fi.procedureInfoList) \
-                    + _('Triggers') + '</TD><TD ALIGN="right">%d</TD></TR>' % len(fi.triggerInfoList))
-                i = 0
-                for s in fi.stats.keys():
-                    if fi.stats[s]>0:
-                        outfile.write('<TR CLASS="tr%d"><TD>' % (i%2) +s+'</TD><TD ALIGN="right">%d</TD></TR>' % fi.stats[s])
-                        i += 1
-                outfile.write('</TABLE></DD></TD></TR>\n')
-                # Check form for packages
-                if len(fi.packageInfoList) > 0:
-                    packagedetails += '<A NAME="formpkgs"></A><H2>'+_('Form Packages')+'</H2>\n'
-                    outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Packages')+'</TH></TR>\n')
-                    i = 0
-                    detailCount = 0
-                    for item in fi.packageInfoList:
-                        html = ''
-                        haveDetails = False
-                        if not item.javadoc.isDefault(): haveDetails = True
-                        ObjectDetailsListItem(item,i,fi.codesize,file_info)
-                        html += '<A NAME="' + file_info.anchorNames[item.uniqueNumber][0]
-                        html += '"></A><TABLE CLASS="apilist" STYLE="margin-bottom: 10px;" WIDTH="95%">\n'
-                        html += ' <TR><TH>'
-                        html += (item.javadoc.name or item.name)
-                        html += '</TH></TR>\n <TR><TD>'
-                        html += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
-                        html += '</TD></TR>\n'
-                        i += 1
-                        # check package for functions ###TODO: See above, they must be detected first
-                        if len(item.functionInfoList) > 0:
-                            fhtml = ''
-                            for fu in item.functionInfoList:
-                                if not fu.javadoc.isDefault(): fhtml += (formPkgFuncDetails(fu) or '')
-                            if fhtml != '':
-                                html += ' <TR><TD HEIGHT="0.5em"></TH></TR>\n'
-                                html += ' <TR><TH CLASS="sub" STYLE="margin-top:0.5em;">'+_('Functions')+'</TH></TR>\n' + fhtml
-                                haveDetails = True
-                        # check package for procedures
-                        if len(item.procedureInfoList) > 0:
-                            fhtml = ''
-                            for fu in item.procedureInfoList:
-                                if not fu.javadoc.isDefault():
-                                  fhtml += (formPkgFuncDetails(fu) or '')
-                            if fhtml != '':
-                                html += ' <TR><TD HEIGHT="0.5em"></TH></TR>\n'
-                                html += ' <TR><TH CLASS="sub">'+_('Procedures')+'</TH></TR>\n' + fhtml
-                                haveDetails = True
-                        html += '</TABLE>\n'
-                        if haveDetails:
-                            packagedetails += html
-                            detailCount += 1
-                    if detailCount == 0: packagedetails += '<P ALIGN="center">'+_('No JavaDoc information available')+'</P>'
-                # Check form for functions
-                if len(fi.functionInfoList) > 0:
-                    packagedetails += '<A NAME="formfuncs"></A><H2>'+_('Form Functions')+'</H2>\n'
-                    outfile.write(' <TR><TD HEIGHT="0.5em" COLSPAN="3"></TH></TR>\n')
-                    outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Functions')+'</TH></TR>\n')
-                    i = 0
-                    html = ''
-                    for item in fi.functionInfoList:
-                        ObjectDetailsListItem(item,i,fi.codesize,file_info)
-                        html += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
-                        i += 1
-                    if html == '': packagedetails += '<P ALIGN="center">'+_('No JavaDoc information available')+'</P>'
-                    else: packagedetails += html
-                # Check form for procedures
-                if len(fi.procedureInfoList) > 0:
-                    packagedetails += '<A NAME="formprocs"></A><H2>'+_('Form Procedures')+'</H2>\n'
-                    outfile.write(' <TR><TD HEIGHT="0.5em" COLSPAN="3"></TH></TR>\n')
-                    outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Procedures')+'</TH></TR>\n')
-                    i = 0
-                    html = ''
-                    for item in fi.procedureInfoList:
-                        ObjectDetailsListItem(item,i,fi.codesize,file_info)
-                        html += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
-                        i += 1
-                    if html == '': packagedetails += '<P ALIGN="center">'+_('No JavaDoc information available')+'</P>'
-                    else: packagedetails += html
-                outfile.write('</TABLE>\n');
-
-
-        # Do we have packages in this file?
-        if len(file_info.packageInfoList) > 0:
-            outfile.write('<H2 CLASS="api">'+_('Package Overview')+'</H2>\n')
-            outfile.write('<TABLE CLASS="apilist">\n')
-            for p in range(len(file_info.packageInfoList)):
-                jdoc = file_info.packageInfoList[p].javadoc
-                aname = '<A NAME="'+file_info.anchorNames[file_info.packageInfoList[p].uniqueNumber][0]+'"></A>'
-                outfile.write(' <TR><TH COLSPAN="3">' + aname + file_info.packageInfoList[p].name + '</TH></TR>\n')
-                outfile.write(' <TR><TD COLSPAN="3">')
-                outfile.write( jdoc.getHtml(file_info.anchorNames[file_info.packageInfoList[p].uniqueNumber][0]) )
-                outfile.write('</TD></TR>\n')
-                # Check the packages for functions
-                if len(file_info.packageInfoList[p].functionInfoList) > 0:
-                    packagedetails += '<A NAME="funcs"></A><H2>'+_('Functions')+'</H2>\n';
-                    outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Functions')+'</TH></TR>\n')
-                    i = 0
-                    for item in file_info.packageInfoList[p].functionInfoList:
-                        ObjectDetailsListItem(item,i,file_info.bytes,file_info)
-                        packagedetails += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
-                        i += 1
-                # Check the packages for procedures
-                if len(file_info.packageInfoList[p].procedureInfoList) > 0:
-                    packagedetails += '<A NAME="procs"></A><H2>'+_('Procedures')+'</H2>\n';
-                    outfile.write(' <TR><TH CLASS="sub" COLSPAN="3">'+_('Procedures')+'</TH></TR>\n')
-                    i = 0
-                    for item in file_info.packageInfoList[p].procedureInfoList:
-                        ObjectDetailsListItem(item,i,file_info.bytes,file_info)
-                        packagedetails += item.javadoc.getHtml(file_info.anchorNames[item.uniqueNumber][0])
-                        i += 1
-            outfile.write('</TABLE>\n\n')
-
-        outfile.write(packagedetails)
-        # ===[ JAVADOC END ]===
-
-        # include the source itself
-        if file_info.fileType == 'xml': codesize = file_info.formInfoList[0].codesize
-        else: codesize = file_info.bytes
-        if metaInfo.includeSource and ( metaInfo.includeSourceLimit==0 or codesize <= metaInfo.includeSourceLimit ):
-            outfile.write('\n<H2>'+_('Source')+'</H2>\n')
-            outfile.write('<PRE>')
-            if metaInfo.useCache:
-                if cache.check(file_info.fileName,'code'):
-                    code = cache.get(file_info.fileName,'code')
-                else:
-                    code = hypercode(readCodeFromFile(file_info), sqlkeywords, sqltypes)
-                    cache.put(file_info.fileName, 'code', code)
-            else:
-                code = hypercode(readCodeFromFile(file_info), sqlkeywords, sqltypes)
-            # Shall we hyperlink calls?
-            if metaInfo.linkCodeCalls:
-                if len(file_info.packageInfoList) > 0:
-                    for p in range(len(file_info.packageInfoList)):
-                        for w in file_info.packageInfoList[p].whatUsed.keys():
-                            for u in file_info.packageInfoList[p].whatUsed[w]:
-                                if u[2] in ['file','pkg','view']: continue
-                                try: opname = u[3].parent.name
-                                except: opname = ''
-                                oname = u[3].name
-                                href  = u[0].getHtmlName() + '#L' + repr(u[1])
-                                patt = re.compile('\\b('+opname+')\\.('+oname+')\\b',re.I)
-                                oricode = code
-                                code = patt.sub('\\1.<A HREF="'+href+'">\\2</A>',code)
-                                if code==oricode and file_info.fileName==u[0].fileName: # no match on full name
-                                    patt = re.compile('\\b('+oname+')(\\s*\\()')
-                                    code = patt.sub('<A HREF="'+href+'">\\1</A>\\2',code)
-            try:
-                if len(metaInfo.encoding)>8 and metaInfo.encoding[0:8].lower()=='iso-8859':
-                    # though \xa4 should be '&curren;', it usually is '&euro;'. u'\xa4' does not translate to iso-8859-*
-                    # Other characters are messed up by the Oracle Form converter already beyond repair possibility.
-                    outfile.write( code.replace(u'\xa4','&euro;') )
-                else:
-                    outfile.write( code )
-            except UnicodeEncodeError, detail:
-                logger.error(_('Encoding trouble writing sourcecode of %s:'), file_info.fileName)
-                logger.error(detail)
-            outfile.write('</PRE>\n')
-            outfile.write('<DIV CLASS="toppagelink"><A HREF="#topOfPage">'+_('^ Top')+'</A></DIV><BR>\n')
-
-        outfile.write(MakeHTMLFooter(file_info.fileName[len(top_level_directory)+1:]))
-        outfile.close()
+    jobs = getJobs(metaInfo.jobs, len(todo))
+    k = 0
+    if jobs > 1:
+        # the workers inherit the model, and write the pages themselves
+        pool = multiprocessing.Pool(jobs)
+        try:
+            for idx in pool.imap_unordered(CreateHyperlinkedSourceFilePage, scanOrder(todo, metaInfo.fileInfoList)):
+                k += 1
+                pbarUpdate(k)
+        finally: # do not leave the workers behind
+            pool.terminate()
+            pool.join()
+    else:
+        for idx in todo:
+            k += 1
+            pbarUpdate(k)
+            CreateHyperlinkedSourceFilePage(idx)
 
     # complete line on task completion
     pbarClose()
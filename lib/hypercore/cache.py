@@ -6,8 +6,28 @@ Copyright 2010 Itzchak Rehberg & IzzySoft
 
 import os
 import cPickle
+from hashlib import md5
 from iz_tools.system import fopen
 
+# How to find out whether cached copies are still up-to-date: 'mtime' (the
+# original file must not be newer than the copy), or 'content' (the content
+# must be the same - checked via size and mtime first, and via its fingerprint
+# only if those differ). Set from the configuration (Process/cache_validation).
+validation = 'content'
+
+# Content fingerprints of original files known without reading them (file name
+# -> fingerprint), e.g. the blob hashes of files in a git working tree. Used
+# instead of computing them, and to validate cached copies by the fingerprint
+# alone. Files listed in trusted are not validated at all: their cached copies
+# are known to be up-to-date (see --changed-since). Both set by the file discovery.
+fingerprints = {}
+trusted      = set()
+
+# Stamps of the original files in the state they were read in during this run
+# (file name -> stamp, see cache.remember()): each file is fingerprinted at most
+# once per run, and cached data derived from it are stamped with that state.
+stamps = {}
+
 class cache(object):
     """ A simple caching mechanism """
 
@@ -19,6 +39,7 @@ class cache(object):
         """
         try: self.encoding = encoding
         except: self.encoding = 'utf-8'
+        self.validation = validation
         self.dirname = dirname
         if not os.path.isdir(dirname):
             splitted = dirname.split(os.sep)
@@ -67,12 +88,106 @@ class cache(object):
         cname = self.makename(fname,ctype)
         if not os.path.isfile(cname): return False # no cache
         if os.path.getsize(cname) == 0: return False # no content
+        if fname in trusted: return True
+        if ftim==0 and self.validation == 'content':
+            stamp = self.getStamp(cname)
+            if stamp is not None: # otherwise written in mtime mode: check that way
+                if self.valid(fname,stamp):
+                    if os.path.getmtime(fname) != stamp[1]: # refresh it, so the next check is cheap again
+                        self.putStamp(fname,cname)
+                    return True
+                self.remove(cname) # expired
+                return False
         if ftim==0: ftim = os.path.getmtime(fname)
         if ftim > os.path.getmtime(cname): # expired
-            os.unlink(cname)
+            self.remove(cname)
             return False
         return True
 
+    def stamp(self,fname):
+        """
+        Get the stamp of a file, which identifies its current state
+        @param self
+        @param string fname name of the file
+        @return tuple (int size, float mtime, string fingerprint)
+        """
+        st = os.stat(fname)
+        return (st.st_size, st.st_mtime, self.fingerprint(fname))
+
+    def remember(self,fname):
+        """
+        Take the stamp of an original file before it is read, unless this was
+        done before during this run (see stamps). Cached data derived from the
+        file are stored with this stamp - so if the file changes after it was
+        read, the cached data are not taken for the new content.
+        @param self
+        @param string fname name of the file
+        @return tuple stamp (see stamp())
+        """
+        if fname not in stamps: stamps[fname] = self.stamp(fname)
+        return stamps[fname]
+
+    def valid(self,fname,stamp):
+        """
+        Check whether a file is still in the state described by stamp. If size
+        and mtime did not change, neither did the content. Otherwise (e.g. after
+        a fresh checkout), in 'content' validation mode the fingerprint decides.
+        If the fingerprint is known without reading the file (see fingerprints),
+        it decides right away. Fingerprints computed here are remembered for
+        the rest of the run (see remember()).
+        @param self
+        @param string fname name of the file
+        @param tuple stamp as returned by stamp()
+        @return boolean valid
+        """
+        if self.validation == 'content' and fname in fingerprints:
+            return fingerprints[fname] == stamp[2]
+        try:
+            st = os.stat(fname)
+        except OSError:
+            return False
+        if st.st_size != stamp[0]: return False
+        if st.st_mtime == stamp[1]: return True
+        return self.validation == 'content' and self.remember(fname)[2] == stamp[2]
+
+    def getStamp(self,cname):
+        """
+        Get the stamp of the original file stored along with a cache file
+        @param self
+        @param string cname name of the cache file
+        @return tuple stamp (see stamp()), or None if there is none
+        """
+        try:
+            sfile = open(cname + '.stamp','r')
+            size, mtime, fingerprint = sfile.read().split()
+            sfile.close()
+            return (int(size), float(mtime), fingerprint)
+        except (IOError, ValueError):
+            return None
+
+    def putStamp(self,fname,cname):
+        """
+        Store the stamp of the original file along with a cache file (only
+        with 'content' validation, see check()) - as it was read in this run
+        (see remember())
+        @param self
+        @param string fname name of the original file
+        @param string cname name of the cache file
+        """
+        if self.validation != 'content' or not os.path.isfile(fname): return
+        sfile = open(cname + '.stamp','w')
+        sfile.write('%d %r %s' % self.remember(fname))
+        sfile.close()
+
+    def remove(self,cname):
+        """
+        Remove a cache file (and the stamp stored along with it)
+        @param self
+        @param string cname name of the cache file
+        """
+        if os.path.isfile(cname): os.unlink(cname)
+        if os.path.isfile(cname + '.stamp'): os.unlink(cname + '.stamp')
+
     def removeObsolete(self,basedir=''):
         """
         Cleanup files from cache which do no longer exist in the original location
@@ -87,9 +202,14 @@ class cache(object):
         for i in names:
             splitted = i.split('.')
             ctype = splitted[len(splitted)-1]
-            if not ctype in ['code','formcode']: continue
+            if ctype == 'stamp': # stamps go with their cache file
+                sname = os.path.join(self.dirname, i)
+                if not os.path.isfile(sname[:-6]) and os.path.isfile(sname):
+                    os.unlink(sname)
+                continue
+            if not ctype in ['code','form','formcode','scan','usage']: continue
             if not os.path.isfile(self.getOName(i,ctype)):
-                os.unlink( os.path.join(self.dirname, i) )
+                self.remove( os.path.join(self.dirname, i) )
                 dc += 1
         return dc
             
@@ -104,8 +224,8 @@ class cache(object):
         """
         cname = self.makename(fname,ctype)
         if not os.path.isfile(cname): return '' # no cache
-        cfile = fopen(cname,'r','zip')
-        cont  = cfile.read().decode(self.encoding)
+        cfile = open(cname,'rb') # the zip StreamReader fails on its final (empty) read
+        cont  = cfile.read().decode('zip').decode(self.encoding)
         cfile.close()
         return cont
 
@@ -119,8 +239,11 @@ class cache(object):
         """
         cname = self.makename(fname,ctype)
         if not os.path.isfile(cname): return False # no cache
-        cfile = open(cname,'r')
-        cont  = cPickle.load(cfile)
+        cfile = open(cname,'rb')
+        try:
+            cont  = cPickle.load(cfile)
+        except Exception: # incomplete or from an incompatible version
+            cont  = False
         cfile.close()
         return cont
 
@@ -137,6 +260,7 @@ class cache(object):
         cont = content.encode(self.encoding)
         cfile.write( cont )
         cfile.close()
+        self.putStamp(fname,cname)
 
     def putObj(self,fname,ctype,obj):
         """
@@ -147,10 +271,58 @@ class cache(object):
         @param object obj
         """
         cname = self.makename(fname,ctype)
-        cfile = open(cname,'w')
+        cfile = open(cname,'wb')
+        cPickle.dump(obj,cfile,cPickle.HIGHEST_PROTOCOL)
+        cfile.close()
+        self.putStamp(fname,cname)
+
+    def getData(self,name):
+        """
+        Get data not belonging to a single file (e.g. a memo shared by all files)
+        from the cache. Uses cPickle
+        @param self
+        @param string name name the data were stored with (see putData)
+        @return obj content or None if not found in cache
+        """
+        cname = os.path.join(self.dirname, name + '.data')
+        if not os.path.isfile(cname): return None
+        cfile = open(cname,'rb')
+        try:
+            cont  = cPickle.load(cfile)
+        except Exception: # incomplete or from an incompatible version
+            cont  = None
+        cfile.close()
+        return cont
+
+    def putData(self,name,obj):
+        """
+        Save data not belonging to a single file to the cache using cPickle
+        @param self
+        @param string name name to store the data with
+        @param object obj
+        """
+        cfile = open(os.path.join(self.dirname, name + '.data'),'wb')
         cPickle.dump(obj,cfile,cPickle.HIGHEST_PROTOCOL)
         cfile.close()
 
+    def fingerprint(self,fname):
+        """
+        Get a fingerprint of a files content (to find out whether cached data
+        derived from it are still valid, independent of its mtime)
+        @param self
+        @param string fname name of the file
+        @return string fingerprint (hex digest)
+        """
+        if fname in fingerprints: return fingerprints[fname]
+        digest = md5()
+        infile = open(fname,'rb')
+        while True:
+            block = infile.read(65536)
+            if not block: break
+            digest.update(block)
+        infile.close()
+        return digest.hexdigest()
+
     def clear(self,ctype='all'):
         """
         Remove cached content
@@ -165,3 +337,96 @@ class cache(object):
             for fname in os.listdir(self.dirname):
                 if fname[len(fname)-pos:]==ext: os.unlink(os.path.join(self.dirname,fname))
 
+
+class FormCodeStore(object):
+    """
+    Keeps the code extracted from Oracle Forms XML files for the later phases
+    (where_used scan, source pages), so it needs neither to be read back from
+    the cache nor to be extracted again. Memory usage is bounded: if the code
+    kept exceeds maxSize characters, the least recently used forms are dropped.
+    If a cache is given, the code is stored there as well (and taken from there
+    if it is no longer in memory); otherwise, the loader has to re-create it.
+    """
+
+    def __init__(self,maxSize=0,cache=None,loader=None):
+        """
+        Setup the store
+        @param self
+        @param optional int maxSize max number of characters to keep in memory (0 = no limit)
+        @param optional object cache cache instance to store the code with
+        @param optional function loader called with the file name to get the
+               code of a form neither in memory nor in the cache (returning
+               None if it cannot provide it)
+        """
+        self.maxSize = maxSize
+        self.cache   = cache
+        self.loader  = loader
+        self.codes   = {}   # file name -> code
+        self.order   = []   # file names kept, least recently used first
+        self.size    = 0
+
+    def put(self,fname,code,spill=True):
+        """
+        Store the code of a form
+        @param self
+        @param string fname name of the forms XML file
+        @param string code
+        @param optional boolean spill whether to store it in the cache (if
+               there is one, and it does not hold it already). Default: True
+        """
+        if spill and self.cache is not None and not self.cache.check(fname,'formcode'):
+            self.cache.put(fname,'formcode',code)
+        self.keep(fname,code)
+
+    def keep(self,fname,code):
+        """
+        Keep the code of a form in memory, dropping others if needed
+        @param self
+        @param string fname name of the forms XML file
+        @param string code
+        """
+        if fname in self.codes:
+            self.size -= len(self.codes.pop(fname))
+            self.order.remove(fname)
+        if self.maxSize and len(code) > self.maxSize: return
+        self.codes[fname] = code
+        self.order.append(fname)
+        self.size += len(code)
+        while self.maxSize and self.size > self.maxSize:
+            self.size -= len(self.codes.pop(self.order.pop(0)))
+
+    def peek(self,fname):
+        """
+        Get the code of a form if it is kept in memory
+        @param self
+        @param string fname name of the forms XML file
+        @return string code (None if it is not in memory)
+        """
+        return self.codes.get(fname)
+
+    def get(self,fname):
+        """
+        Get the code of a form - from memory, the cache, or the loader
+        @param self
+        @param string fname name of the forms XML file
+        @return string code (empty string if none)
+        """
+        if fname in self.codes:
+            self.order.remove(fname)
+            self.order.append(fname) # most recently used now
+            return self.codes[fname]
+        code = None
+        if self.cache is not None and self.cache.check(fname,'formcode'):
+            try:
+                code = self.cache.get(fname,'formcode')
+            except:
+                code = None
+        if code is None:
+            if self.loader is not None:
+                if self.cache is not None: self.cache.remember(fname)
+                code = self.loader(fname)
+            if code is None: return ''
+            self.put(fname,code)
+        else:
+            self.keep(fname,code)
+        return code
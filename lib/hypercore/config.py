@@ -155,10 +155,16 @@ class HyperConf(IniParser):
             include_source = '1',
             include_source_limit = '0',
             javadoc = '1',
+            jobs = '1',
+            stream_threshold = '0',
             export_unittests = '0',
+            formcode_memory = '65536',
+            discovery_threads = '1',
+            discovery = 'filesystem',
             whereused_scan_shortrefs = '0',
             whereused_scan_instring = '0',
             cache = '1',
+            cache_validation = 'content',
             link_code_calls = '1'
         )
         # Section LOGGING
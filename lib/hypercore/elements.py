@@ -10,14 +10,39 @@ __revision__ = '$Id$'
 from .javadoc import JavaDoc, PackageTaskList
 from iz_tools.typecheck import nullDict
 
+class UsageDict(dict):
+    """
+    Holds the where_used/what_used info for an element: file name as key, list
+    of tuples (fileInfo, lineNumber, otype, objectInfo) as value, kept in the
+    order they were added. Tuples are additionally registered with a set, so
+    duplicates can be checked for in constant time.
+    """
+    def __init__(self):
+        """ Initialize an empty dict """
+        dict.__init__(self)
+        self.known = set()
+    def add(self,fname,usage,unique=False):
+        """
+        Add a usage tuple for the given file
+        @param self
+        @param string fname file name (key)
+        @param tuple usage (fileInfo, lineNumber, otype, objectInfo)
+        @param optional boolean unique skip the tuple if we already have it for this file
+        @return boolean added whether the tuple was added
+        """
+        if unique and (fname,usage) in self.known: return False
+        self.known.add((fname,usage))
+        self.setdefault(fname,[]).append(usage)
+        return True
+
 class ElemInfo(object):
     """ Object to hold information about a function, or procedure """
     def __init__(self):
         """ Initialize the object with useful defaults """
         self.__dict__['name'] = ""
         self.lineNumber = -1
-        self.whatUsed = {} # file name key, fileInfo and line number list
-        self.whereUsed = {} # file name key, fileInfo and line number list
+        self.whatUsed = UsageDict() # file name key, fileInfo and line number list
+        self.whereUsed = UsageDict() # file name key, fileInfo and line number list
         self.uniqueNumber = 0 # used to create unique file name for where used list
         self.parent = None
         self.paramCount = 0
@@ -135,6 +160,7 @@ class FileInfo(object):
         self.triggerInfoList = []
         self.typeInfoList = []
         self.formInfoList = []
+        self.objectIndex = None # index for findUsingObject, built with the first call
         self.uniqueNumber = 0 # used to create unique file name for where used list (old variant)
         self.uniqueName = ''  # used to create unique file name for where used list (new variant)
         self.lines = 0
@@ -163,6 +189,60 @@ class FileInfo(object):
         return self.uniqueName + '.html'
 
 
+class DepGraphData(object):
+    """
+    Data for one dependency graph: edges and node properties, each stored only
+    once (hashed lookup), and kept in the order they were added (for stable
+    output). The DOT statements are only created when requested via getLines()
+    """
+    def __init__(self):
+        """ Initialize an empty graph """
+        self.entries = [] # ('edge',from,to) / ('node',name,color,fontcolor) in order of insertion
+        self.known = set()
+    def __len__(self):
+        """ Number of entries (edges and node definitions) """
+        return len(self.entries)
+    def add(self,entry):
+        """
+        Add an entry unless we already have it
+        @param self
+        @param tuple entry
+        @return boolean added whether the entry was new
+        """
+        if entry in self.known: return False
+        self.known.add(entry)
+        self.entries.append(entry)
+        return True
+    def addEdge(self,nfrom,nto):
+        """
+        Add an edge (dependency) from one node to another
+        @param self
+        @param string nfrom name of the node the dependency starts at
+        @param string nto name of the node the dependency points to
+        @return boolean added whether the edge was new
+        """
+        return self.add(('edge',nfrom,nto))
+    def addNode(self,name,colors):
+        """
+        Add the properties (colors) for a node
+        @param self
+        @param string name name of the node
+        @param list colors [background color, text color]
+        @return boolean added whether the node definition was new
+        """
+        return self.add(('node',name,colors[0],colors[1]))
+    def getLines(self):
+        """
+        Obtain the graph definition
+        @param self
+        @return list DOT statements, one per entry
+        """
+        lines = []
+        for entry in self.entries:
+            if entry[0] == 'edge': lines.append('"' + entry[1] + '" -> "' + entry[2] + '";')
+            else: lines.append('"' + entry[1] + '" [color="' + entry[2] + '",fontcolor="' + entry[3] + '"];')
+        return lines
+
 class MetaInfo:
     """ Object to hold global information (e.g. configuration options) """
     def __init__(self):
@@ -180,10 +260,10 @@ class MetaInfo:
         self.indexPage = nullDict() # filename
         self.indexPageName = nullDict()
         self.depGraph = {}
-        self.depGraph['file2file'] = []
-        self.depGraph['file2object'] = []
-        self.depGraph['object2file'] = []
-        self.depGraph['object2object'] = []
+        self.depGraph['file2file'] = DepGraphData()
+        self.depGraph['file2object'] = DepGraphData()
+        self.depGraph['object2file'] = DepGraphData()
+        self.depGraph['object2object'] = DepGraphData()
         self.colors = {}
 
     def NextIndex(self):
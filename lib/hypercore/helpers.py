@@ -7,7 +7,8 @@ from __future__ import division ### temporary to verify Python v3 compatibility
 __revision__ = '$Id$'
 
 from locale import format as loc_format, setlocale, LC_NUMERIC
-from iz_tools.text import * # includes import re # for eatStrings, countEmptyLines, cleanSQL
+import os, multiprocessing # for getJobs, scanOrder
+from iz_tools.text import * # includes import re # for eatStrings, countEmptyLines
 from iz_tools.system import getCallingModule # this module shall not be included in log entries ;)
 from hypercore.logger import logg
 logger = logg.getLogger()
@@ -52,15 +53,16 @@ def size_format(size,decs=2):
             return num_format( round(size/float(lim/2**10),decs), decs )+suf
 
 
-def getWordLineNr(text,word):
+def getWordLineNr(text,word,lineIndex=None):
     """
     Wrapper to getWordLineNr from iz_tools.text catching possible errors
     @param string text Text to search IN
     @param string word WORD to search FOR
+    @param optional object lineIndex iz_tools.text.LineIndex for text, if available
     @return list res
     """
     try:
-        res = getWordLineNo(text,word)
+        res = getWordLineNo(text,word,lineIndex)
     except:
         logger.error(_('RegExp error searching for "%s"'), word)
         res = []
@@ -91,53 +93,39 @@ def countEmptyLines(text):
     patt = re.compile("(^[ \t\f\v]*$)",re.M)
     return len(patt.findall(text))
 
-def cleanSQL(text,strings=False):
+def getJobs(jobs,todo):
     """
-    Remove comments (and optionally strings) from text
-    @param mixed text Text to purge (either as string or list of strings aka lines)
-    @param boolean strings Whether to remove (single-quoted) strings as well
-    @return mixed text Purged text (same type as input)
-    @return dict stat Some line stats: int (all,empty,comment,mixed,code), boolean matched_string
-    @raise TypeError when text neither str nor list
+    Find out how many worker processes to use for a given number of files.
+    Parallel processing requires os.fork(), so it is not available e.g. on
+    Windows (we fall back to serial processing there).
+    @param int jobs number of processes configured (see metaInfo.jobs; less
+           than 1 means one per CPU)
+    @param int todo number of files to process
+    @return int jobs number of processes (1 = serial processing)
     """
-    # define some regExp patterns:
-    pattIComm = re.compile('[ \t\f\v]*--.*',re.M)   # inline comment
-    pattMComm = re.compile(r'\S[ \t\f\v]*--.*',re.M)# inline comment with preceding code
-    pattBComm = re.compile('/\\*.*?\\*/',re.M|re.S) # block comment
-    pattEnd   = re.compile('\s*\n$')                # text ending with LF
-
-    # check input, make sure we have 'str' to process
-    inputType = type(text).__name__
-    if inputType   == 'list': text = ''.join(text)
-    elif inputType == 'str' : pass
-    else: raise TypeError('First parameter to cleanSQL must be either str or list - %s given' % inputType)
-
-    # stats: linecount, empty, and mixed lines
-    all   = text.count('\n')
-    empty = countEmptyLines(text)
-    mixed = len(pattMComm.findall(text))
-
-    # we need this to fix-up stats based on '\n'
-    if len(pattEnd.findall(text))>0: lf_end = True
-    else: lf_end = False
-
-    # Remove comments (and update corresponding stats)
-    text  = re.sub(pattIComm,'',text)   # inline comments
-    for hit in pattBComm.findall(text): # Block comments
-        nlc   = hit.count('\n')
-        text  = text.replace(hit,'\n'*nlc)
-    comment = countEmptyLines(text) - empty
-    code = text.count('\n') +1 - mixed - empty - comment
-
-    # remove strings (if advised to do so)
-    if strings:
-        text, matched_string = eatStrings(text)
-    else:
-        matched_string = False
-
-    # fixup stats, and make sure to return the text using the correct type
-    if lf_end: empty -= 1
-    else: all += 1
-    if inputType == 'list': text = text.split('\n')
-    return text, {'all':all, 'empty':empty, 'comment':comment, 'mixed':mixed, 'code':code, 'matched_string':matched_string}
-
+    if jobs < 1:
+        try:
+            jobs = multiprocessing.cpu_count()
+        except NotImplementedError:
+            jobs = 1
+    if jobs > 1 and not hasattr(os,'fork'):
+        logger.warn(_('Parallel processing is not supported on this platform, using a single process'))
+        jobs = 1
+    return min(jobs, todo)
+
+def scanOrder(todo,fileInfoList):
+    """
+    Order files for processing by worker processes: largest first, so a few
+    big files (as Oracle Forms XML files tend to be) are not left for the end
+    while the other workers are idle
+    @param list todo indexes of the files in fileInfoList
+    @param list fileInfoList FileInfo objects
+    @return list todo re-ordered
+    """
+    sizes = {}
+    for idx in todo:
+        try:
+            sizes[idx] = os.path.getsize(fileInfoList[idx].fileName)
+        except OSError:
+            sizes[idx] = 0
+    return sorted(todo, key=lambda idx: -sizes[idx])
@@ -8,7 +8,9 @@ from .gettext_init import langpath, langs
 from sys import maxint, argv as pargs
 from .unittest import testcase_split
 from iz_tools.typecheck import is_list, nullDict # for ScanJavaDoc, JavaDoc
+from iz_tools.text import LineIndex # for ScanJavaDoc
 import re, gettext, locale, os
+from hashlib import md5 # for ScanJavaDoc
 from hypercore.logger import logg
 logger = logg.getLogger('JavaDoc')
 
@@ -45,6 +47,22 @@ JavaDocVars = dict(
                'used', 'verbatim', 'testcase'] # values of these tags are plain text
 )
 
+# Patterns for ScanJavaDoc/parseJavaDoc
+jdocBlockPatt    = re.compile(r'/\*\*(.*?)\*/', re.M|re.S)   # a complete JavaDoc block
+jdocDescPatt     = re.compile(r'\*\*\s*(.*?)\s*(\n\s*\**\s*@|\*\/)', re.M|re.S) # description (up to the first tag)
+jdocTagPatt      = re.compile(r'(\n\s*\**\s*)(@\w+)([ \t\f\v]*)([^\n]*.*?)\s*(?=(\n\s*\**\s*@|\*\/))', re.M|re.S|re.I) # a tag, up to the next one (or the end of the block)
+jdocLeadingPatt  = re.compile(r'^\s*\**\s*')       # leading whitespace and '*' of a line
+jdocBreakPatt    = re.compile(r'(\n\s*\**\s*)')   # line break inside a tag desc, incl. optional '*'
+jdocBreakPrePatt = re.compile(r'(\n\s*\**)')       # line break inside a preformatted tag desc (e.g. @verbatim)
+
+# Parsed JavaDoc blocks: digest of the block text -> (JavaDoc, messages) as
+# returned by parseJavaDoc. Identical blocks (in different files, or - if the
+# memo is stored in the cache - in different runs) are parsed only once.
+blockMemo = {}
+blockMemoUsed = set()   # digests of the blocks used since setBlockMemo()
+blockMemoNew  = set()   # digests of the blocks parsed since setBlockMemo()
+blockMemoMax  = 100000  # see getBlockMemo()
+
 def setJDocEncoding(encoding):
     """
     Switch encoding to a different character set
@@ -155,6 +173,20 @@ class JavaDoc(object):
         """
         if self.lineNumber != -1: return False
         return True
+
+    def copy(self):
+        """
+        Get a copy of this object. Its lists are copied as well (not their
+        items), so they can be changed independently.
+        @param self
+        @return object JavaDoc
+        """
+        item = JavaDoc.__new__(JavaDoc)
+        for attr, value in self.__dict__.items():
+            if isinstance(value,list): value = value[:]
+            item.__dict__[attr] = value
+        return item
+
     def verify_mandatory(self):
         """
         Verify the element according to configured parameters.
@@ -731,118 +763,187 @@ class PackageTaskList(TaskList):
         return html
 
 
-def ScanJavaDoc(text,fileName,lineNo=0):
+def blockMemoSignature():
+    """
+    Get a signature of the settings parsed JavaDoc blocks depend on. A block
+    memo is only valid for the same signature.
+    @return string signature
+    """
+    # the first element is the format version of the memo
+    sig = repr(( 1, langs, sorted(JavaDocVars['otypes'].items()),
+                 JavaDocVars['tags'], JavaDocVars['txttags'] ))
+    return md5(sig).hexdigest()
+
+
+def getBlockMemo():
+    """
+    Get the memo of parsed JavaDoc blocks, e.g. to store it for the next run.
+    If it grew larger than blockMemoMax entries, only the blocks used since the
+    last setBlockMemo() are kept.
+    @return dict blockMemo
+    """
+    if len(blockMemo) > blockMemoMax:
+        return dict([(key, blockMemo[key]) for key in blockMemoUsed if key in blockMemo])
+    return blockMemo
+
+
+def setBlockMemo(memo):
+    """
+    Replace the memo of parsed JavaDoc blocks (e.g. by one stored with the
+    previous run, see getBlockMemo)
+    @param dict memo
+    """
+    blockMemo.clear()
+    blockMemo.update(memo)
+    blockMemoUsed.clear()
+    blockMemoNew.clear()
+
+
+def takeBlocks():
+    """
+    Get the blocks used since the last call - to pass them from a worker
+    process back to the main process (see mergeBlocks)
+    @return dict block digest -> memo entry, or None for entries which were
+            already known when the process was started
+    """
+    blocks = dict([(key, key in blockMemoNew and blockMemo[key] or None) for key in blockMemoUsed])
+    blockMemoUsed.clear()
+    blockMemoNew.clear()
+    return blocks
+
+
+def mergeBlocks(blocks):
+    """
+    Merge the blocks returned by takeBlocks() in a worker process into the memo
+    @param dict blocks
+    """
+    for key, entry in blocks.items():
+        if entry is not None: blockMemo.setdefault(key,entry)
+        blockMemoUsed.add(key)
+
+
+def parseJavaDoc(block):
+    """
+    Parse a single JavaDoc block. Nothing is logged here: the messages are
+    returned instead, so they can be repeated whenever the block is found
+    (see ScanJavaDoc).
+    @param string block the complete comment (starting with '/**' and ending with '*/')
+    @return object item JavaDoc instance (without file and lineNumber)
+    @return list messages tuples (string level, string msg, params, int line),
+            line being relative to the first line of the block; if params is
+            a dict, the file name and absolute line number are to be added
+    """
+    item = JavaDoc()
+    messages = []
+    tdesc = jdocDescPatt.search(block).group(1).strip()
+    if tdesc != '':
+        desc = tdesc.split('\n')
+        for i in range(len(desc)): desc[i] = jdocLeadingPatt.sub('',desc[i]).strip()
+        if desc[0][0]!='@': item.desc = desc
+    lineNumber = tdesc.count('\n')+1 # the line following the desc
+    for tags in jdocTagPatt.finditer(block):
+        tag  = tags.group(2)[1:].lower().strip()
+        if tag=='verbatim':
+            cont = jdocBreakPrePatt.sub(' ',tags.group(4))
+        else:
+            cont = jdocBreakPatt.sub(' ',tags.group(4))
+            cont = cont.strip()
+        start = tags.end(1) - len(tags.group(1).lstrip()) # up to the next tag, ignoring leading blank lines
+        taglines = block.count('\n',start,tags.end(5))
+        if tag in JavaDocVars['otypes']:
+            if cont=='':
+                messages.append(('info', _('object type %(otype)s must have an object name specified, none was given in %(file)s line %(line)s'), {'otype':item.objectType}, lineNumber))
+            else:
+                item.objectType = tag
+                item.name = cont
+        elif tag in JavaDocVars['tags']:
+            if tag == 'param':    # @param inout type [name [desc]]
+                if cont=='':
+                  messages.append(('info', _('@param requires at least one parameter, none given in %(file)s line %(line)s'), {}, lineNumber))
+                else:
+                  p = JavaDocParam()
+                  doc = cont.split()
+                  if doc[0].lower() in ['in','out','inout']:
+                    p.inout   = doc[0].upper()
+                    p.sqltype = doc[1].upper()
+                    if len(doc) > 2:
+                      p.name = doc[2]
+                      for w in range(3,len(doc)):
+                        p.desc += doc[w] + ' '
+                      p.desc = p.desc.strip()
+                  else:
+                      p.sqltype = doc[0]
+                      if len(doc) > 1:
+                          p.name = doc[1]
+                          for w in range(2,len(doc)):
+                            p.desc += doc[w] + ' '
+                          p.desc = p.desc.strip()
+                  item.params.append(p)
+            elif tag in JavaDocVars['txttags']:
+                if cont=='':
+                  messages.append(('info', _('@%(tag)s requires <text> parameter, none given in %(file)s line %(line)s'), {'tag':tag}, lineNumber))
+                else:
+                  item.__getattribute__(tag).append(cont)
+            elif tag in ['return','col']: # @(return|col) type [name [desc]]
+              if cont=='':
+                messages.append(('info', _('@%(tag)s requires at least one parameter, none given in %(file)s line %(line)s'), {'tag':tag}, lineNumber))
+              else:
+                p = JavaDocParam()
+                doc = cont.split()
+                p.sqltype = doc[0].upper()
+                if len(doc)>1:
+                  p.name = doc[1]
+                  for w in range(2,len(doc)):
+                    p.desc += doc[w] + ' '
+                if (tag=='return'): item.retVals.append(p)
+                else: item.cols.append(p)
+            elif tag == 'private': item.private = True
+            elif tag == 'ignore' : item.ignore  = True
+            elif tag == 'ignorevalidation' : item.ignorevalidation = True
+            else: # kick the developers brain - one never should get here!
+                messages.append(('warn', _('JavaDoc tag "%s" failed - kick the developers brain!'), tag, lineNumber))
+        else:             # unsupported tag, ignore
+            messages.append(('info', _('unsupported JavaDoc tag "%(tag)s" in %(file)s line %(line)s'), {'tag':tag}, lineNumber))
+        lineNumber += taglines
+    return item, messages
+
+
+def ScanJavaDoc(text,fileName,lineNo=0,lineOffset=0):
     """
     Scans the text array (param 1) for the javadoc style comments starting at
     line lineNo (param 3) if defined - otherwise at line 0. Called from
     ScanFilesForViewsAndPackages.
     Returns a list of instances of the JavaDoc class - one instance per javadoc
-    comment block.
+    comment block. Blocks are parsed only once (see parseJavaDoc): the results
+    are kept in blockMemo, keyed by a digest of the block text.
     @param string text to parse
     @param string fileName name of the file this text is from (for eventual error messages)
     @param optional number lineNo which line to start with (Default: 0, the very beginning)
+    @param optional number lineOffset number of lines preceding the text in the
+           file (if it is only a part of it, see sqlfinder.streamCode). Default: 0
     @return list of JavaDoc instances
     """
     if is_list(text): text = ''.join(text)
-    reTagEnd    = r'(\n\s*\**\s*@|\*\/)' # end of tag/desc definition
-    reLineStart = r'(\n\s*\**\s*)'       # start of a line, incl. optional '*'
-    reLineStartPre = r'(\n\s*\**)'       # start of a line for preformatted text (e.g. @verbatim), incl. optional '*'
-    pattLeading = re.compile(r'^\s*\**\s*')
-    pattTag     = re.compile(reLineStart+r'(@\w+)([ \t\f\v]*)([^\n]*.*?)\s*'+reTagEnd, re.M|re.S|re.I)
-    pattBreak   = re.compile(reLineStart) # line break inside a tag desc
-    pattBreakPre = re.compile(reLineStartPre) # line break inside a preformatted tag desc (e.g. @verbatim)
-
-    blocks = []
     items  = []
-    for m in re.finditer(r'/\*\*(.*?)\*/', text, re.M|re.S): # Collect JavaDoc blocks w/ their position
-        start = m.start()
-        lineno = text.count('\n', 0, start) +1 # starts at line 0
-        offset = start - text.rfind('\n', 0, start)
-        block = m.group(0)
-        blocks.append((lineno, offset, block))
-
-    for tblock in blocks:                                    # Parse JavaDoc blocks
-        if tblock[0]+1<lineNo: continue
-        lineNumber = tblock[0]+1
-        block = tblock[2].strip()
-        item = JavaDoc()
-        item.file = fileName
-        item.lineNumber = lineNumber
+    lines  = None
+    for m in jdocBlockPatt.finditer(text):
+        if lines is None: lines = LineIndex(text)
+        lineno = lines.position(m.start())[0] + lineOffset # 1-based line the block starts in
+        if lineno+1<lineNo: continue
+        block = m.group(0).strip()
+        if isinstance(block,unicode): key = md5(block.encode('utf-8')).digest()
+        else: key = md5(block).digest()
+        entry = blockMemo.get(key)
+        if entry is None:
+            entry = blockMemo[key] = parseJavaDoc(block)
+            blockMemoNew.add(key)
+        blockMemoUsed.add(key)
+        for level, msg, params, line in entry[1]:
+            if isinstance(params,dict):
+                params = dict(params, file=fileName, line=lineno+line)
+            getattr(logger,level)(msg, params)
+        item = entry[0].copy()
         item.file = fileName
-        tdesc = re.search(r'\*\*\s*(.*?)\s*'+reTagEnd,block,re.M|re.S).group(1).strip()
-        if tdesc != '':
-            desc = tdesc.split('\n')
-            for i in range(len(desc)): desc[i] = pattLeading.sub('',desc[i]).strip()
-            if desc[0][0]!='@': item.desc = desc
-        tags = pattTag.search(block)
-        lineNumber = tblock[0]+tdesc.count('\n')+1 # the line following the desc
-        taglines = 0
-        while tags != None:
-            tag  = tags.group(2)[1:].lower().strip()
-            if tag=='verbatim':
-                cont = pattBreakPre.sub(' ',tags.group(4))
-            else:
-                cont = pattBreak.sub(' ',tags.group(4))
-                cont = cont.strip()
-            taglines = tags.group(0).strip().count('\n')
-            end = tags.start()+len(tags.group(1)+tags.group(2)+tags.group(3)+tags.group(4))
-            tags = pattTag.search(block,end)
-            if tag in JavaDocVars['otypes']:
-                if cont=='':
-                    logger.info(_('object type %(otype)s must have an object name specified, none was given in %(file)s line %(line)s'), {'otype':item.objectType, 'file':fileName, 'line':lineNumber})
-                else:
-                    item.objectType = tag
-                    item.name = cont
-            elif tag in JavaDocVars['tags']:
-                if tag == 'param':    # @param inout type [name [desc]]
-                    if cont=='':
-                      logger.info(_('@param requires at least one parameter, none given in %(file)s line %(line)s'), {'file':fileName, 'line':lineNumber})
-                    else:
-                      p = JavaDocParam()
-                      doc = cont.split()
-                      if doc[0].lower() in ['in','out','inout']:
-                        p.inout   = doc[0].upper()
-                        p.sqltype = doc[1].upper()
-                        if len(doc) > 2:
-                          p.name = doc[2]
-                          for w in range(3,len(doc)):
-                            p.desc += doc[w] + ' '
-                          p.desc = p.desc.strip()
-                      else:
-                          p.sqltype = doc[0]
-                          if len(doc) > 1:
-                              p.name = doc[1]
-                              for w in range(2,len(doc)):
-                                p.desc += doc[w] + ' '
-                              p.desc = p.desc.strip()
-                      item.params.append(p)
-                elif tag in JavaDocVars['txttags']:
-                    if cont=='':
-                      logger.info(_('@%(tag)s requires <text> parameter, none given in %(file)s line %(line)s'), {'tag':tag, 'file':fileName, 'line':lineNumber})
-                    else:
-                      item.__getattribute__(tag).append(cont)
-                elif tag in ['return','col']: # @(return|col) type [name [desc]]
-                  if cont=='':
-                    logger.info(_('@%(tag)s requires at least one parameter, none given in %(file)s line %(line)s'), {'tag':tag,'file':fileName, 'line':lineNumber})
-                  else:
-                    p = JavaDocParam()
-                    doc = cont.split()
-                    p.sqltype = doc[0].upper()
-                    if len(doc)>1:
-                      p.name = doc[1]
-                      for w in range(2,len(doc)):
-                        p.desc += doc[w] + ' '
-                    if (tag=='return'): item.retVals.append(p)
-                    else: item.cols.append(p)
-                elif tag == 'private': item.private = True
-                elif tag == 'ignore' : item.ignore  = True
-                elif tag == 'ignorevalidation' : item.ignorevalidation = True
-                else: # kick the developers brain - one never should get here!
-                    logger.warn(_('JavaDoc tag "%s" failed - kick the developers brain!'), tag)
-            else:             # unsupported tag, ignore
-                logger.info(_('unsupported JavaDoc tag "%(tag)s" in %(file)s line %(line)s'), {'tag':tag, 'file':fileName, 'line':lineNumber})
-                lineNumber += taglines
-                continue
-            lineNumber += taglines
+        item.lineNumber = lineno+1
         items.append(item)
     return items
@@ -44,12 +44,16 @@ class hyperopts(object):
         # Processing options
         proc = OptionGroup(self.parser,_('Processing Options'))
         proc.add_option('--blind-offset',type='int',dest='blind_offset',help=_('set the "blind offset" to this number of lines'))
+        proc.add_option('--changed-since',dest='changedSince',help=_('git revision the cache was built from: cached data of files not changed since are used without validating them (requires --discovery git)'))
+        proc.add_option('--discovery',dest='discovery',choices=['filesystem','git'],help=_('how to find the files to process: walk the file system, or ask git for the tracked files'))
         proc.add_option('--javadoc',dest='javadoc',action='store_true',help=_('process javadoc'))
         proc.add_option('--nojavadoc',dest='javadoc',action='store_false',help=_('do not process javadoc'))
+        proc.add_option('--jobs',type='int',dest='jobs',help=_('number of processes to use for scanning source files, where_used and the source file pages (0 = one per CPU)'))
         proc.add_option('--link-calls',dest='linkCalls',action='store_true',help=_('link to targets in code calls'))
         proc.add_option('--nolink-calls',dest='linkCalls',action='store_false',help=_('do not link to targets in code calls'))
         proc.add_option('-p','--page',dest='pages',action='append',help=_('process this page. Multiple definitions (for multiple pages) are possible.'))
         proc.add_option('-P','--nopage',dest='nopages',action='append',help=_('do not process this page. Multiple definitions (for multiple pages) are possible.'))
+        proc.add_option('--stream-threshold',type='int',dest='streamThreshold',help=_('process files larger than this (in kilobytes) in chunks, to save memory (0 = never)'))
         proc.add_option('--purge-html',dest='purgeHTML',action='store_true',help=_('purge old HTML files before creating the new ones'))
         proc.add_option('--nopurge-html',dest='purgeHTML',action='store_false',help=_('do not purge old HTML files before creating the new ones'))
         proc.add_option('--scan-instring',dest='scanInString',action='store_true',help=_('scan in strings for where/what objects are used'))
@@ -8,6 +8,7 @@ Requires the Oracle Forms modules to be converted to XML using frmf2xml
 You may want to have a look at the test() function to get started.
 """
 
+from collections import deque
 from xml.sax import saxutils, make_parser
 from xml.sax.handler import feature_namespaces, ContentHandler
 
@@ -17,7 +18,17 @@ class FindUnits(ContentHandler):
     Content handler for Oracle Forms parsing
     Requires the Oracle Forms modules to be converted to XML using frmf2xml
     """
-    def __init__(self):
+    def __init__(self, callback=None, lean=False):
+        """
+        Initialize the handler
+        @param optional function callback called with (kind, dict) for each
+               program unit ('unit') and trigger ('trigger') found, instead of
+               collecting them in the units and trigger lists
+        @param optional boolean lean whether to skip the list of all attributes
+               (items) of the module/library. Default: False
+        """
+        self.callback = callback
+        self.lean = lean
         self.libinfo = {}
         self.modinfo = {}
         self.units = []
@@ -36,23 +47,27 @@ class FindUnits(ContentHandler):
         if name == 'ObjectLibrary':                 # only present for OLB files
             libobjects = attrs.get('ObjectCount', None)
             if libobjects: libobjects = int(libobjects)
-            items = attrs.items()
-            self.libinfo = {'name':uname, 'objects':libobjects, 'items':items}
+            self.libinfo = {'name':uname, 'objects':libobjects}
+            if not self.lean: self.libinfo['items'] = attrs.items()
         elif name == 'FormModule':                  # only FMB: RealName of the module
             title = attrs.get('Title', None)
             mmod  = attrs.get('MenuModule', None)
-            items = attrs.items()
-            self.modinfo = {'name':uname, 'title':title, 'menumodule':mmod, 'items':items}
+            self.modinfo = {'name':uname, 'title':title, 'menumodule':mmod}
+            if not self.lean: self.modinfo['items'] = attrs.items()
         elif name == 'ProgramUnit':                 # code in OLB and FMB files
             utype = attrs.get('ProgramUnitType', None)
             ucode = attrs.get('ProgramUnitText', None)
             if ucode: ucode = ucode.replace('&#10;','\n')
-            self.units.append({'name':uname, 'type':utype, 'code':ucode})
+            unit = {'name':uname, 'type':utype, 'code':ucode}
+            if self.callback: self.callback('unit', unit)
+            else: self.units.append(unit)
         elif name == 'Trigger':                     # trigger code in OLB and FMB files
             ucode = attrs.get('TriggerText', None)
             if ucode: ucode = ucode.replace('&#10;','\n')
-            self.trigger.append({'name':uname, 'code':ucode})
-        elif name in self.stats.keys():
+            trigger = {'name':uname, 'code':ucode}
+            if self.callback: self.callback('trigger', trigger)
+            else: self.trigger.append(trigger)
+        elif name in self.stats:
             self.stats[name] += 1
 
 class OraForm:
@@ -153,6 +168,168 @@ class OraForm:
         """
         return self.stats
 
+class FormStream(object):
+    """
+    Streaming reader for Oracle Forms XML files (converted using frmf2xml).
+    The file is parsed chunk by chunk while its program units and trigger are
+    iterated, so they can be processed before the parse finishes - and need
+    not be kept in memory all at once. Of the module/library attributes, only
+    those available via OraForm.getModuleInfo/getLibraryInfo (except for the
+    items) are kept.
+    Example usage:
+        form = FormStream('sample_fmb.xml')
+        for kind, unit in form: print kind, unit['name']
+        print form.getStats()
+    Units and trigger can also be iterated separately (see getUnits and
+    getTrigger), in which case those of the other kind are buffered.
+    """
+    def __init__(self, filename, chunkSize=65536, keep=False):
+        """
+        Setup the stream (parsing starts with the first access)
+        @param string filename name of the XML file
+        @param optional int chunkSize number of bytes to parse at once
+        @param optional boolean keep whether to keep all units and trigger (for
+               getForm). Default: False
+        """
+        self.fileName  = filename
+        self.chunkSize = chunkSize
+        self.keep      = keep
+        self.units     = []     # all units and trigger parsed (with keep only)
+        self.trigger   = []
+        self.events    = deque()
+        self.pending   = {'unit':deque(), 'trigger':deque()}
+        self.handler   = FindUnits(self.found, True)
+        self.parser    = make_parser()
+        self.parser.setFeature(feature_namespaces, 0)
+        self.parser.setContentHandler(self.handler)
+        self.infile    = None
+        self.done      = False
+
+    def found(self, kind, item):
+        """ Internal: Callback for the handler """
+        self.events.append((kind, item))
+        if self.keep:
+            if kind == 'unit': self.units.append(item)
+            else: self.trigger.append(item)
+
+    def feed(self):
+        """
+        Internal: Parse the next chunk of the file
+        @return boolean whether the parse is finished
+        """
+        if self.done: return True
+        if self.infile is None: self.infile = open(self.fileName, 'rb')
+        data = self.infile.read(self.chunkSize)
+        if data:
+            self.parser.feed(data)
+        else:
+            self.infile.close()
+            self.parser.close()
+            self.done = True
+        return self.done
+
+    def finish(self):
+        """ Parse the remainder of the file (buffering the units and trigger not yet iterated) """
+        while not self.feed(): pass
+
+    def __iter__(self):
+        """
+        Iterate over program units and trigger in the order they are parsed
+        (those already buffered by getUnits or getTrigger coming first)
+        @return generator yielding tuples (string kind, dict item), kind being
+                'unit' (item: name, type, code) or 'trigger' (item: name, code)
+        """
+        for kind in ('unit', 'trigger'):
+            while self.pending[kind]: yield kind, self.pending[kind].popleft()
+        while True:
+            while self.events: yield self.events.popleft()
+            if self.feed() and not self.events: break
+
+    def iterKind(self, kind):
+        """
+        Internal: Iterate over items of one kind, buffering the others
+        @param string kind 'unit' or 'trigger'
+        @return generator yielding dicts
+        """
+        buf = self.pending[kind]
+        while True:
+            while buf: yield buf.popleft()
+            while self.events:
+                ekind, item = self.events.popleft()
+                if ekind == kind: yield item
+                else: self.pending[ekind].append(item)
+            if self.feed() and not self.events: break
+
+    def getUnits(self):
+        """
+        Iterate over the ProgramUnits of the form while parsing it
+        @return generator yielding dicts (name, type, code)
+        """
+        return self.iterKind('unit')
+
+    def getTrigger(self):
+        """
+        Iterate over the Trigger of the form while parsing it
+        @return generator yielding dicts (name, code)
+        """
+        return self.iterKind('trigger')
+
+    def getModuleName(self):
+        """
+        Return the name of the module (see OraForm.getModuleName). Parses the
+        file up to the module/library element, if not done yet.
+        @return string name
+        """
+        while not (self.handler.modinfo or self.handler.libinfo or self.feed()): pass
+        if len(self.handler.modinfo): return self.handler.modinfo['name']
+        elif len(self.handler.libinfo): return self.handler.libinfo['name']
+        else: return None
+
+    def getModuleInfo(self):
+        """
+        Return general info about the module (see OraForm.getModuleInfo,
+        without the items)
+        @return dict modinfo
+        """
+        self.getModuleName()
+        return self.handler.modinfo
+
+    def getLibraryInfo(self):
+        """
+        Return general info about the library (see OraForm.getLibraryInfo,
+        without the items)
+        @return dict libinfo
+        """
+        self.getModuleName()
+        return self.handler.libinfo
+
+    def getStats(self):
+        """
+        Return stats for the no-code objects of the form. Those are only complete
+        when the entire file was parsed, so it is parsed to the end if needed.
+        @return dict stats
+        """
+        self.finish()
+        return self.handler.stats
+
+    def getForm(self):
+        """
+        Get the complete results as OraForm object (e.g. to store them). The file
+        is parsed to the end if needed. Requires the stream to be created with
+        keep=True.
+        @return object form OraForm
+        """
+        self.finish()
+        form = OraForm()
+        form.reset()
+        form.fileName = self.fileName
+        form.units    = self.units
+        form.trigger  = self.trigger
+        form.libinfo  = self.handler.libinfo
+        form.modinfo  = self.handler.modinfo
+        form.stats    = self.handler.stats
+        return form
+
 def test(filename,printcode=False):
     """
     Simple test unit to a) test if everything works and/or b) show what kind of
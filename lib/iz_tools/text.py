@@ -7,10 +7,44 @@ Some useful functions for string / text processing
 
 #====================================================[ Imports and Presets ]===
 import re       # for getWordLineNo
+from bisect import bisect_right # for LineIndex
+
+#================================================================[ Classes ]===
+#-------------------------------------------[ Line start index for a text ]---
+class LineIndex(object):
+    """
+    Index of line starts for a given text. Built once per text, it converts
+    positions (e.g. from regexp matches) into line numbers by binary search -
+    instead of counting the newlines from the start of the text for each match.
+    example:
+    idx = LineIndex(text)
+    lineno, offset = idx.position(m.start())
+    """
+    def __init__(self,text):
+        """
+        Build the index
+        @param self
+        @param string text text to index
+        """
+        self.starts = [0]
+        pos = text.find('\n')
+        while pos != -1:
+            self.starts.append(pos+1)
+            pos = text.find('\n',pos+1)
+
+    def position(self,pos):
+        """
+        Get line number and offset for a given position
+        @param self
+        @param int pos position in the text (0-based)
+        @return tuple (int lineno, int offset) - both 1-based
+        """
+        lineno = bisect_right(self.starts,pos)
+        return lineno, pos - self.starts[lineno-1] + 1
 
 #==============================================================[ Functions ]===
 #--------------------------------------[ Finding lineNo with matching text ]---
-def getWordLineNo(text,pattern):
+def getWordLineNo(text,pattern,lineIndex=None):
     """
     Finding lineNo with matching text
     example:
@@ -19,13 +53,14 @@ def getWordLineNo(text,pattern):
     By: Izzy
     @param string text to parse
     @param string pattern RegExp pattern to find
+    @param optional object lineIndex LineIndex for text (if you already have
+           one; otherwise it is created on the first match)
     @return list of tuples (lineno, offset, word)
     """
     res = []
     for m in re.finditer(pattern, text, re.I):
-        start = m.start()
-        lineno = text.count('\n', 0, start) + 1
-        offset = start - text.rfind('\n', 0, start)
+        if lineIndex is None: lineIndex = LineIndex(text)
+        lineno, offset = lineIndex.position(m.start())
         word = m.group(0)
         res.append((lineno, offset, word))
     return res
@@ -3,59 +3,307 @@ Parsing the file system
 """
 __revision__ = '$Id$'
 
-import os
+import os, stat, time
+from subprocess import Popen, PIPE
 from hypercore.elements import FileInfo
 
-def getFileList(sdir, fileExts, skipDirs=[], ignorefile='.hsqlignore'):
+try:
+    from scandir import scandir # optional: directory entries with file types (Python 2 backport of os.scandir)
+except ImportError:
+    scandir = getattr(os, 'scandir', None)
+
+
+def listDir(sdir):
+    """
+    Get the contents of a directory, together with their type. With scandir
+    available, the type mostly comes with the directory entries; otherwise, it
+    takes a single stat() per entry. Symlinks are followed (as os.path.isdir does).
+    @param string sdir directory to list
+    @return list of tuples (string name, string path, boolean isDir) in the
+            order the directory returns them (as os.listdir does)
+    """
+    entries = []
+    if scandir is not None:
+        for entry in scandir(sdir):
+            try:
+                isDir = entry.is_dir()
+            except OSError:
+                isDir = False
+            entries.append((entry.name, entry.path, isDir))
+        return entries
+    for name in os.listdir(sdir):
+        path = os.path.join(sdir, name)
+        try:
+            isDir = stat.S_ISDIR(os.stat(path).st_mode)
+        except OSError: # e.g. broken symlink
+            isDir = False
+        entries.append((name, path, isDir))
+    return entries
+
+
+class FileManifest(object):
+    """
+    Listings of the directories scanned by getFileList, together with their
+    modification times. Kept between runs (e.g. in the cache), it lets
+    getFileList re-list only the directories whose mtime changed - adding,
+    removing or renaming entries updates the mtime of their directory. It also
+    tells which files were added and removed since the previous walk.
+    """
+    def __init__(self):
+        """
+        Initialize an empty manifest
+        @param self
+        """
+        self.signature = None   # settings the listings depend on
+        self.dirs      = {}     # path -> (mtime, listing as returned by scanDir)
+        self.files     = set()  # files found by the previous walk
+        self.added     = []     # files found now but not by the previous walk
+        self.removed   = []     # files found by the previous walk but not now
+
+    def begin(self,signature):
+        """
+        Start a walk (see getFileList)
+        @param self
+        @param string signature of the settings the listings depend on. If it
+               changed since the last walk, the stored listings are dropped
+        """
+        if signature != self.signature: self.dirs = {}
+        self.signature = signature
+        self.visited   = {}
+        self.racy      = time.time() - 2 # directories changed since may still change in the same mtime tick
+
+    def lookup(self,path,mtime):
+        """
+        Get the stored listing of a directory, if it did not change since
+        @param self
+        @param string path directory
+        @param float mtime current modification time of the directory
+        @return tuple listing as returned by scanDir (None if there is none)
+        """
+        entry = self.dirs.get(path)
+        if entry is None or entry[0] != mtime: return None
+        self.visited[path] = entry
+        return entry[1]
+
+    def store(self,path,mtime,listing):
+        """
+        Store the listing of a directory
+        @param self
+        @param string path directory
+        @param float mtime modification time of the directory (taken before listing it)
+        @param tuple listing as returned by scanDir
+        """
+        if mtime < self.racy: self.visited[path] = (mtime, listing)
+
+    def finish(self,fileInfoList):
+        """
+        Finish a walk: drop the listings of directories no longer visited, and
+        find out which files were added and removed
+        @param self
+        @param list fileInfoList the files found (FileInfo objects)
+        """
+        self.dirs = self.visited
+        del self.visited
+        files = set([f.fileName for f in fileInfoList])
+        self.added   = sorted(files - self.files)
+        self.removed = sorted(self.files - files)
+        self.files   = files
+
+
+def scanDir(sdir, extMap, skipDirs, ignorefile):
+    """
+    Scan a single directory (not recursing into its subdirectories)
+    @param string sdir directory to scan
+    @param dict extMap file extension -> file type
+    @param set skipDirs files/directories to skip
+    @param string ignorefile name of the ignore flag file
+    @return boolean ignored whether the directory contains the ignore flag file
+    @return list of tuples (string path, string fileType) - the latter being
+            None for subdirectories, in directory order
+    """
+    found   = []
+    ignored = False
+    for name, path, isDir in listDir(sdir):
+        if name == ignorefile and not isDir and os.path.isfile(path):
+            ignored = True
+        if name in skipDirs: # do not look in RCS/CVS/SVN/... special dirs
+            continue
+        if isDir:
+            found.append((path, None))
+        elif '.' in name: # file found, only add specific file extensions to the list
+            ftype = extMap.get(name[name.rfind('.')+1:])
+            if ftype is not None: found.append((path, ftype))
+    return ignored, found
+
+
+def getFileList(sdir, fileExts, skipDirs=[], ignorefile='.hsqlignore', threads=1, manifest=None):
     """
     Recursively scans the source directory specified for relevant files according
     to the file extensions passed by the second parameter, while excluding files/
     directories given with the third (useful to exclude '.svn' and the like) and
     directories containing an ignore flag file (usually '.hsqlignore')
     Information for matching files will be returned as a list of FileInfo objects.
+    The order of the files is that of a depth-first walk, with the directories'
+    contents in the order the file system returns them - regardless of the
+    number of threads used.
     @param string dir directory to scan
     @param list fileExts file extensions to consider. Each element must be a tuple
            (str fileType, list extensions)
     @param list skipDirs files/directories to skip
+    @param optional string ignorefile name of the ignore flag file
+    @param optional int threads number of threads to read directories with
+           (e.g. for network file systems). Default: 1
+    @param optional object manifest FileManifest to take the listings of
+           unchanged directories from (it is updated with the results)
     @return list fileInfoList list of FileInfo objects
     """
     if fileExts is None or len(fileExts)<1: return []
 
-    # get a list of this directory's contents
-    # these items are relative and not absolute
-    names        = os.listdir(sdir)
-    fileInfoList = []
+    # setup supported file extensions (the first type listing an extension wins)
+    extMap = {}
+    for ftype, exts in fileExts:
+        for ext in exts: extMap.setdefault(ext, ftype)
+    skipDirs = set(skipDirs)
+
+    def readDir(path):
+        # list a directory - or take its listing from the manifest
+        if manifest is None: return scanDir(path, extMap, skipDirs, ignorefile)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return scanDir(path, extMap, skipDirs, ignorefile)
+        listing = manifest.lookup(path, mtime)
+        if listing is None:
+            listing = scanDir(path, extMap, skipDirs, ignorefile)
+            manifest.store(path, mtime, listing)
+        return listing
+    if manifest is not None:
+        manifest.begin(repr((sorted(extMap.items()), sorted(skipDirs), ignorefile)))
 
-    # setup supported file extensions
-    exts = []
-    for ext in fileExts: exts += ext[1]
-
-    # iterate through the file list
-    for i in names: 
-
-      if i in skipDirs: # do not look in RCS/CVS/SVN/... special dirs
-        continue
-      if os.path.isfile( os.path.join(sdir, i, ignorefile) ):
-        continue
-
-      # convert from relative to absolute addressing
-      # to allow recursive calls
-      f1=os.path.join(sdir, i)
-
-      # if this item is also a directory, recurse it too
-      if os.path.isdir(f1):
-        fileInfoList += getFileList(f1, fileExts, skipDirs)
-
-      else:  # file found, only add specific file extensions to the list
-        fspl = f1.split('.')
-        ext  = fspl[len(fspl)-1]
-        if ext in exts:
-          temp = FileInfo()
-          temp.fileName = f1
-          for ftype in fileExts:
-            if ext in ftype[1]:
-              temp.fileType = ftype[0]
-              break
-          fileInfoList.append(temp)
+    if threads > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(threads)
+        pending = {}
+        def scanTask(path):
+            # list a directory, and have its subdirectories listed meanwhile
+            listing = readDir(path)
+            if listing[0] and path != sdir: return listing # ignored
+            for sub, ftype in listing[1]:
+                if ftype is None: pending[sub] = pool.apply_async(scanTask, (sub,))
+            return listing
+        pending[sdir] = pool.apply_async(scanTask, (sdir,))
+        getDir = lambda path: pending.pop(path).get()
+    else:
+        getDir = readDir
+
+    # walk the tree depth-first (the ignore flag file is not checked for the top level)
+    fileInfoList = []
+    stack = [iter(getDir(sdir)[1])]
+    try:
+        while stack:
+            for path, ftype in stack[-1]:
+                if ftype is None:
+                    ignored, found = getDir(path)
+                    if ignored: continue
+                    stack.append(iter(found))
+                    break
+                temp = FileInfo()
+                temp.fileName = path
+                temp.fileType = ftype
+                fileInfoList.append(temp)
+            else:
+                stack.pop()
+    finally:
+        if threads > 1:
+            pool.terminate()
+            pool.join()
+    if manifest is not None: manifest.finish(fileInfoList)
     return fileInfoList
 
+
+def runGit(args, cwd):
+    """
+    Run a git command
+    @param list args arguments to pass to git
+    @param string cwd directory to run it in
+    @return string stdout
+    """
+    try:
+        p = Popen(['git'] + args, cwd=cwd, stdout=PIPE, stderr=PIPE)
+    except OSError, e:
+        raise EnvironmentError('git: %s' % e)
+    out, err = p.communicate()
+    if p.returncode != 0:
+        raise EnvironmentError(err.strip() or 'git %s failed' % args[0])
+    return out
+
+
+def getGitFileList(sdir, fileExts, skipDirs=[], ignorefile='.hsqlignore', changedSince=None):
+    """
+    Get the files to process from the git repository sdir belongs to, instead
+    of walking the file system (see getFileList for the filter parameters).
+    Only tracked files are considered (but ignore flag files need not be
+    tracked); they come in the order git lists them. Along with the files,
+    the blob hashes of those unchanged in the working tree are returned as
+    content fingerprints.
+    Raises an EnvironmentError if git is not available, or sdir is not in a
+    git working tree.
+    @param string dir directory to scan
+    @param list fileExts file extensions to consider. Each element must be a tuple
+           (str fileType, list extensions)
+    @param list skipDirs files/directories to skip
+    @param optional string ignorefile name of the ignore flag file
+    @param optional string changedSince git revision to find changed files against
+    @return list fileInfoList list of FileInfo objects
+    @return dict fingerprints file name -> fingerprint ('git:' + blob hash)
+    @return set changed names of the files changed in the working tree since
+            changedSince (None if no revision was given)
+    """
+    if fileExts is None or len(fileExts)<1: return [], {}, None
+
+    extMap = {}
+    for ftype, exts in fileExts:
+        for ext in exts: extMap.setdefault(ext, ftype)
+    skipDirs = set(skipDirs)
+    def relName(path): # path as given by git -> file name as getFileList has it
+        return os.path.join(sdir, path.replace('/', os.sep))
+
+    # files differing from the index (their blob hash does not describe them)
+    modified = set(runGit(['diff-files','--name-only','--relative','-z'], sdir).split('\0'))
+    if changedSince is None: changed = None
+    else:
+        changed = runGit(['diff','--name-only','--relative','-z',changedSince,'--'], sdir).split('\0')
+        changed = set([relName(path) for path in changed if path])
+
+    ignored = {'':False}
+    def isIgnored(path): # whether a directory (relative, '/' separated) is to be skipped
+        if path not in ignored:
+            slash = path.rfind('/')
+            ignored[path] = path[slash+1:] in skipDirs or isIgnored(path[:max(slash,0)]) \
+                or os.path.isfile(os.path.join(sdir, path.replace('/', os.sep), ignorefile))
+        return ignored[path]
+
+    fileInfoList = []
+    fingerprints = {}
+    seen = set()
+    for line in runGit(['ls-files','-s','-z'], sdir).split('\0'):
+        if not line: continue
+        info, path = line.split('\t', 1)
+        mode, blob, stage = info.split()
+        if mode == '160000' or path in seen: continue # submodule, or conflict entry already seen
+        seen.add(path)
+        slash = path.rfind('/')
+        name  = path[slash+1:]
+        if name in skipDirs or '.' not in name: continue
+        ftype = extMap.get(name[name.rfind('.')+1:])
+        if ftype is None or (slash >= 0 and isIgnored(path[:slash])): continue
+        fname = relName(path)
+        if path in modified:
+            if not os.path.isfile(fname): continue # deleted in the working tree
+        elif mode != '120000' and stage == '0': # symlinks: the blob holds the link target
+            fingerprints[fname] = 'git:' + blob
+        temp = FileInfo()
+        temp.fileName = fname
+        temp.fileType = ftype
+        fileInfoList.append(temp)
+    return fileInfoList, fingerprints, changed
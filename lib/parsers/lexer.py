@@ -0,0 +1,183 @@
+"""
+Single-pass lexer for (PL/)SQL
+
+Splits a text into tokens (with line numbers), recognizing
+  * comments: '-- ...', '/* ... */', and lines starting with '//', '##' or
+    the SQL*Plus REM[ARK] command
+  * string literals: '...' (with '' escapes), N'...', and the alternative
+    quoting q'[...]' (also with {}, (), <> or any other delimiter character)
+  * quoted identifiers: "..."
+  * statement terminators: ';' and a '/' on a line of its own
+  * SQL*Plus PROMPT lines (their text is no SQL)
+  * words (identifiers, keywords, numbers), whitespace, and everything else
+A string or block comment which is not terminated extends to the end of the
+text - as it would for the database.
+
+The scans first take the "code only" text: splitCode() returns it (comments
+removed, string contents optionally emptied, line structure intact) together
+with the lines holding comments, which lineStats() then uses to classify the
+lines for the LOC statistics. lineTokens() then gives them the tokens of each
+line of code, and the statement terminators found there.
+"""
+__revision__ = '$Id$'
+
+import re
+
+# The "special" tokens are all which can hide parts of the code. Each regexp
+# must match at the start of the token; their order is the order of precedence.
+specialTokens = r"""
+   (?P<comment>--[^\n]*
+     |/\*.*?(?:\*/|\Z)
+     |^[ \t]*(?://|\#\#)[^\n]*
+     |^[ \t]*[Rr][Ee][Mm](?:[Aa][Rr][Kk])?(?=[ \t\n]|\Z)[^\n]*)
+  |(?P<sqlplus>^[ \t]*[Pp][Rr][Oo][Mm][Pp][Tt](?=[ \t\n]|\Z)[^\n]*)
+  |(?P<string>(?<![\w$#])[Nn]?[Qq]'(?:\[.*?\]|\{.*?\}|\(.*?\)|<.*?>|(?P<qdelim>[^\s\[{(<]).*?(?P=qdelim))'
+     |(?<![\w$#])[Nn]?'[^']*(?:''[^']*)*(?:'|\Z)
+     |'[^']*(?:''[^']*)*(?:'|\Z))
+  |(?P<qident>"[^"\n]*")
+"""
+specialPatt = re.compile(specialTokens, re.X|re.S|re.M)
+tokenPatt   = re.compile(specialTokens + r"""
+  |(?P<terminator>;|^[ \t]*/[ \t]*$)
+  |(?P<word>[\w$#]+)
+  |(?P<newline>\n)
+  |(?P<space>[ \t\r\f\v]+)
+  |(?P<other>.)
+""", re.X|re.S|re.M)
+
+
+def tokenize(text):
+    """
+    Split the given text into tokens
+    @param string text text to process
+    @return generator yielding tuples (string type, string token, int lineNumber),
+            type being one of comment, sqlplus, string, qident, terminator, word,
+            newline, space, other. lineNumber is the (1-based) line the token starts in
+    """
+    lineNumber = 1
+    for m in tokenPatt.finditer(text):
+        token = m.group(0)
+        yield m.lastgroup, token, lineNumber
+        lineNumber += token.count('\n')
+
+
+def joinLines(lines):
+    """
+    Join lines as returned by readlines() into a single text using '\\n' as line
+    break only: codecs readers also break lines at e.g. form feeds, so their
+    line numbers would not match those of the text otherwise.
+    @param list lines lines including their line breaks
+    @return string text
+    """
+    return '\n'.join([line.splitlines()[0] for line in lines])
+
+
+def splitCode(text,strings=True):
+    """
+    Remove comments (and SQL*Plus REM/PROMPT lines) from the given text, and
+    optionally the contents of string literals. Line breaks are kept, so the
+    result has the same line numbers as the original.
+    @param string text text to process
+    @param optional boolean strings whether to empty string literals (they
+           are replaced by '' - plus the line breaks they contained). Default: True
+    @return string code the text without comments
+    @return dict markedLines line number (1-based) -> set of the special tokens
+            found in that line: 'comment', 'sqlplus' (PROMPT), 'string'
+    """
+    code = []
+    markedLines = {}
+    pos = 0         # how far the text was copied to code
+    linePos = 0     # position lineNumber was counted up to
+    lineNumber = 1
+    for m in specialPatt.finditer(text):
+        ttype = m.lastgroup
+        if ttype == 'qident': continue
+        start, end = m.span()
+        lineNumber += text.count('\n',linePos,start)
+        nl = text.count('\n',start,end)
+        for line in range(lineNumber,lineNumber+nl+1):
+            markedLines.setdefault(line,set()).add(ttype)
+        lineNumber += nl
+        linePos = end
+        if ttype == 'string' and not strings: continue
+        code.append(text[pos:start])
+        if ttype == 'string': code.append("''" + '\n'*nl)
+        else: code.append('\n'*nl)
+        pos = end
+    code.append(text[pos:])
+    return ''.join(code), markedLines
+
+
+def lineTokens(lines):
+    """
+    Split lines of code (see splitCode: no comments, and no line breaks within
+    string literals once their contents are emptied) into their tokens. Tokens
+    not separated by whitespace are joined, as the scans look at "words" like
+    'schema.name' or 'name(' - but quoted identifiers and strings are kept
+    in one piece.
+    @param iterable lines lines of code (without their line breaks)
+    @return generator yielding a tuple (list tokens, string terminator) per
+            line, terminator being the last statement terminator found in the
+            line (';' or '/') - or None if there is none
+    """
+    for line in lines:
+        tokens = []
+        terminator = None
+        glue = False    # whether the next token continues the last one
+        for ttype, token, ln in tokenize(line):
+            if ttype == 'space' or ttype == 'newline':
+                glue = False
+                continue
+            if ttype == 'terminator':
+                token = terminator = token.strip()
+            if glue: tokens[-1] += token
+            else: tokens.append(token)
+            glue = True
+        yield tokens, terminator
+
+
+def lineStats(code,markedLines):
+    """
+    Classify the lines of a text as processed by splitCode
+    @param string code text as returned by splitCode
+    @param dict markedLines as returned by splitCode
+    @return dict number of lines: all, code (code only), comment (comment only),
+            mixed (code and comment), empty (neither code nor comment). SQL*Plus
+            PROMPT lines count as code.
+    """
+    lines = code.split('\n')
+    if lines and lines[-1] == '': lines.pop() # text ending with a line break
+    stat = {'all':len(lines), 'code':0, 'comment':0, 'mixed':0, 'empty':0}
+    for i in range(len(lines)):
+        marks = markedLines.get(i+1,())
+        hasCode = 'sqlplus' in marks or lines[i].strip() != ''
+        if 'comment' in marks:
+            if hasCode: stat['mixed'] += 1
+            else: stat['comment'] += 1
+        elif hasCode: stat['code'] += 1
+        else: stat['empty'] += 1
+    return stat
+
+
+def multiLineTokens(text):
+    """
+    Find the special tokens (comments, strings) spanning multiple lines - or
+    reaching the end of the text, as they might be unterminated there. A text
+    can be split at the start of any line not inside such a token, and
+    splitCode() then gives the same results for the parts as for the whole.
+    @param string text text to process
+    @return list of tuples (int firstLine, int lastLine), both 0-based
+    """
+    spans = []
+    lineNumber = 0
+    linePos = 0
+    tlen = len(text)
+    for m in specialPatt.finditer(text):
+        start, end = m.span()
+        nl = text.count('\n',start,end)
+        if nl == 0 and end < tlen: continue
+        lineNumber += text.count('\n',linePos,start)
+        spans.append((lineNumber,lineNumber+nl))
+        lineNumber += nl
+        linePos = end
+    return spans
@@ -0,0 +1,215 @@
+"""
+Multi-pattern matcher for the where_used scan
+
+Instead of running one regular expression per known object over each file,
+all object names are collected into a single lookup table keyed by their
+(lower-cased) identifier. A file is then tokenized once, and each identifier
+token is checked against that table. This way the usage scan scales with the
+size of the input instead of with files x objects.
+
+Supported pattern types (all case-insensitive, as with getWordLineNo):
+  * word:   '\\bNAME\\b'       (views, tables, stand-alone functions, ...)
+  * prefix: '\\bNAME\\.\\S'     (package name followed by a member reference)
+  * pair:   '\\bNAME\\.MEMBER\\b' (package.function, package.procedure)
+  * short:  '(^|\\s|[(;,])NAME([ (;,)]|$)' (unqualified reference to a package
+            member; only searched for in the texts of a given scope, i.e. the
+            file the package is defined in)
+Names which are not plain identifiers (e.g. containing quotes, dots or '$')
+are handed to the regular expression engine as before, so results stay the same.
+"""
+__revision__ = '$Id$'
+
+import re
+from hypercore.helpers import getWordLineNr
+from iz_tools.text import LineIndex
+
+wordPatt  = re.compile(r'\w+')          # identifier tokens (same \w as used by the regexp patterns)
+plainPatt = re.compile(r'^[A-Za-z0-9_]+$')
+spaceChars = ' \t\n\r\f\v'              # what \s matches (non-unicode mode)
+shortBefore = spaceChars + '(;,'        # what may precede a short reference
+shortAfter  = ' (;,)'                   # what may follow it (besides the end of the text)
+
+
+class UsageMatcher(object):
+    """
+    Collects patterns for all known objects and finds them in a text with a
+    single pass. Each pattern is registered with a target (any object the
+    caller wants back, e.g. a tuple (elemInfo, otype)); scan() returns the hits
+    per target index, which reflects the order of registration.
+    """
+    def __init__(self):
+        """
+        Initialize the matcher
+        @param self
+        """
+        self.targets  = []  # registered targets, index = registration order
+        self.index    = {}  # lowered identifier -> list of (kind, idx, lowered member)
+        self.fallback = []  # (idx, regexp) for names which are no plain identifiers
+        self.short    = {}  # scope -> lowered identifier -> list of idx (short references)
+        self.shortFallback = {} # scope -> list of (idx, regexp)
+
+    def addTarget(self,target):
+        """
+        Register a target without a pattern (e.g. as a placeholder for
+        hits the caller obtains by other means)
+        @param self
+        @param object target
+        @return int idx index of the target
+        """
+        self.targets.append(target)
+        return len(self.targets) - 1
+
+    def addWord(self,name,target):
+        """
+        Register a pattern for a whole word (equivalent to '\\bNAME\\b')
+        @param self
+        @param string name name of the object
+        @param object target what to associate the hits with
+        @return int idx index of the target
+        """
+        idx = self.addTarget(target)
+        if plainPatt.match(name):
+            self.index.setdefault(name.lower(),[]).append(('word',idx,None))
+        else:
+            self.fallback.append((idx,'\\b'+name+'\\b'))
+        return idx
+
+    def addPrefix(self,name,target):
+        """
+        Register a pattern for a qualified reference (equivalent to '\\bNAME\\.\\S')
+        @param self
+        @param string name name of the object (usually a package)
+        @param object target what to associate the hits with
+        @return int idx index of the target
+        """
+        idx = self.addTarget(target)
+        if plainPatt.match(name):
+            self.index.setdefault(name.lower(),[]).append(('prefix',idx,None))
+        else:
+            self.fallback.append((idx,'\\b'+name+'\\.\S'))
+        return idx
+
+    def addPair(self,name,member,target):
+        """
+        Register a pattern for a qualified member (equivalent to '\\bNAME\\.MEMBER\\b')
+        @param self
+        @param string name name of the object (usually a package)
+        @param string member name of the member (e.g. function or procedure)
+        @param object target what to associate the hits with
+        @return int idx index of the target
+        """
+        idx = self.addTarget(target)
+        if plainPatt.match(name) and plainPatt.match(member):
+            self.index.setdefault(name.lower(),[]).append(('pair',idx,member.lower()))
+        else:
+            self.fallback.append((idx,'\\b'+name+'\.'+member+'\\b'))
+        return idx
+
+    def addShort(self,name,scope,target):
+        """
+        Register a pattern for an unqualified reference (equivalent to
+        '(^|\\s|[(;,])NAME([ (;,)]|$)'), which is only searched for in texts
+        scanned with the given scope
+        @param self
+        @param string name name of the object (usually a package member)
+        @param object scope any hashable identifying where to look for it
+        @param object target what to associate the hits with
+        @return int idx index of the target
+        """
+        idx = self.addTarget(target)
+        if plainPatt.match(name):
+            self.short.setdefault(scope,{}).setdefault(name.lower(),[]).append(idx)
+        else:
+            self.shortFallback.setdefault(scope,[]).append((idx,'(^|\\s|[(;,])'+name+'([ (;,)]|$)'))
+        return idx
+
+    def scan(self,text,lineIndex=None,tokens=None,scope=None):
+        """
+        Find all registered patterns in the given text
+        @param self
+        @param string text text to search in
+        @param optional object lineIndex iz_tools.text.LineIndex for text (if
+               you already have one; otherwise it is created on the first hit)
+        @param optional set tokens if given, all (lower-cased) identifiers found
+               in the text are added to it (see candidates)
+        @param optional object scope if given, the short references registered
+               for it are searched for as well
+        @return dict hits idx -> list of tuples (lineno, offset, word), as
+                getWordLineNo would return them for the corresponding pattern
+        """
+        hits    = {}
+        lastEnd = {}        # idx -> end of the last hit (matches must not overlap)
+        tlen    = len(text)
+        short   = self.short.get(scope)
+        for m in wordPatt.finditer(text):
+            word = m.group(0).lower()
+            if tokens is not None: tokens.add(word)
+            entries = self.index.get(word)
+            if short: sentries = short.get(word)
+            else: sentries = None
+            if entries is None and sentries is None: continue
+            start = m.start()
+            end   = m.end()
+            found = []
+            if sentries:
+                hit = self.shortHit(text,start,end,tlen)
+                if hit:
+                    for idx in sentries: found.append((idx,)+hit)
+            for kind, idx, member in entries or ():
+                if kind == 'word':
+                    found.append((idx,start,end))
+                elif end+1 < tlen and text[end] == '.':
+                    if kind == 'prefix':
+                        if text[end+1] not in spaceChars: found.append((idx,start,end+2))
+                    else:
+                        mm = wordPatt.match(text,end+1)
+                        if mm and mm.group(0).lower() == member: found.append((idx,start,mm.end()))
+            if not found: continue
+            if lineIndex is None: lineIndex = LineIndex(text)
+            for idx, hstart, hend in found:
+                if lastEnd.get(idx,-1) > hstart: continue
+                lastEnd[idx] = hend
+                lineno, offset = lineIndex.position(hstart)
+                hits.setdefault(idx,[]).append((lineno, offset, text[hstart:hend]))
+        for idx, patt in self.fallback + self.shortFallback.get(scope,[]):
+            res = getWordLineNr(text,patt,lineIndex)
+            if res: hits[idx] = res
+        return hits
+
+    def shortHit(self,text,start,end,tlen):
+        """
+        Check the context of an identifier for a short reference: as with the
+        regexp, the hit includes the character before and after the name
+        @param self
+        @param string text text scanned
+        @param int start start of the identifier
+        @param int end end of the identifier
+        @param int tlen length of the text
+        @return tuple (start, end) of the hit, or None if there is none
+        """
+        if start > 0:
+            if text[start-1] not in shortBefore: return None
+            start -= 1
+        if end < tlen and text[end] in shortAfter: return start, end+1
+        if end == tlen or (end+1 == tlen and text[end] == '\n'): return start, end # '$'
+        return None
+
+    def candidates(self,tokens):
+        """
+        Get all registered patterns which could match a text containing the
+        given identifiers (and no others). Patterns for names which are no plain
+        identifiers are always included, as scan() uses regexps for them. Short
+        references are not: they depend on their scope only.
+        @param self
+        @param iterable tokens lower-cased identifiers (as collected by scan)
+        @return list of tuples (string kind, int idx, string name, string member),
+                kind being 'word', 'prefix', 'pair' or 'regexp' (with the
+                regexp as name, and None as member)
+        """
+        cands = []
+        for word in tokens:
+            for kind, idx, member in self.index.get(word,()):
+                cands.append((kind,idx,word,member))
+        for idx, patt in self.fallback:
+            cands.append(('regexp',idx,patt,None))
+        return cands
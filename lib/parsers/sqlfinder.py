@@ -4,14 +4,26 @@ Scan for (PL/)SQL objects
 __revision__ = '$Id$'
 
 from iz_tools.system import fopen
-from hypercore.helpers  import eatStrings, getWordLineNr
 from hypercore.elements import *
 from hypercore.javadoc  import *
+from iz_tools.text import LineIndex
+from parsers.matcher import UsageMatcher
+from parsers.lexer import joinLines, splitCode, lineStats, lineTokens, multiLineTokens
 import hypercore.cache
-import re, gettext, locale, os
+from hypercore.helpers import getJobs, scanOrder
+import re, gettext, locale, os, multiprocessing, mmap
+from bisect import bisect_left, bisect_right
+from tempfile import TemporaryFile
+from hashlib import md5
 from hypercore.logger import logg
 logname = 'ParseSQL'
 logger = logg.getLogger(logname)
+usageScanData = {} # matcher, caches etc. for ScanUsageWorker (and its worker processes)
+objectScanData = {} # cache and settings signature for ScanFileWorker
+streamChunkSize = 1024*1024 # max size of the chunks large files are processed in (see streamCode)
+sigHeadPatt = re.compile(r'(function|procedure)\s+([^\s(]+)\s*\(', re.I) # routine definitions (see routineSignatures)
+sigTailPatt = { 'function':  re.compile(r'(.*?)\)\s*return', re.I|re.S),
+                'procedure': re.compile(r'(.*?)\)\s*[ia]s', re.I|re.S) }
 from progress import *
 
 # Setup gettext support
@@ -21,12 +33,58 @@ lang = gettext.translation('hypersql', langpath, languages=langs, fallback=True)
 _ = lang.ugettext
 
 try:
-    from hypercore.xml_forms import OraForm
+    from hypercore.xml_forms import OraForm, FormStream
 except:
     pass
 
 
 #============================================================[ Object Scan ]===
+#------------------------------------------------------------------------------
+class JavaDocIndex(object):
+    """
+    Index of the JavaDoc blocks of a file, used to find the blocks which may
+    be attached to an object without walking all of them for each object.
+    A block is a candidate for an object if it names it (with the matching
+    object type), or if it starts within blindOffset lines before or after the
+    object (but not on the same line). Candidates are returned in the order of
+    the JavaDoc list, so callers can apply their tie-breaking as before.
+    """
+    def __init__(self,jdoc,blindOffset):
+        """
+        Build the index
+        @param self
+        @param list jdoc JavaDoc objects as returned by ScanJavaDoc
+        @param int blindOffset max line distance for unnamed blocks
+        """
+        self.jdoc  = jdoc
+        self.blindOffset = blindOffset
+        self.names = {}     # (lowered name, objectType) -> list of indexes into jdoc
+        for j in range(len(jdoc)):
+            self.names.setdefault((jdoc[j].name.lower(),jdoc[j].objectType),[]).append(j)
+        byLine = sorted([(jdoc[j].lineNumber,j) for j in range(len(jdoc))])
+        self.lines = [line for line, j in byLine]
+        self.order = [j for line, j in byLine]
+
+    def candidates(self,name,oType,lineNumber):
+        """
+        Get the JavaDoc blocks which may be attached to an object
+        @param self
+        @param string name name of the object
+        @param string oType object type as used with the JavaDoc object tags
+        @param int lineNumber line number the distances are computed against
+        @return list of tuples (int ln, object JavaDoc) in the order of the
+                JavaDoc list, ln being the distance of the block (its lineNumber
+                minus the given lineNumber)
+        """
+        found = set(self.names.get((name.lower(),oType),()))
+        if self.blindOffset > 1:
+            lo = bisect_right(self.lines,lineNumber-self.blindOffset)
+            hi = bisect_left(self.lines,lineNumber+self.blindOffset)
+            for pos in range(lo,hi):
+                if self.lines[pos] != lineNumber: found.add(self.order[pos])
+        return [(self.jdoc[j].lineNumber-lineNumber, self.jdoc[j]) for j in sorted(found)]
+
+
 #------------------------------------------------------------------------------
 def ElemInfoAppendJdoc(oInfo,oType,lineNumber,jdoc):
     """
@@ -34,20 +92,18 @@ def ElemInfoAppendJdoc(oInfo,oType,lineNumber,jdoc):
     @param object oInfo ElemInfo object
     @param string oType object type checked for lineNumber
     @param int lineNumber number of the currently processed line
-    @param object jdoc JavaDoc object
+    @param object jdoc JavaDocIndex of the file
     """
     oInfo.lineNumber = lineNumber
-    for j in range(len(jdoc)):
-        ln = jdoc[j].lineNumber - lineNumber
-        if ( oInfo.name.lower()==jdoc[j].name.lower() and jdoc[j].objectType==oType) or (ln>0 and ln<metaInfo.blindOffset) or (ln<0 and ln>-1*metaInfo.blindOffset):
-            oInfo.javadoc = jdoc[j]
-            if hasattr(oInfo,'bugs'):
-                if len(jdoc[j].bug) > 0 and metaInfo.indexPage['bug'] != '':
-                    for ib in range(len(jdoc[j].bug)):
-                        oInfo.bugs.addItem(jdoc[j].name,jdoc[j].bug[ib])
-                if len(jdoc[j].todo) > 0 and metaInfo.indexPage['todo'] != '':
-                    for ib in range(len(jdoc[j].todo)):
-                        oInfo.todo.addItem(jdoc[j].name,jdoc[j].todo[ib])
+    for ln, jd in jdoc.candidates(oInfo.name,oType,lineNumber):
+        oInfo.javadoc = jd
+        if hasattr(oInfo,'bugs'):
+            if len(jd.bug) > 0 and metaInfo.indexPage['bug'] != '':
+                for ib in range(len(jd.bug)):
+                    oInfo.bugs.addItem(jd.name,jd.bug[ib])
+            if len(jd.todo) > 0 and metaInfo.indexPage['todo'] != '':
+                for ib in range(len(jd.todo)):
+                    oInfo.todo.addItem(jd.name,jd.todo[ib])
 
     if not oInfo.javadoc.ignore:
         mname = oInfo.javadoc.name or oInfo.name
@@ -65,12 +121,10 @@ def FormInfoAppendJavadoc(oInfo,oType,jdoc):
     Append javadoc to form elements
     @param object oInfo the form element
     @param string oType type of the element (form, pkg, func, proc)
-    @param list jdoc JavaDoc object
+    @param object jdoc JavaDocIndex of the form code
     """
-    for j in range(len(jdoc)):
-      ln = jdoc[j].lineNumber - oInfo.lineNumber
-      if (oInfo.name.lower()==jdoc[j].name.lower() and jdoc[j].objectType==oType) or (ln>0 and ln<metaInfo.blindOffset) or (ln<0 and ln>-1*metaInfo.blindOffset):
-        oInfo.javadoc = jdoc[j]
+    for ln, jd in jdoc.candidates(oInfo.name,oType,oInfo.lineNumber):
+      oInfo.javadoc = jd
 
     if JavaDocVars['verify_forms'] and not oInfo.javadoc.ignore:
       mname = oInfo.javadoc.name or oInfo.name
@@ -134,28 +188,120 @@ def appendGlobalTasks(otype,master,jd,uid=0,jdverify=None):
         #elif otype == 'proc'      : master.verification.addProc(jd.name,ver,jd.author,master.uniqueNumber)
 
 
+#------------------------------------------------------------------------------
+def readForm(fileName,cache=None):
+    """
+    Get the parsed contents (units, trigger, module/library info and stats) of
+    an Oracle Forms XML file. If a cache is given, they are taken from there
+    for an unchanged file. Otherwise, a FormStream is returned, which parses
+    the file while its units are processed - pass it to storeForm() when done,
+    so the results get cached.
+    @param string fileName name of the XML file
+    @param optional object cache hypercore.cache.cache
+    @return object form OraForm or FormStream (both offering getUnits,
+            getTrigger, getModuleName, getModuleInfo, getLibraryInfo, getStats)
+    """
+    if cache is not None and cache.check(fileName,'form'):
+        cached = cache.getObj(fileName,'form',0)
+        if cached and cached[0] == 1: # format version of the cached data
+            return cached[1]
+    return FormStream(fileName, keep=cache is not None)
+
+
+#------------------------------------------------------------------------------
+def storeForm(fileName,form,cache=None):
+    """
+    Store the parsed contents of an Oracle Forms XML file in the cache (if
+    they have been parsed, i.e. were not taken from the cache by readForm)
+    @param string fileName name of the XML file
+    @param object form as returned by readForm
+    @param optional object cache hypercore.cache.cache
+    """
+    if cache is None or not isinstance(form,FormStream): return
+    try:
+        cache.putObj(fileName,'form',(1,form.getForm()))
+    except Exception, e:
+        logger.warn(_('Could not cache the parsed form %(file)s: %(err)s'), {'file':fileName, 'err':e})
+
+
+#------------------------------------------------------------------------------
+def loadFormCode(fileName):
+    """
+    Re-create the code of an Oracle Forms XML file as parseForm assembles it
+    (for the FormCodeStore, if it neither holds it in memory nor in the cache)
+    @param string fileName name of the XML file
+    @return string formcode (None if Oracle Forms are not processed)
+    """
+    if metaInfo.indexPage['form'] == '' or not OraForm: return None
+    form = readForm(fileName, objectScanData.get('cache'))
+    formcode = assembleFormCode(form.getUnits(), form.getTrigger())
+    storeForm(fileName, form, objectScanData.get('cache'))
+    return formcode
+
+
+#------------------------------------------------------------------------------
+def iterFormCode(units,trigger):
+    """
+    Walk the code of an Oracle Form as it is assembled: the code of all program
+    units (each followed by a line break), then that of all trigger. Units
+    without a type (deleted objects) are skipped. As units and trigger are
+    consumed lazily, they may be streamed (see readForm).
+    @param iterable units dicts (name, type, code) of the program units
+    @param iterable trigger dicts (name, code) of the trigger
+    @return generator yielding tuples (string kind, dict unit, int firstLine,
+            int lastLine, string chunk), kind being 'unit' or 'trigger', and
+            chunk the code the unit adds to the form code. Lines are 1-based;
+            for units without code, lastLine is firstLine -1
+    """
+    lines = 0       # line breaks in the chunks so far
+    for kind, items, eol in (('unit',units,'\n'), ('trigger',trigger,'')):
+        for unit in items:
+            if kind == 'unit' and not unit['type']: continue
+            code = unit['code']
+            if code:
+                nl = code.count('\n')
+                yield kind, unit, lines +1, lines +1 +nl, code + eol
+                lines += nl + len(eol)
+            else:
+                yield kind, unit, lines +1, lines, ''
+
+
+#------------------------------------------------------------------------------
+def assembleFormCode(units,trigger):
+    """
+    Assemble the code of an Oracle Form (see iterFormCode)
+    @param iterable units dicts (name, type, code) of the program units
+    @param iterable trigger dicts (name, code) of the trigger
+    @return string formcode
+    """
+    return ''.join([chunk for kind, unit, first, last, chunk in iterFormCode(units,trigger)])
+
+
+#------------------------------------------------------------------------------
+def formMarks():
+    """
+    Get the unit types of Oracle Forms program units as configured
+    @return tuple (proc_mark, func_mark, pcks_mark, pck_mark), all upper case
+    """
+    return ( metaInfo.config.get('Forms','proc_mark','Procedure').upper(),
+             metaInfo.config.get('Forms','func_mark','Function').upper(),
+             metaInfo.config.get('Forms','pcks_mark','Package Body').upper(),
+             metaInfo.config.get('Forms','pck_mark','Package Body').upper() )
+
+
 #------------------------------------------------------------------------------
 def parseForm(file_info):
     """
     Parse an Oracle Forms XML file
     @param object file_info the FileInfo object containint the form data
-    @param object config instance of HyperConf
     """
-    # config.get(..)
-    proc_mark = metaInfo.config.get('Forms','proc_mark','Procedure').upper()
-    func_mark = metaInfo.config.get('Forms','func_mark','Function').upper()
-    pcks_mark  = metaInfo.config.get('Forms','pcks_mark','Package Body').upper()
-    pck_mark  = metaInfo.config.get('Forms','pck_mark','Package Body').upper()
-    formcode = ''
+    proc_mark, func_mark, pcks_mark, pck_mark = formMarks()
 
-    if metaInfo.useCache: cache = hypercore.cache.cache(metaInfo.cacheDirectory)
-
-    form = OraForm(file_info.fileName)
+    form = readForm(file_info.fileName, objectScanData.get('cache'))
     modinfo = form.getModuleInfo()
     libinfo = form.getLibraryInfo()
     form_info = FormInfo()
     form_info.parent = file_info
-    form_info.stats = form.getStats()
     if modinfo:
         form_info.formType = 'module'
         form_info.title     = modinfo['title']
@@ -167,10 +313,16 @@ def parseForm(file_info):
     form_info.name = form.getModuleName()
     form_info.lineNumber = 1
 
-    for unit in form.getUnits(): # name, type, code
-        if not unit['type']: continue # deleted objects have their type removed
-        linenr = formcode.count('\n') +1
-        if unit['code']: formcode += unit['code'] + '\n'
+    chunks = []
+    for kind, unit, linenr, lastnr, chunk in iterFormCode(form.getUnits(), form.getTrigger()):
+        chunks.append(chunk) # unit: name, type, code
+        if kind == 'trigger':
+            elem = StandAloneElemInfo()
+            elem.parent = form_info
+            elem.name = unit['name']
+            elem.lineNumber = linenr
+            form_info.triggerInfoList.append(elem)
+            continue
         if unit['type'].upper() == proc_mark:
             elem = StandAloneElemInfo()
             elem.parent = form_info
@@ -207,14 +359,9 @@ def parseForm(file_info):
             continue    # skip package specifications
         else:
             logger.info(_('Skipped unknown form unit type "%(type)s" in %(file)s'),{'type':unit['type'],'file':file_info.fileName})
-    for trigger in form.getTrigger():
-        linenr = formcode.count('\n') +1
-        if trigger['code']: formcode += trigger['code']
-        elem = StandAloneElemInfo()
-        elem.parent = form_info
-        elem.name = trigger['name']
-        elem.lineNumber = linenr
-        form_info.triggerInfoList.append(elem)
+    formcode = ''.join(chunks)
+    form_info.stats = form.getStats() # complete only after the entire form is parsed
+    storeForm(file_info.fileName, form, objectScanData.get('cache'))
 
     form_info.codesize = len(formcode)
     file_info.formInfoList.append(form_info)
@@ -222,10 +369,9 @@ def parseForm(file_info):
     file_info.xmlbytes = os.path.getsize(file_info.fileName)
     file_info.xmlcodebytes = len(formcode)
     #file_info.lines = formcode.count('\n')
-    if metaInfo.useCache and not cache.check(file_info.fileName,'formcode'):
-        cache.put(file_info.fileName, 'formcode', formcode)
+    metaInfo.formCode.put(file_info.fileName, formcode)
     if metaInfo.useJavaDoc:
-        jdoc = ScanJavaDoc(formcode, file_info.fileName)
+        jdoc = JavaDocIndex(ScanJavaDoc(formcode, file_info.fileName), metaInfo.blindOffset)
         FormInfoAppendJavadoc(form_info,'form',jdoc)
         for pkg in form_info.packageInfoList:
             FormInfoAppendJavadoc(pkg,'pkg',jdoc)
@@ -250,48 +396,39 @@ def parseForm(file_info):
 
 
 #------------------------------------------------------------------------------
-def ScanFilesForObjects():
+def ScanFileForObjects(file_info):
     """
-    Scans files from metaInfo.fileInfoList for views and packages and collects
-    some metadata about them (name, file, lineno). When encountering a package
-    spec, it also scans for its functions and procedures.
-    It simply searches the source file for keywords. With each object info,
-    file name and line number are stored (and can be used to identify parent
-    and children) - for functions and procedures contained in packages, a link
-    to their parent is stored along.
+    Scan a single file for views, packages and the other objects (see
+    ScanFilesForObjects). Results are stored with the passed file_info.
+    @param object file_info FileInfo object of the file to scan
     """
-    pbarInit(_("Scanning source files for views and packages"),0,len(metaInfo.fileInfoList), logname)
-
-    if metaInfo.indexPage['form'] and not OraForm:
-        logger.error(_('Cannot process Oracle Forms XML files - SAX API (pyxml) seems to be unavailable.'))
-
-    i = 0
-
-    # first, find views in files
-    dot_count = 1
-    for file_info in metaInfo.fileInfoList:
-
-        # print progress
-        i += 1
-        pbarUpdate(i)
-
-        # skip all non-sql files
-        if file_info.fileType not in ['sql','xml']:
-            continue
-
-        # Oracle Forms XML files have special processing:
-        if file_info.fileType in ['xml'] and metaInfo.indexPage['form'] !='':
-            parseForm(file_info)
-            continue
+    # Oracle Forms XML files have special processing:
+    if file_info.fileType in ['xml'] and metaInfo.indexPage['form'] !='':
+        parseForm(file_info)
+        return
 
-        #### All other files (except for Oracle Forms XML) are processed here:
+    #### All other files (except for Oracle Forms XML) are processed here:
+    file_info.bytes  = os.path.getsize(file_info.fileName)
+    if metaInfo.streamThreshold and file_info.bytes > metaInfo.streamThreshold:
+        # large file: process it in chunks, keeping the code in a temporary file
+        infile = fopen(file_info.fileName, "r", metaInfo.encoding)
+        codefile = TemporaryFile()
+        jdoc, decode = streamCode(file_info,infile,codefile,min(metaInfo.streamThreshold,streamChunkSize))
+        infile.close()
+        if file_info.lines < 1:
+            codefile.close()
+            return
+        codefile.flush()
+        code = mmap.mmap(codefile.fileno(),0,access=mmap.ACCESS_READ)
+        codefile.seek(0)
+        codeLines = readCodeLines(codefile,decode)
+    else:
         infile = fopen(file_info.fileName, "r", metaInfo.encoding)
         fileLines = infile.readlines()
         infile.close()
         file_info.lines = len(fileLines)
-        file_info.bytes  = os.path.getsize(file_info.fileName)
         if file_info.lines < 1:
-            continue            # skip empty files
+            return            # skip empty files
 
         # scan this file for possible JavaDoc style comments
         if metaInfo.useJavaDoc:
@@ -299,395 +436,791 @@ def ScanFilesForObjects():
         else:
             jdoc = []
 
-        # if we find a package definition, this flag tells us to also look for
-        # functions and procedures.  If we don't find a package definition, there
-        # is no reason to look for them
-        package_count = -1
-        pks_count = -1
-        in_block_comment = 0
-        new_file = 1
-
+        # strip comments and string contents, so we only see the code
+        codefile = None
+        code, markedLines = splitCode(joinLines(fileLines))
+        stats = lineStats(code, markedLines)
+        for what in ['code','comment','empty']:
+            metaInfo.incLoc(what,stats[what])
         metaInfo.incLoc('totals',len(fileLines))
-        filetext = '\n'.join(fileLines) # filetext: complete file in one string; filetextnoc: without comments etc (just used for parameter parsing)
-        filetextnoc  = re.sub(re.compile("/\*.*?\*/",re.DOTALL ) ,"" ,filetext) # remove /* comments */
-        filetextnoc  = re.sub(re.compile("\n\s*--.*\n" ) ,"" ,filetextnoc)   # remove full-line -- comments
-        filetextnoc  = re.sub(re.compile("--[^']*?\n" )  ,"" ,filetextnoc)   # remove in-line -- comments
-        filetextnoc  = re.sub(re.compile(":=\s*'.*?'\s*([,\)])",re.MULTILINE),r"\1" ,filetextnoc) # filter out defaults from parameters (catches more, we don't care here)
-        fileLines[0] = re.sub(re.compile("--[^']*?$" )  ,"" ,fileLines[0])   # remove in-line -- comments for object parse (EXPERIMENTAL!)
-        for lineNumber in range(file_info.lines):
-            if len(fileLines[lineNumber].strip()) < 0:
-                metaInfo.incLoc('empty')
-                continue
-            if new_file == 1:
-                token_list = fileLines[lineNumber].split()
-            else:
-                token_list = token_list1
-
-            new_file = 0
-            # len()-1 because we start with index 0
-            if len(fileLines)-1 > lineNumber:
-                fileLines[lineNumber+1] = re.sub(re.compile("--[^']*?$" )  ,"" ,fileLines[lineNumber+1])   # remove in-line -- comments for object parse (EXPERIMENTAL!)
-                fileLines[lineNumber+1], matched_string = eatStrings(fileLines[lineNumber+1])
-                token_list1 = fileLines[lineNumber+1].split()
-                if matched_string and len(token_list1) < 1: # that line was completely eaten
-                    metaInfo.incLoc('code')
-                    metaInfo.incLoc('empty',-1)
-            else:
-                token_list1 = []
+        codeLines = iter(code.split('\n'))
+
+    # if we find a package definition, this flag tells us to also look for
+    # functions and procedures.  If we don't find a package definition, there
+    # is no reason to look for them
+    package_count = -1
+    pks_count = -1
+
+    # JavaDoc blocks by name and line, to find those belonging to the objects
+    jdoc = JavaDocIndex(jdoc, metaInfo.blindOffset)
+
+    # parameter lists of all functions and procedures, for the JavaDoc verification
+    if JavaDocVars['verification']: signatures = routineSignatures(code)
+
+    # the tokens of each line, and the statement terminator found in it
+    codeTokens = lineTokens(codeLines)
+    token_list1, terminator1 = next(codeTokens,([],None))
+    for lineNumber in range(file_info.lines):
+        token_list, terminator = token_list1, terminator1
+        token_list1, terminator1 = next(codeTokens,([],None))
+
+        # a '/' ends the PL/SQL unit: functions and procedures following are
+        # neither part of a package specification nor of the last package body
+        if terminator == '/':
+            pks_count = -1
+            package_count = -1
+
+        # ignore very short lines
+        if len(token_list)<2:
+            continue
 
-            if in_block_comment == 0 and fileLines[lineNumber].strip() != '' \
-              and fileLines[lineNumber].find('--') == -1 and fileLines[lineNumber].find('//') == -1 \
-              and fileLines[lineNumber].find('##') == -1 and fileLines[lineNumber].find('/*') == -1:
-                metaInfo.incLoc('code')
+        for token_index in range(len(token_list)):
+            # find types
+            if metaInfo.indexPage['type']:
+                # look for CREATE [OR REPLACE] TYPE [schema.]trigger (...), making sure enough tokens exist
+                if len(token_list) > token_index+1 \
+                and token_list[token_index+1].upper() == "TYPE" \
+                and token_list[token_index].upper() in ['CREATE','REPLACE']:
+                    tab_info = StandAloneElemInfo()
+                    tab_info.parent = file_info
+                    if len(token_list) > token_index+2:
+                      tab_info.name = token_list[token_index+2]
+                    else:
+                      tab_info.name = token_list1[0]
+                    tab_info.name = fixQuotedName(tab_info.name)
+                    ElemInfoAppendJdoc(tab_info,'type',lineNumber+1,jdoc)
+                    file_info.typeInfoList.append(tab_info)
+                    continue
 
-            # ignore lines that begin with comments
-            if len(token_list) > 0 and len(token_list[0]) > 1:
-                if token_list[0][:2] == "--" or token_list[0][:2] == "//" or token_list[0][:2] == "##":
-                    metaInfo.incLoc('comment')
+            # find trigger.
+            if metaInfo.indexPage['trigger']:
+                # look for CREATE [OR REPLACE] TRIGGER [schema.]trigger (...), making sure enough tokens exist
+                if len(token_list) > token_index+1 \
+                and token_list[token_index+1].upper() == "TRIGGER" \
+                and token_list[token_index].upper() in ['CREATE','REPLACE']:
+                    tab_info = StandAloneElemInfo()
+                    tab_info.parent = file_info
+                    if len(token_list) > token_index+2:
+                      tab_info.name = token_list[token_index+2]
+                    else:
+                      tab_info.name = token_list1[0]
+                    tab_info.name = fixQuotedName(tab_info.name)
+                    ElemInfoAppendJdoc(tab_info,'trigger',lineNumber+1,jdoc)
+                    file_info.triggerInfoList.append(tab_info)
                     continue
 
-            # ignore very short lines
-            if len(token_list)<2:
-                if len(token_list) > 0:
-                    if token_list[0][:2] != "/*" and token_list[0][:2] != "*/":
-                        continue
-                else:
-                    metaInfo.incLoc('empty')
+            # find tables.
+            if metaInfo.indexPage['tab']:
+                # look for CREATE [GLOBAL TEMPORARY] TABLE [schema.]table (...), making sure enough tokens exist
+                if len(token_list) > token_index+1 \
+                and token_list[token_index+1].upper() == "TABLE" \
+                and token_list[token_index].upper() in ['CREATE','TEMPORARY']:
+                    tab_info = StandAloneElemInfo()
+                    tab_info.parent = file_info
+                    if len(token_list) > token_index+2:
+                      tab_info.name = token_list[token_index+2]
+                    else:
+                      tab_info.name = token_list1[0]
+                    tab_info.name = fixQuotedName(tab_info.name)
+                    ElemInfoAppendJdoc(tab_info,'table',lineNumber+1,jdoc)
+                    file_info.tabInfoList.append(tab_info)
                     continue
 
-            # ignore block comments
-            if token_list[0][:2] == "/*" and token_list[0][len(token_list[0])-2:len(token_list[0])] == "*/":
-                # block comments like  "/***....*****/": re."/(\*)+/"
-                token_list.pop(0)
-            elif token_list[0][:2] == "/*" or in_block_comment == 1:
-                # 
-                in_block_comment = 1
-                clean_list = []
-                for token_index in range(len(token_list)):
-                    if token_list[token_index][:2] == "*/":
-                        clean_list.append(token_index)
-                        in_block_comment = 0
+            # find views
+            if metaInfo.indexPage['view']:
+                # look for CREATE VIEW, REPLACE VIEW, FORCE VIEW, making sure enough tokens exist
+                if len(token_list) > token_index+1 \
+                and token_list[token_index+1].upper() == "VIEW" \
+                and token_list[token_index].upper() in ['CREATE','REPLACE','FORCE','EDITIONABLE']:
+                    view_info = StandAloneElemInfo()
+                    view_info.parent = file_info
+                    if len(token_list) > token_index+2:
+                      view_info.name = token_list[token_index+2]
                     else:
-                        clean_list.append(token_index)
-                if len(clean_list) > 0:
-                    if len(clean_list) == 1:
-                        # pop only index 0
-                        token_list.pop(clean_list[0])
+                      view_info.name = token_list1[0]
+                    view_info.name = fixQuotedName(view_info.name)
+                    ElemInfoAppendJdoc(view_info,'view',lineNumber+1,jdoc)
+                    file_info.viewInfoList.append(view_info)
+                    continue
+
+            # find mviews.
+            if metaInfo.indexPage['mview']:
+                # CREATE MATERIALIZED VIEW [schema.]mview ...
+                if len(token_list) > token_index+2 \
+                and token_list[token_index+2].upper() == "VIEW" \
+                and token_list[token_index+1].upper() == "MATERIALIZED" \
+                and token_list[token_index].upper() == "CREATE":
+                    view_info = StandAloneElemInfo()
+                    view_info.parent = file_info
+                    if len(token_list) > token_index+3:
+                      view_info.name = token_list[token_index+3]
                     else:
-                        for clean_index in range(len(clean_list)-1,-1,-1):
-                            # work reverse from back
-                            token_list.pop(clean_list[clean_index])
-            if  len(token_list) == 0:
-                # nothing more on line
-                metaInfo.incLoc('comment') # we had just comments in this line (???)
-                continue
+                      view_info.name = token_list1[0]
+                    view_info.name = fixQuotedName(view_info.name)
+                    ElemInfoAppendJdoc(view_info,'mview',lineNumber+1,jdoc)
+                    file_info.mviewInfoList.append(view_info)
+                    continue
 
-            for token_index in range(len(token_list)):
-                # find types
-                if metaInfo.indexPage['type']:
-                    # look for CREATE [OR REPLACE] TYPE [schema.]trigger (...), making sure enough tokens exist
-                    if len(token_list) > token_index+1 \
-                    and token_list[token_index+1].upper() == "TYPE" \
-                    and token_list[token_index].upper() in ['CREATE','REPLACE']:
-                        tab_info = StandAloneElemInfo()
-                        tab_info.parent = file_info
-                        if len(token_list) > token_index+2:
-                          tab_info.name = token_list[token_index+2]
-                        else:
-                          tab_info.name = token_list1[0]
-                        tab_info.name = fixQuotedName(tab_info.name)
-                        ElemInfoAppendJdoc(tab_info,'type',lineNumber+1,jdoc)
-                        file_info.typeInfoList.append(tab_info)
-                        continue
-
-                # find trigger.
-                if metaInfo.indexPage['trigger']:
-                    # look for CREATE [OR REPLACE] TRIGGER [schema.]trigger (...), making sure enough tokens exist
-                    if len(token_list) > token_index+1 \
-                    and token_list[token_index+1].upper() == "TRIGGER" \
-                    and token_list[token_index].upper() in ['CREATE','REPLACE']:
-                        tab_info = StandAloneElemInfo()
-                        tab_info.parent = file_info
-                        if len(token_list) > token_index+2:
-                          tab_info.name = token_list[token_index+2]
-                        else:
-                          tab_info.name = token_list1[0]
-                        tab_info.name = fixQuotedName(tab_info.name)
-                        ElemInfoAppendJdoc(tab_info,'trigger',lineNumber+1,jdoc)
-                        file_info.triggerInfoList.append(tab_info)
-                        continue
-
-                # find tables.
-                if metaInfo.indexPage['tab']:
-                    # look for CREATE [GLOBAL TEMPORARY] TABLE [schema.]table (...), making sure enough tokens exist
-                    if len(token_list) > token_index+1 \
-                    and token_list[token_index+1].upper() == "TABLE" \
-                    and token_list[token_index].upper() in ['CREATE','TEMPORARY']:
-                        tab_info = StandAloneElemInfo()
-                        tab_info.parent = file_info
-                        if len(token_list) > token_index+2:
-                          tab_info.name = token_list[token_index+2]
-                        else:
-                          tab_info.name = token_list1[0]
-                        tab_info.name = fixQuotedName(tab_info.name)
-                        ElemInfoAppendJdoc(tab_info,'table',lineNumber+1,jdoc)
-                        file_info.tabInfoList.append(tab_info)
-                        continue
-
-                # find views
-                if metaInfo.indexPage['view']:
-                    # look for CREATE VIEW, REPLACE VIEW, FORCE VIEW, making sure enough tokens exist
-                    if len(token_list) > token_index+1 \
-                    and token_list[token_index+1].upper() == "VIEW" \
-                    and token_list[token_index].upper() in ['CREATE','REPLACE','FORCE','EDITIONABLE']:
-                        view_info = StandAloneElemInfo()
-                        view_info.parent = file_info
-                        if len(token_list) > token_index+2:
-                          view_info.name = token_list[token_index+2]
-                        else:
-                          view_info.name = token_list1[0]
-                        view_info.name = fixQuotedName(view_info.name)
-                        ElemInfoAppendJdoc(view_info,'view',lineNumber+1,jdoc)
-                        file_info.viewInfoList.append(view_info)
-                        continue
-
-                # find mviews.
-                if metaInfo.indexPage['mview']:
-                    # CREATE MATERIALIZED VIEW [schema.]mview ...
-                    if len(token_list) > token_index+2 \
-                    and token_list[token_index+2].upper() == "VIEW" \
-                    and token_list[token_index+1].upper() == "MATERIALIZED" \
-                    and token_list[token_index].upper() == "CREATE":
-                        view_info = StandAloneElemInfo()
-                        view_info.parent = file_info
-                        if len(token_list) > token_index+3:
-                          view_info.name = token_list[token_index+3]
-                        else:
-                          view_info.name = token_list1[0]
-                        view_info.name = fixQuotedName(view_info.name)
-                        ElemInfoAppendJdoc(view_info,'mview',lineNumber+1,jdoc)
-                        file_info.mviewInfoList.append(view_info)
-                        continue
-
-                # find synonym definitions
-                if metaInfo.indexPage['synonym']:
-                    # CREATE [OR REPLACE] [PUBLIC] SYNONYM [schema.]synonym FOR [schema.]object [@dblink]
-                    if len(token_list) > token_index+1 \
-                    and token_list[token_index+1].upper() == "SYNONYM" \
-                    and token_list[token_index].upper() in ['CREATE','REPLACE','PUBLIC'] \
-                    and not (token_list[token_index-1].upper()=="DROP" or (token_index>1 and token_list[token_index-2].upper()=="DROP")):
-                        syn_info = StandAloneElemInfo()
-                        syn_info.parent = file_info
-                        if len(token_list) > token_index+2:
-                            syn_info.name = token_list[token_index+2]
-                        else:
-                            syn_info.name = token_list1[0]
-                        syn_info.name = fixQuotedName(syn_info.name)
-                        ElemInfoAppendJdoc(syn_info,'synonym',lineNumber+1,jdoc)
-                        file_info.synInfoList.append(syn_info)
-                        continue
-
-                # find sequence definitions
-                if metaInfo.indexPage['sequence']:
-                    # CREATE SEQUENCE [schema.]sequence_name option(s)
-                    if len(token_list) > token_index+1 \
-                    and token_list[token_index+1].upper() == "SEQUENCE" \
-                    and (token_list[token_index].upper() == "CREATE"):
-                        seq_info = StandAloneElemInfo()
-                        seq_info.parent = file_info
-                        if len(token_list) > token_index+2:
-                            seq_info.name = token_list[token_index+2]
-                        else:
-                            seq_info.name = token_list1[0]
-                        seq_info.name = fixQuotedName(seq_info.name)
-                        ElemInfoAppendJdoc(seq_info,'sequence',lineNumber+1,jdoc)
-                        file_info.seqInfoList.append(seq_info)
-                        continue
-
-            # find package definitions - set flag if found
-            # look for CREATE [OR REPLACE] PACKAGE BODY x, making sure enough tokens exist
-            for token_index in range(len(token_list)):
-                if len(token_list) > token_index+3 \
-                   and token_list[token_index].upper() in ['CREATE','REPLACE','FORCE'] \
-                       and token_list[token_index+1].upper() == "PACKAGE":
-                    if token_list[token_index+2].upper() == "BODY":
-                      package_info = PackageInfo()
-                      package_info.uniqueNumber = metaInfo.NextIndex()
-                      package_info.parent = file_info
-                      package_info.name = fixQuotedName(token_list[token_index+3])
-                      package_info.lineNumber = lineNumber+1
-                      for j in range(len(jdoc)):
-                        ln = jdoc[j].lineNumber - lineNumber
-                        if (package_info.name.lower()==jdoc[j].name.lower() and jdoc[j].objectType=='pkg') or (ln>0 and ln<metaInfo.blindOffset) or (ln<0 and ln>-1*metaInfo.blindOffset):
-                          package_info.javadoc = jdoc[j]
-                      if not package_info.javadoc.ignore: # ignore items with @ignore tag
-                          pi = package_info
-                          jd = pi.javadoc
-                          appendGlobalTasks('pkg',pi,jd,pi.uniqueNumber)
-                          mname = jd.name or pi.name
-                          mands = jd.verify_mandatory()
-                          for mand in mands:
-                            pi.verification.addItem(mname,mand)
-                          if JavaDocVars['javadoc_mandatory'] and package_info.javadoc.isDefault() and 'pkg' in JavaDocVars['javadoc_mandatory_objects']:
-                            logger.warn(_('Package %s has no JavaDoc information attached'), mname)
-                            pi.verification.addItem(mname,'No JavaDoc information available')
-                          file_info.packageInfoList.append(pi) # permanent storage
-                          package_count += 1 # use this flag below
+            # find synonym definitions
+            if metaInfo.indexPage['synonym']:
+                # CREATE [OR REPLACE] [PUBLIC] SYNONYM [schema.]synonym FOR [schema.]object [@dblink]
+                if len(token_list) > token_index+1 \
+                and token_list[token_index+1].upper() == "SYNONYM" \
+                and token_list[token_index].upper() in ['CREATE','REPLACE','PUBLIC'] \
+                and not (token_list[token_index-1].upper()=="DROP" or (token_index>1 and token_list[token_index-2].upper()=="DROP")):
+                    syn_info = StandAloneElemInfo()
+                    syn_info.parent = file_info
+                    if len(token_list) > token_index+2:
+                        syn_info.name = token_list[token_index+2]
                     else:
-                        pks_count +=1
-
-            if pks_count == -1: # ignore functions/procedures in package specifications
-              # find functions
-              for token_index in range(len(token_list)):
-                if token_list[token_index].upper() == 'FUNCTION' \
-                and (package_count != -1 or (token_index>0 and token_list[token_index-1].upper() in ['CREATE','REPLACE'])):
-                  if len(token_list)>token_index+1: function_name = token_list[token_index+1]
-                  else: function_name = token_list1[0]
-                  function_name = function_name.split('(')[0] # some are "name(" and some are "name ("
-                  if package_count != -1: function_info = ElemInfo()
-                  else: function_info = StandAloneElemInfo()
-                  function_info.uniqueNumber = metaInfo.NextIndex()
-                  if package_count != -1:
-                    function_info.parent = file_info.packageInfoList[package_count]
-                  else:
-                    function_info.parent = file_info
-                  function_info.name = fixQuotedName(function_name)
-                  function_info.lineNumber = lineNumber+1
-                  for j in range(len(jdoc)):
-                    ln = jdoc[j].lineNumber - lineNumber
-                    if (function_name.lower()==jdoc[j].name.lower() and jdoc[j].objectType=='function') or (ln>0 and ln<metaInfo.blindOffset) or (ln<0 and ln>-1*metaInfo.blindOffset):
-                      if function_info.javadoc.isDefault():
-                        function_info.javadoc = jdoc[j]
-                        function_info.javadoc.lndiff = abs(ln)
-                      else:
-                        if abs(ln) < function_info.javadoc.lndiff: # this desc is closer to the object
-                          function_info.javadoc = jdoc[j]
-                          function_info.javadoc.lndiff = abs(ln)
-                  fi = function_info
-                  jd = fi.javadoc
-                  mname = jd.name or fi.name
-                  mands = jd.verify_mandatory()
-                  if JavaDocVars['verification']:
-                    fupatt = re.compile('(?ims)function\s+'+mname+'\s*\((.*?)\)\s*return')
-                    cparms = re.findall(fupatt,filetextnoc)
-                  if not function_info.javadoc.ignore and package_count != -1: # Package.Function
-                    appendGlobalTasks('func',file_info.packageInfoList[package_count],jd,fi.uniqueNumber)
-                    for mand in mands:
-                        file_info.packageInfoList[package_count].verification.addFunc(mname,mand,jd.author,fi.uniqueNumber)
-                    if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'func' in JavaDocVars['javadoc_mandatory_objects']:
-                        if JavaDocVars['verification_log']: logger.warn(_('Function %(function)s in package %(package)s has no JavaDoc information attached'), {'function': mname, 'package': file_info.packageInfoList[package_count].name})
-                        file_info.packageInfoList[package_count].verification.addFunc(mname,_('No JavaDoc information available'),jd.author,fi.uniqueNumber)
-                    if JavaDocVars['verification']:
-                        if len(cparms)==0:
-                            mands = jd.verify_params([])
-                        elif len(cparms)==1:
-                            cparms = cparms[0].split(',')
-                            mands = jd.verify_params(cparms)
-                        else:
-                            if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for function %(package)s.%(function)s, parameters not verified'), {'package': file_info.packageInfoList[package_count].name, 'function': mname})
-                        if len(cparms)<200: # 2016-07-18: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
-                            for mand in mands:
-                                file_info.packageInfoList[package_count].verification.addFunc(mname,mand,jd.author,fi.uniqueNumber)
-                  else: # StandAlone function
-                    for mand in mands:
-                        function_info.verification.addItem(mname,mand,jd.author,fi.uniqueNumber)
-                    if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'func' in JavaDocVars['javadoc_mandatory_objects']:
-                        if JavaDocVars['verification_log']: logger.warn(_('StandAlone Function %(function)s has no JavaDoc information attached'), {'function': mname})
-                        function_info.verification.addItem(mname,_('No JavaDoc information available'),jd.author,fi.uniqueNumber)
-                    if JavaDocVars['verification']:
-                        if len(cparms)==0:
-                            mands = jd.verify_params([])
-                        elif len(cparms)==1:
-                            cparms = cparms[0].split(',')
-                            mands = jd.verify_params(cparms)
-                        else:
-                            if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for stand-alone function %(function)s, parameters not verified'), {'function': mname})
-                        if len(cparms)<200: # 2016-07-18: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
-                            for mand in mands:
-                                function_info.verification.addItem(mname,mand,jd.author,fi.uniqueNumber)
-                  if package_count != -1:
-                    if not function_info.javadoc.ignore: file_info.packageInfoList[package_count].functionInfoList.append(function_info)
-                  else:
-                    if not function_info.javadoc.ignore: file_info.functionInfoList.append(function_info)
-
-              # find procedures
-              for token_index in range(len(token_list)):
-                if token_list[token_index].upper() == 'PROCEDURE' \
-                and (package_count != -1 or (token_index>0 and token_list[token_index-1].upper() in ['CREATE','REPLACE'])):
-                  if len(token_list)>token_index+1: procedure_name = token_list[token_index+1]
-                  else: procedure_name = token_list1[0]
-                  procedure_name = procedure_name.split('(')[0] # some are "name(" and some are "name ("
-                  if package_count == -1: procedure_info = StandAloneElemInfo()
-                  else: procedure_info = ElemInfo()
-                  procedure_info.uniqueNumber = metaInfo.NextIndex()
-                  if package_count != -1:
-                    procedure_info.parent = file_info.packageInfoList[package_count]
+                        syn_info.name = token_list1[0]
+                    syn_info.name = fixQuotedName(syn_info.name)
+                    ElemInfoAppendJdoc(syn_info,'synonym',lineNumber+1,jdoc)
+                    file_info.synInfoList.append(syn_info)
+                    continue
+
+            # find sequence definitions
+            if metaInfo.indexPage['sequence']:
+                # CREATE SEQUENCE [schema.]sequence_name option(s)
+                if len(token_list) > token_index+1 \
+                and token_list[token_index+1].upper() == "SEQUENCE" \
+                and (token_list[token_index].upper() == "CREATE"):
+                    seq_info = StandAloneElemInfo()
+                    seq_info.parent = file_info
+                    if len(token_list) > token_index+2:
+                        seq_info.name = token_list[token_index+2]
+                    else:
+                        seq_info.name = token_list1[0]
+                    seq_info.name = fixQuotedName(seq_info.name)
+                    ElemInfoAppendJdoc(seq_info,'sequence',lineNumber+1,jdoc)
+                    file_info.seqInfoList.append(seq_info)
+                    continue
+
+        # find package definitions - set flag if found
+        # look for CREATE [OR REPLACE] PACKAGE BODY x, making sure enough tokens exist
+        for token_index in range(len(token_list)):
+            if len(token_list) > token_index+3 \
+               and token_list[token_index].upper() in ['CREATE','REPLACE','FORCE'] \
+                   and token_list[token_index+1].upper() == "PACKAGE":
+                if token_list[token_index+2].upper() == "BODY":
+                  package_info = PackageInfo()
+                  package_info.uniqueNumber = metaInfo.NextIndex()
+                  package_info.parent = file_info
+                  package_info.name = fixQuotedName(token_list[token_index+3])
+                  package_info.lineNumber = lineNumber+1
+                  for ln, jd in jdoc.candidates(package_info.name,'pkg',lineNumber):
+                      package_info.javadoc = jd
+                  if not package_info.javadoc.ignore: # ignore items with @ignore tag
+                      pi = package_info
+                      jd = pi.javadoc
+                      appendGlobalTasks('pkg',pi,jd,pi.uniqueNumber)
+                      mname = jd.name or pi.name
+                      mands = jd.verify_mandatory()
+                      for mand in mands:
+                        pi.verification.addItem(mname,mand)
+                      if JavaDocVars['javadoc_mandatory'] and package_info.javadoc.isDefault() and 'pkg' in JavaDocVars['javadoc_mandatory_objects']:
+                        logger.warn(_('Package %s has no JavaDoc information attached'), mname)
+                        pi.verification.addItem(mname,'No JavaDoc information available')
+                      file_info.packageInfoList.append(pi) # permanent storage
+                      package_count = len(file_info.packageInfoList)-1 # use this flag below
+                else:
+                    pks_count +=1
+
+        if pks_count == -1: # ignore functions/procedures in package specifications
+          # find functions
+          for token_index in range(len(token_list)):
+            if token_list[token_index].upper() == 'FUNCTION' \
+            and (package_count != -1 or (token_index>0 and token_list[token_index-1].upper() in ['CREATE','REPLACE'])):
+              if len(token_list)>token_index+1: function_name = token_list[token_index+1]
+              else: function_name = token_list1[0]
+              function_name = function_name.split('(')[0] # some are "name(" and some are "name ("
+              if package_count != -1: function_info = ElemInfo()
+              else: function_info = StandAloneElemInfo()
+              function_info.uniqueNumber = metaInfo.NextIndex()
+              if package_count != -1:
+                function_info.parent = file_info.packageInfoList[package_count]
+              else:
+                function_info.parent = file_info
+              function_info.name = fixQuotedName(function_name)
+              function_info.lineNumber = lineNumber+1
+              for ln, jd in jdoc.candidates(function_name,'function',lineNumber):
+                  if function_info.javadoc.isDefault():
+                    function_info.javadoc = jd
+                    function_info.javadoc.lndiff = abs(ln)
                   else:
-                    procedure_info.parent = file_info
-                  procedure_info.name = fixQuotedName(procedure_name)
-                  procedure_info.lineNumber = lineNumber+1
-                  for j in range(len(jdoc)):
-                    ln = jdoc[j].lineNumber - lineNumber
-                    if (procedure_name.lower()==jdoc[j].name.lower() and jdoc[j].objectType=='procedure') or (ln>0 and ln<metaInfo.blindOffset) or (ln<0 and ln>-1*metaInfo.blindOffset):
-                      if procedure_info.javadoc.isDefault():
-                        procedure_info.javadoc = jdoc[j]
-                        procedure_info.javadoc.lndiff = abs(ln)
-                      else:
-                        if abs(ln) < procedure_info.javadoc.lndiff: # this desc is closer to the object
-                          procedure_info.javadoc = jdoc[j]
-                          procedure_info.javadoc.lndiff = abs(ln)
-                  pi = procedure_info
-                  jd = pi.javadoc
-                  mname = jd.name or pi.name
-                  mands = jd.verify_mandatory()
-                  if JavaDocVars['verification']:
-                    fupatt = re.compile('(?ims)procedure\s+'+mname+'\s*\((.*?)\)\s*[ia]s')
-                    cparms = re.findall(fupatt,filetextnoc)
-                  if not procedure_info.javadoc.ignore and package_count != -1: # Package.Procedure
-                    appendGlobalTasks('proc',file_info.packageInfoList[package_count],jd,pi.uniqueNumber)
-                    for mand in mands:
-                        file_info.packageInfoList[package_count].verification.addProc(mname,mand,jd.author,pi.uniqueNumber)
-                    if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'proc' in JavaDocVars['javadoc_mandatory_objects']:
-                        if JavaDocVars['verification_log']: logger.warn(_('Procedure %(procedure)s in package %(package)s has no JavaDoc information attached'), {'procedure': mname, 'package': file_info.packageInfoList[package_count].name})
-                        file_info.packageInfoList[package_count].verification.addProc(mname,_('No JavaDoc information available'),jd.author,pi.uniqueNumber)
-                    if JavaDocVars['verification']:
-                        if len(cparms)==0:
-                            mands = jd.verify_params([])
-                        elif len(cparms)==1:
-                            cparms = cparms[0].split(',')
-                            mands = jd.verify_params(cparms)
-                        else:
-                            if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for procedure %(package)s.%(function)s, parameters not verified'), {'function': mname, 'package': file_info.packageInfoList[package_count].name})
-                        if len(cparms)<200: # 2016-03-16: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
-                            for mand in mands:
-                                file_info.packageInfoList[package_count].verification.addProc(mname,mand,jd.author,pi.uniqueNumber)
-                  else: # StandAlone procedure
-                    for mand in mands:
-                        procedure_info.verification.addItem(mname,mand,jd.author,pi.uniqueNumber)
-                    if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'proc' in JavaDocVars['javadoc_mandatory_objects']:
-                        if JavaDocVars['verification_log']: logger.warn(_('StandAlone Procedure %(procedure)s has no JavaDoc information attached'), {'procedure': mname})
-                        procedure_info.verification.addItem(mname,_('No JavaDoc information available'),jd.author,pi.uniqueNumber)
-                    if JavaDocVars['verification']:
-                        if len(cparms)==0:
-                            mands = jd.verify_params([])
-                        elif len(cparms)==1:
-                            cparms = cparms[0].split(',')
-                            mands = jd.verify_params(cparms)
-                        else:
-                            if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for stand-alone procedure %(function)s, parameters not verified'), {'function': mname})
-                        if len(cparms)<200: # 2016-03-16: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
-                            for mand in mands:
-                                procedure_info.verification.addItem(mname,mand,jd.author,pi.uniqueNumber)
-                  if package_count != -1:
-                    if not procedure_info.javadoc.ignore: file_info.packageInfoList[package_count].procedureInfoList.append(procedure_info)
+                    if abs(ln) < function_info.javadoc.lndiff: # this desc is closer to the object
+                      function_info.javadoc = jd
+                      function_info.javadoc.lndiff = abs(ln)
+              fi = function_info
+              jd = fi.javadoc
+              mname = jd.name or fi.name
+              mands = jd.verify_mandatory()
+              if JavaDocVars['verification']:
+                cparms = routineParams(signatures,'function',mname)
+              if not function_info.javadoc.ignore and package_count != -1: # Package.Function
+                appendGlobalTasks('func',file_info.packageInfoList[package_count],jd,fi.uniqueNumber)
+                for mand in mands:
+                    file_info.packageInfoList[package_count].verification.addFunc(mname,mand,jd.author,fi.uniqueNumber)
+                if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'func' in JavaDocVars['javadoc_mandatory_objects']:
+                    if JavaDocVars['verification_log']: logger.warn(_('Function %(function)s in package %(package)s has no JavaDoc information attached'), {'function': mname, 'package': file_info.packageInfoList[package_count].name})
+                    file_info.packageInfoList[package_count].verification.addFunc(mname,_('No JavaDoc information available'),jd.author,fi.uniqueNumber)
+                if JavaDocVars['verification']:
+                    if len(cparms)==0:
+                        mands = jd.verify_params([])
+                    elif len(cparms)==1:
+                        cparms = cparms[0].split(',')
+                        mands = jd.verify_params(cparms)
+                    else:
+                        if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for function %(package)s.%(function)s, parameters not verified'), {'package': file_info.packageInfoList[package_count].name, 'function': mname})
+                    if len(cparms)<200: # 2016-07-18: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
+                        for mand in mands:
+                            file_info.packageInfoList[package_count].verification.addFunc(mname,mand,jd.author,fi.uniqueNumber)
+              else: # StandAlone function
+                for mand in mands:
+                    function_info.verification.addItem(mname,mand,jd.author,fi.uniqueNumber)
+                if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'func' in JavaDocVars['javadoc_mandatory_objects']:
+                    if JavaDocVars['verification_log']: logger.warn(_('StandAlone Function %(function)s has no JavaDoc information attached'), {'function': mname})
+                    function_info.verification.addItem(mname,_('No JavaDoc information available'),jd.author,fi.uniqueNumber)
+                if JavaDocVars['verification']:
+                    if len(cparms)==0:
+                        mands = jd.verify_params([])
+                    elif len(cparms)==1:
+                        cparms = cparms[0].split(',')
+                        mands = jd.verify_params(cparms)
+                    else:
+                        if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for stand-alone function %(function)s, parameters not verified'), {'function': mname})
+                    if len(cparms)<200: # 2016-07-18: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
+                        for mand in mands:
+                            function_info.verification.addItem(mname,mand,jd.author,fi.uniqueNumber)
+              if package_count != -1:
+                if not function_info.javadoc.ignore: file_info.packageInfoList[package_count].functionInfoList.append(function_info)
+              else:
+                if not function_info.javadoc.ignore: file_info.functionInfoList.append(function_info)
+
+          # find procedures
+          for token_index in range(len(token_list)):
+            if token_list[token_index].upper() == 'PROCEDURE' \
+            and (package_count != -1 or (token_index>0 and token_list[token_index-1].upper() in ['CREATE','REPLACE'])):
+              if len(token_list)>token_index+1: procedure_name = token_list[token_index+1]
+              else: procedure_name = token_list1[0]
+              procedure_name = procedure_name.split('(')[0] # some are "name(" and some are "name ("
+              if package_count == -1: procedure_info = StandAloneElemInfo()
+              else: procedure_info = ElemInfo()
+              procedure_info.uniqueNumber = metaInfo.NextIndex()
+              if package_count != -1:
+                procedure_info.parent = file_info.packageInfoList[package_count]
+              else:
+                procedure_info.parent = file_info
+              procedure_info.name = fixQuotedName(procedure_name)
+              procedure_info.lineNumber = lineNumber+1
+              for ln, jd in jdoc.candidates(procedure_name,'procedure',lineNumber):
+                  if procedure_info.javadoc.isDefault():
+                    procedure_info.javadoc = jd
+                    procedure_info.javadoc.lndiff = abs(ln)
                   else:
-                    if not procedure_info.javadoc.ignore: file_info.procedureInfoList.append(procedure_info)
+                    if abs(ln) < procedure_info.javadoc.lndiff: # this desc is closer to the object
+                      procedure_info.javadoc = jd
+                      procedure_info.javadoc.lndiff = abs(ln)
+              pi = procedure_info
+              jd = pi.javadoc
+              mname = jd.name or pi.name
+              mands = jd.verify_mandatory()
+              if JavaDocVars['verification']:
+                cparms = routineParams(signatures,'procedure',mname)
+              if not procedure_info.javadoc.ignore and package_count != -1: # Package.Procedure
+                appendGlobalTasks('proc',file_info.packageInfoList[package_count],jd,pi.uniqueNumber)
+                for mand in mands:
+                    file_info.packageInfoList[package_count].verification.addProc(mname,mand,jd.author,pi.uniqueNumber)
+                if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'proc' in JavaDocVars['javadoc_mandatory_objects']:
+                    if JavaDocVars['verification_log']: logger.warn(_('Procedure %(procedure)s in package %(package)s has no JavaDoc information attached'), {'procedure': mname, 'package': file_info.packageInfoList[package_count].name})
+                    file_info.packageInfoList[package_count].verification.addProc(mname,_('No JavaDoc information available'),jd.author,pi.uniqueNumber)
+                if JavaDocVars['verification']:
+                    if len(cparms)==0:
+                        mands = jd.verify_params([])
+                    elif len(cparms)==1:
+                        cparms = cparms[0].split(',')
+                        mands = jd.verify_params(cparms)
+                    else:
+                        if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for procedure %(package)s.%(function)s, parameters not verified'), {'function': mname, 'package': file_info.packageInfoList[package_count].name})
+                    if len(cparms)<200: # 2016-03-16: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
+                        for mand in mands:
+                            file_info.packageInfoList[package_count].verification.addProc(mname,mand,jd.author,pi.uniqueNumber)
+              else: # StandAlone procedure
+                for mand in mands:
+                    procedure_info.verification.addItem(mname,mand,jd.author,pi.uniqueNumber)
+                if JavaDocVars['javadoc_mandatory'] and jd.isDefault() and 'proc' in JavaDocVars['javadoc_mandatory_objects']:
+                    if JavaDocVars['verification_log']: logger.warn(_('StandAlone Procedure %(procedure)s has no JavaDoc information attached'), {'procedure': mname})
+                    procedure_info.verification.addItem(mname,_('No JavaDoc information available'),jd.author,pi.uniqueNumber)
+                if JavaDocVars['verification']:
+                    if len(cparms)==0:
+                        mands = jd.verify_params([])
+                    elif len(cparms)==1:
+                        cparms = cparms[0].split(',')
+                        mands = jd.verify_params(cparms)
+                    else:
+                        if JavaDocVars['verification_log']: logger.debug(_('Multiple definitions for stand-alone procedure %(function)s, parameters not verified'), {'function': mname})
+                    if len(cparms)<200: # 2016-03-16: With its initial commit (1e0ecb5 on 2010-03-15), this was limited to "<2" parameters. Why is this relevant here?
+                        for mand in mands:
+                            procedure_info.verification.addItem(mname,mand,jd.author,pi.uniqueNumber)
+              if package_count != -1:
+                if not procedure_info.javadoc.ignore: file_info.packageInfoList[package_count].procedureInfoList.append(procedure_info)
+              else:
+                if not procedure_info.javadoc.ignore: file_info.procedureInfoList.append(procedure_info)
+
+    if codefile is not None:
+        code.close()
+        codefile.close()
+
+
+#------------------------------------------------------------------------------
+def routineSignatures(code):
+    """
+    Find the parameter lists of all functions and procedures defined in the
+    code with a single pass (for the JavaDoc verification). A definition is
+    "FUNCTION name (params) RETURN" resp. "PROCEDURE name (params) IS|AS"; as
+    before, definitions of the same routine do not overlap.
+    @param mixed code the code to search: string, or mmap of the (utf-8 encoded)
+           code of a large file (see streamCode)
+    @return dict signatures (otype, lower-cased name) -> list of strings (the
+            parameter lists, one per definition found)
+    """
+    signatures = {}
+    lastEnd = {}
+    for m in sigHeadPatt.finditer(code):
+        otype = m.group(1).lower()
+        key = (otype, m.group(2).lower())
+        if lastEnd.get(key,-1) > m.start(): continue
+        tail = sigTailPatt[otype].match(code,m.end())
+        if tail is None: continue
+        lastEnd[key] = tail.end()
+        signatures.setdefault(key,[]).append(tail.group(1))
+    return signatures
+
+
+#------------------------------------------------------------------------------
+def routineParams(signatures,otype,name):
+    """
+    Get the parameter lists of a function or procedure from the signatures
+    @param dict signatures as returned by routineSignatures
+    @param string otype 'function' or 'procedure'
+    @param string name name of the function or procedure
+    @return list of strings, one per definition found
+    """
+    key = (otype,name.lower())
+    if key not in signatures and isinstance(name,unicode): # from an mmap (utf-8)?
+        key = (otype,name.encode('utf-8').lower())
+    return signatures.get(key,[])
+
+
+#------------------------------------------------------------------------------
+def streamCode(file_info,infile,codefile,chunkSize):
+    """
+    Strip comments and strings from a (large) file chunk by chunk, as
+    ScanFileForObjects does it for the complete text of smaller files: JavaDoc
+    and LOC statistics are collected, and the code is written to codefile. Each
+    chunk is processed up to the last line not starting inside a comment,
+    string or JavaDoc block; the remaining lines are carried over to the next
+    chunk. This keeps memory usage bounded while giving the same results.
+    @param object file_info FileInfo object of the file (its lines are counted)
+    @param object infile file handle to read from (as returned by fopen)
+    @param object codefile (binary) file to write the code to, one line per source line
+    @param int chunkSize (approximate) size of the chunks to process
+    @return list jdoc JavaDoc objects found (empty if JavaDoc is not used)
+    @return boolean decode whether the code was utf-8 encoded from unicode
+    """
+    jdoc   = []
+    decode = False
+    lines  = []       # lines of the current chunk (incl. those carried over)
+    size   = 0        # size of the current chunk
+    limit  = chunkSize
+    jdocLines = 0     # line breaks seen by ScanJavaDoc so far
+    file_info.lines = 0
+    eof = False
+    while not eof:
+        line = infile.readline()
+        if line:
+            lines.append(line)
+            size += len(line)
+            if size < limit: continue
+        else:
+            eof = True
+            if not lines: break
+        text = joinLines(lines)
+        if eof:
+            keep = len(lines)
+        else:
+            # split before the last line (we need it as look-ahead anyway),
+            # or before the first line of a token crossing that border
+            spans = multiLineTokens(text)
+            if metaInfo.useJavaDoc:
+                starts = [0]
+                for l in lines: starts.append(starts[-1]+len(l))
+                raw = ''.join(lines)
+                end = 0
+                for m in jdocBlockPatt.finditer(raw):
+                    spans.append((bisect_right(starts,m.start())-1, bisect_right(starts,m.end()-1)-1))
+                    end = m.end()
+                pos = raw.find('/**',end) # not terminated in this chunk
+                if pos != -1: spans.append((bisect_right(starts,pos)-1, len(lines)-1))
+            keep = len(lines) - 1
+            changed = True
+            while changed:
+                changed = False
+                for first, last in spans:
+                    if first < keep <= last:
+                        keep = first
+                        changed = True
+            if keep == 0: # a single token filling the whole chunk: get more lines
+                limit = size + chunkSize
+                continue
+            text = joinLines(lines[:keep])
+        if metaInfo.useJavaDoc:
+            raw = ''.join(lines[:keep])
+            jdoc += ScanJavaDoc(raw, file_info.fileName, 0, jdocLines)
+            jdocLines += raw.count('\n')
+        code, markedLines = splitCode(text)
+        if eof: stats = lineStats(code, markedLines)
+        else: stats = lineStats(code + '\n', markedLines) # the chunk was cut after a line break
+        for what in ['code','comment','empty']:
+            metaInfo.incLoc(what,stats[what])
+        metaInfo.incLoc('totals',keep)
+        if isinstance(code,unicode):
+            code = code.encode('utf-8')
+            decode = True
+        codefile.write(code + '\n')
+        file_info.lines += keep
+        lines = lines[keep:]
+        size  = sum([len(l) for l in lines])
+        limit = max(chunkSize, 2*size)
+    return jdoc, decode
+
+
+#------------------------------------------------------------------------------
+def readCodeLines(codefile,decode):
+    """
+    Read the code lines written by streamCode
+    @param object codefile file the code was written to
+    @param boolean decode whether to decode the lines from utf-8
+    @return generator yielding the lines (without line breaks)
+    """
+    for line in codefile:
+        if decode: yield line[:-1].decode('utf-8')
+        else: yield line[:-1]
+
+
+#------------------------------------------------------------------------------
+def scanSignature():
+    """
+    Get a signature of the settings the results of the object scan depend on.
+    Cached results are only valid for the same signature.
+    @return string signature
+    """
+    # the first element is the format version of the cached data
+    # (the messages stored with the objects are translated already)
+    sig = repr(( 7, langs, metaInfo.encoding, metaInfo.useJavaDoc, metaInfo.blindOffset,
+                 sorted(metaInfo.indexPage.items()), sorted(JavaDocVars.items()), formMarks() ))
+    return md5(sig).hexdigest()
+
+
+#------------------------------------------------------------------------------
+def ScanFileWorker(idx):
+    """
+    Scan metaInfo.fileInfoList[idx] with own counters - used by the worker
+    processes of the parallel object scan (which inherited metaInfo from the
+    main process), and for the incremental scan. If a cache is set up with
+    objectScanData, results for unchanged files are taken from there (and
+    new results are stored) - for Oracle Forms, this includes the FormInfo
+    tree, so the XML need not be parsed again.
+    @param int idx index of the file in metaInfo.fileInfoList
+    @return tuple (object file_info, int indexCount, dict linesOfCode) - the
+            scanned FileInfo, number of NextIndex() calls and LOC for this file
+    """
+    file_info = metaInfo.fileInfoList[idx]
+    cache = objectScanData.get('cache')
+    if cache is not None and file_info.fileType in ['sql','xml']:
+        if file_info.fileType == 'xml' and metaInfo.indexPage['form'] != '' \
+           and not cache.check(file_info.fileName,'formcode'):
+            pass # the code of the form is needed later on, so parse it again
+        elif cache.check(file_info.fileName,'scan'):
+            cached = cache.getObj(file_info.fileName,'scan',0)
+            if cached and cached[0] == objectScanData['signature']:
+                cinfo = cached[1]
+                cinfo.uniqueNumber = file_info.uniqueNumber
+                cinfo.uniqueName   = file_info.uniqueName
+                return cinfo, cached[2], cached[3]
+    else:
+        cache = None
+    counter = metaInfo.indexForWhereUsedFiles
+    loc = metaInfo.linesOfCode
+    metaInfo.indexForWhereUsedFiles = 0
+    metaInfo.linesOfCode = dict.fromkeys(loc.keys(),0)
+    if cache is not None: cache.remember(file_info.fileName) # the state the results derive from
+    ScanFileForObjects(file_info)
+    res = (file_info, metaInfo.indexForWhereUsedFiles, metaInfo.linesOfCode)
+    metaInfo.indexForWhereUsedFiles = counter
+    metaInfo.linesOfCode = loc
+    if cache is not None:
+        try:
+            cache.putObj(file_info.fileName,'scan',(objectScanData['signature'],)+res)
+        except Exception, e:
+            logger.warn(_('Could not cache the scan results for %(file)s: %(err)s'), {'file':file_info.fileName, 'err':e})
+    return res
+
+
+#------------------------------------------------------------------------------
+def ScanFileTask(idx):
+    """
+    ScanFileWorker as run by the worker processes of the parallel object scan.
+    If the cache is used, the JavaDoc blocks the worker parsed are passed back
+    as well, so they can be stored with the block memo of the main process -
+    and so is the code of a form it parsed, for the FormCodeStore, and the
+    stamp the file was read with (so later phases need not fingerprint it again).
+    @param int idx index of the file in metaInfo.fileInfoList
+    @return tuple (int idx, tuple result of ScanFileWorker, dict blocks as
+            returned by takeBlocks, string formcode or None, tuple stamp or None)
+    """
+    res = ScanFileWorker(idx)
+    code = metaInfo.formCode.peek(res[0].fileName)
+    if objectScanData['cache'] is None: return idx, res, {}, code, None
+    return idx, res, takeBlocks(), code, hypercore.cache.stamps.get(res[0].fileName)
+
+
+#------------------------------------------------------------------------------
+def mergeScanResult(idx,file_info,indexCount,loc):
+    """
+    Merge the result of ScanFileWorker into metaInfo. The worker numbered the
+    objects of its file starting with 1 - so we shift those numbers by the
+    index counter of the main process, which gives the same uniqueNumbers
+    (and anchor names) as a serial scan would have done.
+    @param int idx index of the file in metaInfo.fileInfoList
+    @param object file_info FileInfo object as returned by the worker
+    @param int indexCount number of NextIndex() calls done by the worker
+    @param dict loc linesOfCode collected by the worker
+    """
+    offset = metaInfo.indexForWhereUsedFiles
+    seen = set()
+    def renumTasks(tlist):
+        if tlist is None or id(tlist) in seen: return
+        seen.add(id(tlist))
+        for item in tlist.items + getattr(tlist,'funcs',[]) + getattr(tlist,'procs',[]):
+            if id(item) in seen: continue
+            seen.add(id(item))
+            if item.uid: item.uid += offset
+        for sub in getattr(tlist,'pkgs',[]): renumTasks(sub)
+    def renumElem(elem):
+        if id(elem) in seen: return
+        seen.add(id(elem))
+        if elem.uniqueNumber: elem.uniqueNumber += offset
+        for attr in ['bugs','todo','verification']:
+            renumTasks(getattr(elem,attr,None))
+        for attr in ['packageInfoList','functionInfoList','procedureInfoList','triggerInfoList']:
+            for sub in getattr(elem,attr,[]): renumElem(sub)
+    for attr in ['viewInfoList','mviewInfoList','tabInfoList','synInfoList','seqInfoList','typeInfoList',
+                 'triggerInfoList','functionInfoList','procedureInfoList','packageInfoList','formInfoList']:
+        for elem in getattr(file_info,attr): renumElem(elem)
+    anchors = {}
+    for uid, anchor in file_info.anchorNames.items():
+        renumElem(anchor[1])
+        anchors[uid + offset] = anchor
+    file_info.anchorNames = anchors
+    metaInfo.indexForWhereUsedFiles += indexCount
+    for key in loc.keys(): metaInfo.linesOfCode[key] += loc[key]
+    metaInfo.fileInfoList[idx] = file_info
+
+
+#------------------------------------------------------------------------------
+def ScanFilesForObjects():
+    """
+    Scans files from metaInfo.fileInfoList for views and packages and collects
+    some metadata about them (name, file, lineno). When encountering a package
+    spec, it also scans for its functions and procedures.
+    It simply searches the source file for keywords. With each object info,
+    file name and line number are stored (and can be used to identify parent
+    and children) - for functions and procedures contained in packages, a link
+    to their parent is stored along.
+    """
+    pbarInit(_("Scanning source files for views and packages"),0,len(metaInfo.fileInfoList), logname)
+
+    if metaInfo.indexPage['form'] and not OraForm:
+        logger.error(_('Cannot process Oracle Forms XML files - SAX API (pyxml) seems to be unavailable.'))
+
+    # skip all non-sql files
+    todo = [i for i in range(len(metaInfo.fileInfoList)) if metaInfo.fileInfoList[i].fileType in ['sql','xml']]
+
+    # results for unchanged files are taken from the cache - as are the
+    # JavaDoc blocks parsed with the last run
+    if metaInfo.useCache:
+        cache = objectScanData['cache'] = hypercore.cache.cache(metaInfo.cacheDirectory)
+        objectScanData['signature'] = scanSignature()
+        if metaInfo.useJavaDoc:
+            memo = cache.getData('javadoc')
+            if memo and memo[0] == blockMemoSignature(): setBlockMemo(memo[1])
+    else:
+        cache = objectScanData['cache'] = None
+
+    # the code extracted from Oracle Forms, for the later phases
+    metaInfo.formCode = hypercore.cache.FormCodeStore(metaInfo.formCodeMemory, cache, loadFormCode)
+
+    jobs = getJobs(metaInfo.jobs, len(todo))
+    if jobs > 1:
+        # scan in worker processes; results are merged back in file order
+        pool = multiprocessing.Pool(jobs)
+        done = {}       # idx -> results waiting for the files before to be merged
+        pos  = 0        # position in todo of the next file to merge
+        try:
+            for task in pool.imap_unordered(ScanFileTask, scanOrder(todo, metaInfo.fileInfoList)):
+                done[task[0]] = task[1:]
+                while pos < len(todo) and todo[pos] in done:
+                    idx = todo[pos]
+                    res, blocks, code, stamp = done.pop(idx)
+                    mergeScanResult(idx, *res)
+                    mergeBlocks(blocks)
+                    if code is not None: metaInfo.formCode.put(res[0].fileName, code, False) # the worker did spill it
+                    if stamp is not None: hypercore.cache.stamps.setdefault(res[0].fileName, stamp)
+                    pbarUpdate(idx+1)
+                    pos += 1
+        finally: # do not leave the workers behind
+            pool.terminate()
+            pool.join()
+    elif metaInfo.useCache:
+        for idx in todo:
+            pbarUpdate(idx+1)
+            mergeScanResult(idx, *ScanFileWorker(idx))
+    else:
+        for idx in todo:
+            pbarUpdate(idx+1)
+            ScanFileForObjects(metaInfo.fileInfoList[idx])
+
+    if cache is not None and metaInfo.useJavaDoc:
+        try:
+            cache.putData('javadoc',(blockMemoSignature(),getBlockMemo()))
+        except Exception, e:
+            logger.warn(_('Could not cache the JavaDoc blocks: %s'), e)
 
     # complete line on task completion
     pbarClose()
 
 
 #=============================================================[ Usage Scan ]===
+#------------------------------------------------------------------------------
+class UsingObjectIndex(object):
+    """
+    Line number index of all objects of a file, used by findUsingObject to
+    identify the object "starting closest before" a given line by bisection
+    (instead of walking all object lists for each call).
+    Objects are kept in the lists as found by the object scan (i.e. they are
+    not necessarily sorted by line number), and the index reproduces what a
+    walk through those lists gives:
+      * 'first' lists: last object before the first one starting at/after the line
+      * 'last' lists: last object in the list starting before the line
+      * package members: as 'first', in the last package whose first member
+        starts before the line
+    On equal line numbers, the type coming first in the candidate list wins.
+    """
+    def __init__(self,fInfo):
+        """
+        Build the index for the given file
+        @param self
+        @param object fInfo FileInfo object
+        """
+        pkgFuncs = [p.functionInfoList for p in fInfo.packageInfoList if p.functionInfoList]
+        pkgProcs = [p.procedureInfoList for p in fInfo.packageInfoList if p.procedureInfoList]
+        # (object type, lookup, list, placeholder class)
+        self.candidates = [
+            ('sequence', self.lookup,  self.prefixMax(fInfo.seqInfoList),       ElemInfo),
+            ('synonym',  self.lookup,  self.prefixMax(fInfo.synInfoList),       ElemInfo),
+            ('tab',      self.lookup,  self.prefixMax(fInfo.tabInfoList),       ElemInfo),
+            ('view',     self.lookup,  self.prefixMax(fInfo.viewInfoList),      ElemInfo),
+            ('mview',    self.lookup,  self.prefixMax(fInfo.mviewInfoList),     ElemInfo),
+            ('pkg',      self.lookup,  self.suffixMin(fInfo.packageInfoList),   PackageInfo),
+            ('func',     self.members, self.memberIndex(pkgFuncs),              ElemInfo),
+            ('trigger',  self.lookup,  self.prefixMax(fInfo.triggerInfoList),   ElemInfo),
+            ('type',     self.lookup,  self.prefixMax(fInfo.typeInfoList),      ElemInfo),
+            ('proc',     self.members, self.memberIndex(pkgProcs),              ElemInfo),
+            ('func',     self.lookup,  self.prefixMax(fInfo.functionInfoList),  ElemInfo),
+            ('proc',     self.lookup,  self.prefixMax(fInfo.procedureInfoList), ElemInfo),
+            ('form',     self.lookup,  self.suffixMin(fInfo.formInfoList),      FormInfo)
+        ]
+
+    def prefixMax(self,objList):
+        """
+        Index for 'first' lookups
+        @param self
+        @param list objList list of objects
+        @return tuple (list of running maxima of the line numbers, objList)
+        """
+        keys = []
+        top = None
+        for obj in objList:
+            if top is None or obj.lineNumber > top: top = obj.lineNumber
+            keys.append(top)
+        return keys, objList
+
+    def suffixMin(self,objList):
+        """
+        Index for 'last' lookups
+        @param self
+        @param list objList list of objects
+        @return tuple (list of the minimal line numbers from here to the end, objList)
+        """
+        keys = [0] * len(objList)
+        low = None
+        for i in range(len(objList)-1,-1,-1):
+            if low is None or objList[i].lineNumber < low: low = objList[i].lineNumber
+            keys[i] = low
+        return keys, objList
+
+    def memberIndex(self,memberLists):
+        """
+        Index for package member lookups
+        @param self
+        @param list memberLists list of (non-empty) function/procedure lists, one per package
+        @return tuple (suffixMin of the packages first members, list of prefixMax per package)
+        """
+        firsts = self.suffixMin([members[0] for members in memberLists])[0]
+        return firsts, [self.prefixMax(members) for members in memberLists]
+
+    def lookup(self,index,lineNumber):
+        """
+        Lookup for prefixMax ('first') and suffixMin ('last') indexes - both
+        have sorted keys, and the object we want is the one before the first
+        key reaching lineNumber
+        """
+        keys, objList = index
+        pos = bisect_left(keys,lineNumber)
+        if pos: return objList[pos-1]
+        return None
+
+    def members(self,index,lineNumber):
+        """ Lookup for memberIndex indexes """
+        firsts, packages = index
+        pos = bisect_left(firsts,lineNumber)
+        if pos: return self.lookup(packages[pos-1],lineNumber)
+        return None
+
+    def find(self,lineNumber):
+        """
+        Find the object starting closest before the given line
+        @param self
+        @param int lineNumber line number
+        @return tuple (str objectType, object objectInfo) - objectType is 'file'
+                (with an empty objectInfo) if there's no such object
+        """
+        found = None
+        for otype, lookup, index, placeholder in self.candidates:
+            obj = lookup(index,lineNumber)
+            if obj is None:
+                oline = -1
+            else:
+                oline = obj.lineNumber
+            if found is None or oline > found[1]:
+                found = (otype, oline, obj, placeholder)
+        otype, oline, obj, placeholder = found
+        if obj is None: obj = placeholder()
+        if oline < 0: otype = 'file' # No object found
+        return otype, obj
+
+
 #------------------------------------------------------------------------------
 def findUsingObject(fInfo,lineNumber):
     """
@@ -696,75 +1229,8 @@ def findUsingObject(fInfo,lineNumber):
     @param  integer lineNumber line number of the actual call
     @return tuple   otuple     (str objectType, object objectInfo)
     """
-    vObj = ElemInfo()
-    mObj = ElemInfo()
-    tObj = ElemInfo()
-    pObj = ElemInfo()
-    fObj = ElemInfo()
-    prObj = ElemInfo() # stand-alone
-    fuObj = ElemInfo() # stand-alone
-    sqObj = ElemInfo()
-    syObj = ElemInfo()
-    trObj = ElemInfo()
-    tyObj = ElemInfo()
-    PObj = PackageInfo()
-    foObj = FormInfo()
-    for sInfo in fInfo.triggerInfoList:
-        if sInfo.lineNumber < lineNumber: trObj = sInfo
-        else: break;
-    for sInfo in fInfo.typeInfoList:
-        if sInfo.lineNumber < lineNumber: tyObj = sInfo
-        else: break;
-    for sInfo in fInfo.seqInfoList:
-        if sInfo.lineNumber < lineNumber: sqObj = sInfo
-        else: break;
-    for sInfo in fInfo.synInfoList:
-        if sInfo.lineNumber < lineNumber: syObj = sInfo
-        else: break;
-    for sInfo in fInfo.tabInfoList:
-        if sInfo.lineNumber < lineNumber: tObj = sInfo
-        else: break
-    for sInfo in fInfo.viewInfoList:
-        if sInfo.lineNumber < lineNumber: vObj = sInfo
-        else: break
-    for sInfo in fInfo.mviewInfoList:
-        if sInfo.lineNumber < lineNumber: mObj = sInfo
-        else: break
-    for sInfo in fInfo.functionInfoList:
-        if sInfo.lineNumber < lineNumber: fuObj = sInfo
-        else: break
-    for sInfo in fInfo.procedureInfoList:
-        if sInfo.lineNumber < lineNumber: prObj = sInfo
-        else: break
-    for pInfo in fInfo.packageInfoList:
-        if pInfo.lineNumber < lineNumber: PObj = pInfo
-        for vInfo in pInfo.functionInfoList:
-            if vInfo.lineNumber < lineNumber: fObj = vInfo
-            else: break
-        for vInfo in pInfo.procedureInfoList:
-            if vInfo.lineNumber < lineNumber: pObj = vInfo
-            else: break
-    for sInfo in fInfo.formInfoList:
-        if sInfo.lineNumber < lineNumber: foObj = sInfo
-    sobj = [
-            ['sequence',sqObj.lineNumber,sqObj],
-            ['synonym',syObj.lineNumber,syObj],
-            ['tab',tObj.lineNumber,tObj],
-            ['view',vObj.lineNumber,vObj],
-            ['mview',mObj.lineNumber,mObj],
-            ['pkg',PObj.lineNumber,PObj],
-            ['func',fObj.lineNumber,fObj],
-            ['trigger',trObj.lineNumber,trObj],
-            ['type',tyObj.lineNumber,tyObj],
-            ['proc',pObj.lineNumber,pObj],
-            ['func',fuObj.lineNumber,fuObj],
-            ['proc',prObj.lineNumber,prObj],
-            ['form',foObj.lineNumber,foObj]
-           ]
-    sobj.sort(key=lambda obj: obj[1], reverse=True)
-    if sobj[0][1] < 0: rtype = 'file' # No object found
-    else: rtype = sobj[0][0]
-    return rtype,sobj[0][2]
+    if fInfo.objectIndex is None: fInfo.objectIndex = UsingObjectIndex(fInfo)
+    return fInfo.objectIndex.find(lineNumber)
 
 
 #------------------------------------------------------------------------------
@@ -784,9 +1250,7 @@ def addWhereUsed(objectInfo,fileInfo,lineNumber,otype):
 
     # check for what_used
     if uType != 'trigger': # triggers are not "used", they are "fired"
-        if fileInfo.fileName not in objectInfo.whereUsed.keys():
-            objectInfo.whereUsed[fileInfo.fileName] = []
-        objectInfo.whereUsed[fileInfo.fileName].append((fileInfo, lineNumber, uType, uObj))
+        objectInfo.whereUsed.add(fileInfo.fileName, (fileInfo, lineNumber, uType, uObj))
     # generate a unique number for use in making where used file if needed
     if objectInfo.uniqueNumber == 0: objectInfo.uniqueNumber = metaInfo.NextIndex()
     if uType in ['sequence','tab']: # these objects are not using other objects
@@ -813,16 +1277,10 @@ def addWhereUsed(objectInfo,fileInfo,lineNumber,otype):
       else:
         fname = fileInfo.fileName
         finfo = fileInfo
-      if fname not in uObj.whatUsed.keys():
-        uObj.whatUsed[fname] = []
-      if not (finfo, objectInfo.lineNumber, otype, objectInfo) in uObj.whatUsed[fname]:
-        uObj.whatUsed[fname].append((finfo, objectInfo.lineNumber, otype, objectInfo))
+      uObj.whatUsed.add(fname, (finfo, objectInfo.lineNumber, otype, objectInfo), True)
       if uObj.uniqueNumber == 0: uObj.uniqueNumber = metaInfo.NextIndex()
       if uType in ['func','proc'] and hasattr(uObj.parent,'whatUsed'): # add the info to pkg as well
-        if finfo.fileName not in uObj.parent.whatUsed.keys():
-            uObj.parent.whatUsed[finfo.fileName] = []
-        if not (finfo, objectInfo.lineNumber, otype, objectInfo) in uObj.parent.whatUsed[finfo.fileName]:
-          uObj.parent.whatUsed[finfo.fileName].append((finfo, objectInfo.lineNumber, otype, objectInfo))
+        uObj.parent.whatUsed.add(finfo.fileName, (finfo, objectInfo.lineNumber, otype, objectInfo), True)
         if uObj.parent.uniqueNumber == 0: uObj.parent.uniqueNumber = metaInfo.NextIndex()
 
     # handle depgraph info
@@ -834,361 +1292,358 @@ def addWhereUsed(objectInfo,fileInfo,lineNumber,otype):
         else: oto = objectInfo.parent.fileName
         oto = os.path.split(oto)[1]
         ofrom = os.path.split(fileInfo.fileName)[1]
-        dep = '"' + ofrom + '" -> "' + oto + '";'
-        if not dep in metaInfo.depGraph['file2file']:
-            metaInfo.depGraph['file2file'].append(dep)
+        metaInfo.depGraph['file2file'].addEdge(ofrom, oto)
         # medium: object -> file
         if uType in ['proc','func'] and type(uObj.parent).__name__=='PackageInfo': uname = uObj.parent.name.lower() + '.' + uObj.name.lower()
         else: uname = uObj.name.lower()
-        dep = '"' + uname + '" -> "' + oto + '";'
-        if not dep in metaInfo.depGraph['object2file']:
-            metaInfo.depGraph['object2file'].append(dep)
+        if metaInfo.depGraph['object2file'].addEdge(uname, oto):
             try: # might fail due to inline-comments
-                props = '"' + uname + '" [color="'+metaInfo.colors[uType][0]+'",fontcolor="'+metaInfo.colors[uType][1] + '"];'
-                if not props in metaInfo.depGraph['object2file']:
-                    metaInfo.depGraph['object2file'].append(props)
+                metaInfo.depGraph['object2file'].addNode(uname, metaInfo.colors[uType])
             except:
                 logger.debug(_('DepGraph: could not set properties from element %(object)s to file %(file)s line %(line)d'),{'object':uObj.name or '<unknown>', 'file':oto, 'line':lineNumber})
         # medium: file -> object
         if otype in ['proc','func'] and type(objectInfo.parent).__name__=='PackageInfo': oto = objectInfo.parent.name.lower() + '.' + objectInfo.name.lower()
         else: oto = objectInfo.name.lower()
-        dep = '"' + ofrom + '" -> "' + oto + '";'
-        if not dep in metaInfo.depGraph['file2object']:
-            metaInfo.depGraph['file2object'].append(dep)
+        if metaInfo.depGraph['file2object'].addEdge(ofrom, oto):
             try:
-                props = '"' + uname + '" [color="'+metaInfo.colors[uType][0]+'",fontcolor="'+metaInfo.colors[uType][1] + '"];'
-                if not props in metaInfo.depGraph['file2object']:
-                    metaInfo.depGraph['file2object'].append(props)
-                props = '"' + oto + '" [color="'+metaInfo.colors[otype][0]+'",fontcolor="'+metaInfo.colors[otype][1] + '"];'
-                if not props in metaInfo.depGraph['file2object']:
-                    metaInfo.depGraph['file2object'].append(props)
+                metaInfo.depGraph['file2object'].addNode(uname, metaInfo.colors[uType])
+                metaInfo.depGraph['file2object'].addNode(oto, metaInfo.colors[otype])
             except:
                 logger.debug(_('DepGraph: could not set properties for element %(object)s (to file %(file)s)'),{'object':uObj.name or '<unknown>', 'file':oto})
         # full: object -> object
         if otype in ['proc','func'] and type(objectInfo.parent).__name__=='PackageInfo': oname = objectInfo.parent.name.lower() + '.' + objectInfo.name.lower()
         else: oname = objectInfo.name.lower()
-        dep = '"' + uname + '" -> "' + oname + '";'
-        if not dep in metaInfo.depGraph['object2object']:
-            metaInfo.depGraph['object2object'].append(dep)
+        if metaInfo.depGraph['object2object'].addEdge(uname, oname):
             try:
-                props = '"' + uname + '" [color="'+metaInfo.colors[uType][0]+'",fontcolor="'+metaInfo.colors[uType][1] + '"];'
-                if not props in metaInfo.depGraph['object2object']:
-                    metaInfo.depGraph['object2object'].append(props)
-                props = '"' + oname + '" [color="'+metaInfo.colors[otype][0]+'",fontcolor="'+metaInfo.colors[otype][1] + '"];'
-                if not props in metaInfo.depGraph['object2object']:
-                    metaInfo.depGraph['object2object'].append(props)
-                props = '"' + oto + '" [color="'+metaInfo.colors[otype][0]+'",fontcolor="'+metaInfo.colors[otype][1] + '"];'
-                if not props in metaInfo.depGraph['file2object']:
-                    metaInfo.depGraph['file2object'].append(props)
+                metaInfo.depGraph['object2object'].addNode(uname, metaInfo.colors[uType])
+                metaInfo.depGraph['object2object'].addNode(oname, metaInfo.colors[otype])
+                metaInfo.depGraph['file2object'].addNode(oto, metaInfo.colors[otype])
             except:
                 logger.debug(_('DepGraph: could not set properties for objects %(object)s/%(info)s'),{'object':uObj.name or '<unknown>', 'info':objectInfo.name or '<unknown>'})
 
 
 
 #------------------------------------------------------------------------------
-def ScanFilesForUsage():
+def ScanFileForUsage(file_info,matcher,tokens=None):
     """
-    Scans files collected in metaInfo.fileInfoList and checks them line by line
-    with metaInfo.<object>list for calls to those objects. If it finds any, it
-    updates <object>list where_used and what_used properties accordingly.
+    Scan a single file for usage of the objects collected in the matcher (see
+    ScanFilesForUsage). This does not modify any objects - it just returns the
+    hits, so they can be applied by applyUsage (even if found by another process).
+    @param object file_info FileInfo object of the file to scan
+    @param object matcher UsageMatcher holding all known objects
+    @param optional set tokens if given, the identifiers of the (usage relevant)
+           code are added to it (see UsageMatcher.scan)
+    @return list hits tuples (matcher idx, lineNumber)
     """
-    pbarInit(_("Scanning source files for where views and packages are used"),0,len(metaInfo.fileInfoList), logname)
+    if file_info.fileType == 'xml':
+        text = metaInfo.formCode.get(file_info.fileName)
+    else:
+        infile = fopen(file_info.fileName, "r", metaInfo.encoding)
+        text = joinLines(infile.readlines())
+        infile.close()
 
-    if metaInfo.indexPage['form'] != '' and metaInfo.useCache: cache = hypercore.cache.cache(metaInfo.cacheDirectory)
+    # strip comments (and strings, unless we shall scan them) - so we only see code
+    code = splitCode(text, not metaInfo.scanInString)[0]
+    fileLines = code.split('\n')
+    new_text = []
+    granting = False # inside a GRANT statement
 
-    if metaInfo.scanInString: logger.info(_('Including strings in where_used scan'))
-    else:                     logger.info(_('Excluding strings from where_used scan'))
+    for line, (token_list, terminator) in zip(fileLines, lineTokens(fileLines)):
 
-    outerfileInfoList = []
-    for file_info in metaInfo.fileInfoList:
-        outerfileInfoList.append(file_info)
-
-    i = 0
-    for outer_file_info in outerfileInfoList:
-        # update progressbar
-        i += 1
-        pbarUpdate(i)
-
-        if outer_file_info.fileType == 'xml':
-            formcode = ''
-            if metaInfo.useCache:
-                try:
-                    formcode = cache.get(outer_file_info.fileName,'formcode')
-                except:
-                    formcode = ''
-            else:
-                formcode = '' ### need to re-create in case caching is turned off
-            fileLines = formcode.split('\n')
+        # Skip empty lines (which also end a SQL statement for SQL*Plus)
+        if len(token_list) < 1:
+            granting = False
+            new_text.append('')
+            continue
+        if granting or token_list[0].upper() == 'GRANT':
+            # that's no usage - up to the end of the statement
+            granting = terminator is None
+            new_text.append('')
+            continue
+
+        # usage only, no creates, replace, force views packages functions or procedures
+        # we are scanning a LINE for USAGE - so if we find a CREATE on the line, having
+        # a usage on the very same line is out of the question
+        usage_flag = 1
+        for token_index in range(len(token_list)):
+
+            # CREATE [OR REPLACE] TYPE
+            if metaInfo.indexPage['type'] and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "TYPE" \
+            and token_list[token_index].upper() in ['CREATE','REPLACE','DROP','ALTER']:
+                # we are creating, dropping, altering, or commenting - not using.  Set flag to 0
+                usage_flag = 0
+
+            # CREATE [OR REPLACE] TRIGGER
+            if metaInfo.indexPage['trigger'] and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "TRIGGER" \
+            and token_list[token_index].upper() in ['CREATE','REPLACE','DROP','ALTER']:
+                # we are creating, dropping, altering, or commenting - not using.  Set flag to 0
+                usage_flag = 0
+
+            # CREATE [GLOBAL TEMPORARY] TABLE
+            if metaInfo.indexPage['tab'] and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "TABLE" \
+            and token_list[token_index].upper() in ['CREATE','TEMPORARY','DROP','ALTER']:
+                # we are creating, dropping, or altering - not using.  Set flag to 0
+                usage_flag = 0
+
+            # check for COMMENT ON (COLUMN | TABLE | MATERIALIZED VIEW | INDEXTYPE | OPERATOR | MINING MODEL)
+            if metaInfo.indexPage['tab'] != '' and len(token_list) > token_index+1 and token_index > 0 \
+            and token_list[token_index+1].upper() in ['COLUMN','TABLE','INDEXTYPE','OPERATOR','MINING','MATERIALIZED'] \
+            and token_list[token_index].upper() == "ON" \
+            and token_list[token_index-1].upper() == "COMMENT":
+                # we are just commenting on a table column
+                usage_flag = 0
+
+            # look for CREATE INDEX
+            if metaInfo.indexPage['tab'] != '' and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "INDEX" \
+            and token_list[token_index].upper() == "CREATE":
+                # we don't consider index creation as usage for tables
+                usage_flag = 0
+
+            # look for CREATE VIEW, REPLACE VIEW, FORCE VIEW
+            if metaInfo.indexPage['view'] != '' and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "VIEW" \
+            and token_list[token_index].upper() in ['CREATE','REPLACE','FORCE','EDITIONABLE']:
+                # we are creating, forcing, or replacing - not using.  Set flag to 0
+                usage_flag = 0
+
+            # look for CREATE MATERIALIZED VIEW
+            if metaInfo.indexPage['mview'] != '' and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "VIEW" \
+            and token_list[token_index].upper() == "MATERIALIZED":
+                # we are creating (or possibly dropping) - not using.  Set flag to 0
+                usage_flag = 0
+
+            # look for sequences
+            if metaInfo.indexPage['sequence'] != '' and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "SEQUENCE" \
+            and token_list[token_index].upper() in ['CREATE','DROP','ALTER']:
+                # we are creating, altering, or dropping - not using.  Set flag to 0
+                usage_flag = 0
+
+            # CREATE SYNONYMs
+            if metaInfo.indexPage['synonym'] != '' and len(token_list) > token_index+1 \
+            and token_list[token_index+1].upper() == "SYNONYM" \
+            and token_list[token_index].upper() in ['CREATE','REPLACE','DROP','PUBLIC']:
+                # we are creating, or dropping - not using.  Set flag to 0
+                usage_flag = 0
+
+            # PACKAGE (CREATE|ALTER|DROP)
+            if token_list[token_index].upper() == "PACKAGE" \
+            and len(token_list) > token_index+2:
+                #and token_list[token_index+1].upper() == "BODY": # commented out - creates trouble if package spec is in the same file
+                usage_flag = 0
+
+            # look for stand-alone functions and procedures (those of the packages are
+            # already excluded in the previous step)
+            if token_index>0 and token_list[token_index].upper() == "FUNCTION" and token_list[token_index-1] in ['CREATE','REPLACE']:
+                usage_flag = 0
+            # look for procedures
+            if token_index>0 and token_list[token_index].upper() == "PROCEDURE" and token_list[token_index-1] in ['CREATE','REPLACE']:
+                usage_flag = 0
+
+            # look for END x
+            if token_list[token_index].upper() == "END" \
+            and len(token_list) > token_index+1:
+                usage_flag = 0
+
+
+        if usage_flag == 0: # this line holds some CREATE statement, no USAGE
+            new_text.append('')
         else:
-            infile = fopen(outer_file_info.fileName, "r", metaInfo.encoding)
-            fileLines = infile.readlines()
-            infile.close()
-
-        # if we find a package definition, this flag tells us to also look for
-        # functions and procedures.  If we don't find a package definition, there
-        # is no reason to look for them
-        package_count = -1
-        in_block_comment = 0
-        new_file = 1
-        new_text = ''
-
-        for lineNumber in range(len(fileLines)):
-
-            if new_file == 1:
-                token_list = fileLines[lineNumber].split()
-            else:
-                token_list = token_list1
+            new_text.append(line)
+    new_text = '\n'.join(new_text)
 
-            # len()-1 because we start with index 0
-            if len(fileLines)-1 > lineNumber and not metaInfo.scanInString:
-                fileLines[lineNumber+1], matched_string = eatStrings(fileLines[lineNumber+1])
-                token_list1 = fileLines[lineNumber+1].split()
-            else:
-                token_list1 = []
-            new_file = 0
+    # Find all previously collected objects used in this file with a single pass
+    # - including calls to functions/procedures of the packages defined in this
+    # file without the package name (short references; (inline) comments are
+    # already stripped by splitCode) - and return the hits in the order the
+    # objects were collected
+    if metaInfo.scanShortRefs: scope = file_info.uniqueNumber
+    else: scope = None
+    lines = LineIndex(new_text)
+    hits  = matcher.scan(new_text,lines,tokens,scope)
+    usage = []
+    for idx in sorted(hits.keys()):
+        for ires in hits[idx]: usage.append((idx, ires[0]))
 
-            # Skip empty lines
-            if len(token_list) < 1:
-                new_text += '\n'
-                continue
+    return usage
 
-            # ignore lines that begin with comments
-            if token_list[0][:2] == "--" or token_list[0][:2] == "//" or token_list[0][:2] == "##":
-                new_text += '\n'
-                continue
-            # ignore block comments
-            if token_list[0][:2] == "/*" and token_list[0][len(token_list[0])-2:len(token_list[0])] == "*/":
-                # block comments like  "/***....*****/"
-                token_list.pop(0)
-            elif token_list[0][:2] == "/*" or in_block_comment == 1:
-                # 
-                in_block_comment = 1
-                clean_list = []
-                for token_index in range(len(token_list)):
-                    if token_list[token_index][:2] == "*/":
-                        clean_list.append(token_index)
-                        in_block_comment = 0
-                    else:
-                        clean_list.append(token_index)
-                if len(clean_list) > 0:
-                    if len(clean_list) == 1:
-                        # pop only index 0
-                        token_list.pop(clean_list[0])
-                    else:
-                        for clean_index in range(len(clean_list)-1,-1,-1):
-                            # work reverse from back
-                            token_list.pop(clean_list[clean_index])
-            if  len(token_list) == 0:
-                # nothing more on line
-                new_text += '\n'
-                continue
-            if token_list[0].upper() in ['PROMPT','GRANT']:
-                # that's no usage
-                new_text += '\n'
-                continue
 
-            # usage only, no creates, replace, force views packages functions or procedures
-            # we are scanning a LINE for USAGE - so if we find a CREATE on the line, having
-            # a usage on the very same line is out of the question
-            usage_flag = 1
-            for token_index in range(len(token_list)):
+#------------------------------------------------------------------------------
+def applyUsage(file_info,matcher,usage):
+    """
+    Add the where_used/what_used info for the hits ScanFileForUsage found
+    @param object file_info FileInfo object of the scanned file
+    @param object matcher UsageMatcher the hits refer to
+    @param list usage hits as returned by ScanFileForUsage
+    """
+    for idx, lineNumber in usage:
+        elem, otype = matcher.targets[idx]
+        if otype in ['shortfunc','shortproc']: # package member without the package name
+            addWhereUsed(elem.parent, file_info, lineNumber, 'pkg')
+            addWhereUsed(elem, file_info, lineNumber, otype[5:])
+        else:
+            addWhereUsed(elem, file_info, lineNumber, otype)
 
-                # CREATE [OR REPLACE] TYPE
-                if metaInfo.indexPage['type'] and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "TYPE" \
-                and token_list[token_index].upper() in ['CREATE','REPLACE','DROP','ALTER']:
-                    # we are creating, dropping, altering, or commenting - not using.  Set flag to 0
-                    usage_flag = 0
 
-                # CREATE [OR REPLACE] TRIGGER
-                if metaInfo.indexPage['trigger'] and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "TRIGGER" \
-                and token_list[token_index].upper() in ['CREATE','REPLACE','DROP','ALTER']:
-                    # we are creating, dropping, altering, or commenting - not using.  Set flag to 0
-                    usage_flag = 0
+#------------------------------------------------------------------------------
+def usageSignature():
+    """
+    Get a signature of the settings the results of the usage scan depend on
+    (besides the file itself and the objects it could refer to, see usageCandidates).
+    Cached results are only valid for the same signature.
+    @return string signature
+    """
+    # the first element is the format version of the cached data
+    sig = repr(( 4, metaInfo.encoding, metaInfo.scanInString, metaInfo.scanShortRefs,
+                 sorted(metaInfo.indexPage.items()) ))
+    return md5(sig).hexdigest()
 
-                # CREATE [GLOBAL TEMPORARY] TABLE
-                if metaInfo.indexPage['tab'] and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "TABLE" \
-                and token_list[token_index].upper() in ['CREATE','TEMPORARY','DROP','ALTER']:
-                    # we are creating, dropping, or altering - not using.  Set flag to 0
-                    usage_flag = 0
-
-                # check for COMMENT ON (COLUMN | TABLE | MATERIALIZED VIEW | INDEXTYPE | OPERATOR | MINING MODEL)
-                if metaInfo.indexPage['tab'] != '' and len(token_list) > token_index+1 and token_index > 0 \
-                and token_list[token_index+1].upper() in ['COLUMN','TABLE','INDEXTYPE','OPERATOR','MINING','MATERIALIZED'] \
-                and token_list[token_index].upper() == "ON" \
-                and token_list[token_index-1].upper() == "COMMENT":
-                    # we are just commenting on a table column
-                    usage_flag = 0
-
-                # look for CREATE INDEX
-                if metaInfo.indexPage['tab'] != '' and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "INDEX" \
-                and token_list[token_index].upper() == "CREATE":
-                    # we don't consider index creation as usage for tables
-                    usage_flag = 0
 
-                # look for CREATE VIEW, REPLACE VIEW, FORCE VIEW
-                if metaInfo.indexPage['view'] != '' and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "VIEW" \
-                and token_list[token_index].upper() in ['CREATE','REPLACE','FORCE','EDITIONABLE']:
-                    # we are creating, forcing, or replacing - not using.  Set flag to 0
-                    usage_flag = 0
+#------------------------------------------------------------------------------
+def usageKeys(matcher):
+    """
+    Create keys identifying the targets of the matcher across runs: name of the
+    file the object is defined in, object type, and running number by type
+    within that file (objects are collected in the same order for an unchanged file)
+    @param object matcher UsageMatcher as prepared by ScanFilesForUsage
+    @return list keys tuples (string fileName, string otype, int number) by matcher idx
+    """
+    keys   = []
+    counts = {}
+    for elem, otype in matcher.targets:
+        finfo = elem.parent
+        if otype in ['func','proc','shortfunc','shortproc']: finfo = finfo.parent
+        key = (finfo.fileName, otype)
+        num = counts.get(key,0)
+        counts[key] = num + 1
+        keys.append(key + (num,))
+    return keys
 
-                # look for CREATE MATERIALIZED VIEW
-                if metaInfo.indexPage['mview'] != '' and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "VIEW" \
-                and token_list[token_index].upper() == "MATERIALIZED":
-                    # we are creating (or possibly dropping) - not using.  Set flag to 0
-                    usage_flag = 0
 
-                # look for sequences
-                if metaInfo.indexPage['sequence'] != '' and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "SEQUENCE" \
-                and token_list[token_index].upper() in ['CREATE','DROP','ALTER']:
-                    # we are creating, altering, or dropping - not using.  Set flag to 0
-                    usage_flag = 0
+#------------------------------------------------------------------------------
+def usageCandidates(matcher,keys,tokens):
+    """
+    Describe the objects a file with the given identifiers could refer to. If
+    this does not change (and neither does the file), neither do its hits.
+    @param object matcher UsageMatcher as prepared by ScanFilesForUsage
+    @param list keys as returned by usageKeys
+    @param set tokens identifiers of the file (see ScanFileForUsage)
+    @return list candidates (sorted)
+    """
+    return sorted([(kind,keys[idx],name,member) for kind, idx, name, member in matcher.candidates(tokens)])
 
-                # CREATE SYNONYMs
-                if metaInfo.indexPage['synonym'] != '' and len(token_list) > token_index+1 \
-                and token_list[token_index+1].upper() == "SYNONYM" \
-                and token_list[token_index].upper() in ['CREATE','REPLACE','DROP','PUBLIC']:
-                    # we are creating, or dropping - not using.  Set flag to 0
-                    usage_flag = 0
-
-                # PACKAGE (CREATE|ALTER|DROP)
-                if token_list[token_index].upper() == "PACKAGE" \
-                and len(token_list) > token_index+2:
-                    #and token_list[token_index+1].upper() == "BODY": # commented out - creates trouble if package spec is in the same file
-                    usage_flag = 0
-
-                # look for stand-alone functions and procedures (those of the packages are
-                # already excluded in the previous step)
-                if token_index>0 and token_list[token_index].upper() == "FUNCTION" and token_list[token_index-1] in ['CREATE','REPLACE']:
-                    usage_flag = 0
-                # look for procedures
-                if token_index>0 and token_list[token_index].upper() == "PROCEDURE" and token_list[token_index-1] in ['CREATE','REPLACE']:
-                    usage_flag = 0
-
-                # look for END x
-                if token_list[token_index].upper() == "END" \
-                and len(token_list) > token_index+1:
-                    usage_flag = 0
-
-
-            if usage_flag == 0: # this line holds some CREATE statement, no USAGE
-                new_text += '\n'
-            else:
-                new_text += fileLines[lineNumber]
-
-        # Loop through all previously found views and packages to see if they are used in this line of text
-        for inner_file_info in metaInfo.fileInfoList:
-
-            # if this FileInfo instance has types
-            for elem in inner_file_info.typeInfoList:
-                # perform case insensitive find
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'type')
-
-            # if this FileInfo instance has triggers
-            for elem in inner_file_info.triggerInfoList:
-                # perform case insensitive find
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'trigger')
-
-            # if this FileInfo instance has tables
-            for elem in inner_file_info.tabInfoList:
-                # perform case insensitive find
-                try:
-                    res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                except:
-                    logger.error('RegExp error searching for "'+tab_info.name+'"')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'tab')
-
-            # if this FileInfo instance has views
-            for elem in inner_file_info.viewInfoList:
-                # perform case insensitive find
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'view')
-
-            # if this FileInfo instance has materialized views
-            for elem in inner_file_info.mviewInfoList:
-                # perform case insensitive find
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'mview')
-
-            # if this FileInfo instance has synonyms
-            for elem in inner_file_info.synInfoList:
-                # perform case insensitive find
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'synonym')
-
-            # if this FileInfo instance has sequences
-            for elem in inner_file_info.seqInfoList:
-                # perform case insensitive find
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'sequence')
-
-            # if this FileInfo instance has stand-alone functions
-            for elem in inner_file_info.functionInfoList:
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'function')
-
-            # if this FileInfo instance has stand-alone procedures
-            for elem in inner_file_info.procedureInfoList:
-                res = getWordLineNr(new_text,'\\b'+elem.name+'\\b')
-                for ires in res:
-                    addWhereUsed(elem, outer_file_info, ires[0], 'procedure')
-
-            # if this FileInfo instance has packages
-            for package_info in inner_file_info.packageInfoList:
-
-                # perform case insensitive find, this is "package name"."function or procedure name"
-                res = getWordLineNr(new_text,'\\b'+package_info.name+'\\.\S')
-                if len(res):
-                    for ires in res:
-                        addWhereUsed(package_info, outer_file_info, ires[0], 'pkg')
-
-                    #look for any of this packages' functions
-                    for function_info in package_info.functionInfoList:
-                        res = getWordLineNr(new_text,'\\b'+package_info.name+'\.'+function_info.name+'\\b')
-                        for ires in res:
-                            addWhereUsed(function_info, outer_file_info, ires[0], 'func')
-
-                    #look for any of this packages procedures
-                    for procedure_info in package_info.procedureInfoList:
-                        res = getWordLineNr(new_text,'\\b'+package_info.name+'\.'+procedure_info.name+'\\b')
-                        for ires in res:
-                            addWhereUsed(procedure_info, outer_file_info, ires[0], 'proc')
-
-                ### File internal references - possible calls without a package_name
-                if outer_file_info.uniqueNumber == inner_file_info.uniqueNumber and metaInfo.scanShortRefs:
-
-                    #look for any of this packages' functions
-                    for function_info in package_info.functionInfoList:
-                        res = getWordLineNr(new_text,'(^|\\s|[(;,])'+function_info.name+'([ (;,)]|$)')
-                        for ires in res:
-                            # sometimes crashes with "list index out of range" when ires[0]<len(fileLines) is omitted (somehow new_text has an additional newline)
-                            if not (ires[0] > len(fileLines) and fileLines[ires[0]].find('--') > -1 and fileLines[ires[0]].find('--') < ires[1]): # check for inline comments to be excluded
-                                addWhereUsed(package_info, outer_file_info, ires[0], 'pkg')
-                                addWhereUsed(function_info, outer_file_info, ires[0], 'func')
-
-                    #look for any of this packages procedures
-                    for procedure_info in package_info.procedureInfoList:
-                        res = getWordLineNr(new_text,'(^|\\s|[(;,])'+procedure_info.name+'([ (;,)]|$)')
-                        for ires in res:
-                            if not (ires[0] > len(fileLines) and fileLines[ires[0]].find('--') > -1 and fileLines[ires[0]].find('--') < ires[1]): # check for inline comments to be excluded
-                                addWhereUsed(package_info, outer_file_info, ires[0], 'pkg')
-                                addWhereUsed(procedure_info, outer_file_info, ires[0], 'proc')
+
+#------------------------------------------------------------------------------
+def ScanUsageWorker(idx):
+    """
+    Scan metaInfo.fileInfoList[idx] for usage with the matcher the main process
+    prepared (usageScanData, inherited by the worker processes of the parallel
+    scan). With a usage cache, the hits of a file are taken from there if
+    neither the file nor the objects it could refer to changed since they were
+    stored - so only files affected by a change need to be scanned again.
+    @param int idx index of the file in metaInfo.fileInfoList
+    @return list hits as returned by ScanFileForUsage
+    """
+    file_info = metaInfo.fileInfoList[idx]
+    matcher   = usageScanData['matcher']
+    ucache    = usageScanData['usageCache']
+    if ucache is None:
+        return ScanFileForUsage(file_info, matcher)
+
+    keys = usageScanData['keys']
+    if ucache.check(file_info.fileName,'usage'): cached = ucache.getObj(file_info.fileName,'usage',0)
+    else: cached = False
+    if cached and cached[0] == usageScanData['signature'] and cached[1] == usageCandidates(matcher,keys,cached[2]):
+        try:
+            usage = [(usageScanData['keyIndex'][hit[0]],)+hit[1:] for hit in cached[3]]
+            usage.sort(key=lambda hit: hit[0]) # stable, so hits keep their order per target
+            return usage
+        except KeyError: # target vanished (should not happen with unchanged candidates)
+            pass
+    tokens = set()
+    ucache.remember(file_info.fileName) # the state the hits derive from
+    usage  = ScanFileForUsage(file_info, matcher, tokens)
+    try:
+        ucache.putObj(file_info.fileName,'usage',(usageScanData['signature'],
+            usageCandidates(matcher,keys,tokens), tokens, [(keys[hit[0]],)+hit[1:] for hit in usage]))
+    except Exception, e:
+        logger.warn(_('Could not cache the usage scan results for %(file)s: %(err)s'), {'file':file_info.fileName, 'err':e})
+    return usage
+
+
+#------------------------------------------------------------------------------
+def ScanFilesForUsage():
+    """
+    Scans files collected in metaInfo.fileInfoList and checks them line by line
+    with metaInfo.<object>list for calls to those objects. If it finds any, it
+    updates <object>list where_used and what_used properties accordingly.
+    """
+    pbarInit(_("Scanning source files for where views and packages are used"),0,len(metaInfo.fileInfoList), logname)
+
+    if metaInfo.scanInString: logger.info(_('Including strings in where_used scan'))
+    else:                     logger.info(_('Excluding strings from where_used scan'))
+
+    # Collect all previously found objects into one matcher. The order of
+    # registration defines the order the hits are processed in.
+    matcher   = UsageMatcher()
+    for inner_file_info in metaInfo.fileInfoList:
+        for elem in inner_file_info.typeInfoList:      matcher.addWord(elem.name, (elem,'type'))
+        for elem in inner_file_info.triggerInfoList:   matcher.addWord(elem.name, (elem,'trigger'))
+        for elem in inner_file_info.tabInfoList:       matcher.addWord(elem.name, (elem,'tab'))
+        for elem in inner_file_info.viewInfoList:      matcher.addWord(elem.name, (elem,'view'))
+        for elem in inner_file_info.mviewInfoList:     matcher.addWord(elem.name, (elem,'mview'))
+        for elem in inner_file_info.synInfoList:       matcher.addWord(elem.name, (elem,'synonym'))
+        for elem in inner_file_info.seqInfoList:       matcher.addWord(elem.name, (elem,'sequence'))
+        for elem in inner_file_info.functionInfoList:  matcher.addWord(elem.name, (elem,'function'))
+        for elem in inner_file_info.procedureInfoList: matcher.addWord(elem.name, (elem,'procedure'))
+        for package_info in inner_file_info.packageInfoList:
+            # "package name"."function or procedure name"
+            matcher.addPrefix(package_info.name, (package_info,'pkg'))
+            for function_info in package_info.functionInfoList:
+                matcher.addPair(package_info.name, function_info.name, (function_info,'func'))
+            for procedure_info in package_info.procedureInfoList:
+                matcher.addPair(package_info.name, procedure_info.name, (procedure_info,'proc'))
+            if metaInfo.scanShortRefs:
+                # "function or procedure name" within the file of the package
+                for function_info in package_info.functionInfoList:
+                    matcher.addShort(function_info.name, inner_file_info.uniqueNumber, (function_info,'shortfunc'))
+                for procedure_info in package_info.procedureInfoList:
+                    matcher.addShort(procedure_info.name, inner_file_info.uniqueNumber, (procedure_info,'shortproc'))
+
+    usageScanData['matcher']   = matcher
+    if metaInfo.useCache:
+        # hits of files not affected by any change are taken from the cache
+        usageScanData['usageCache'] = hypercore.cache.cache(metaInfo.cacheDirectory)
+        usageScanData['signature']  = usageSignature()
+        usageScanData['keys']       = usageKeys(matcher)
+        usageScanData['keyIndex']   = dict([(key,idx) for idx, key in enumerate(usageScanData['keys'])])
+    else:
+        usageScanData['usageCache'] = None
+
+    jobs = getJobs(metaInfo.jobs, len(metaInfo.fileInfoList))
+    if jobs > 1:
+        # scan in worker processes, but apply the hits here in file order
+        pool = multiprocessing.Pool(jobs)
+        i = 0
+        try:
+            for usage in pool.imap(ScanUsageWorker, range(len(metaInfo.fileInfoList)), 4):
+                applyUsage(metaInfo.fileInfoList[i], matcher, usage)
+                i += 1
+                pbarUpdate(i)
+        finally: # do not leave the workers behind
+            pool.terminate()
+            pool.join()
+    else:
+        for i in range(len(metaInfo.fileInfoList)):
+            # update progressbar
+            pbarUpdate(i+1)
+            applyUsage(metaInfo.fileInfoList[i], matcher, ScanUsageWorker(i))
+    usageScanData.clear()
 
     # complete line on task completion
     pbarClose()